@@ -0,0 +1,200 @@
+import os
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from BucketMass import bucket_probabilities, uniform_edges
+from ColumnarWriter import read_metadata
+from definitions import ROOT_DIR, ScrambleType
+from Scrambler import FeistelScrambler
+from Shards import read_chunks, read_sidecar, sidecar_path
+
+THEORY_CACHE_DIR = Path(ROOT_DIR) / "results" / "cache" / "theory"
+
+RESULT_NAME_PATTERN = re.compile(r'(\d+[KM]?)[-_](\d+[KM]?)\.(?:csv|parquet|arrow|feather|npy)$')
+
+# Formats of the result files, see OutputType
+RESULT_SUFFIXES = (".csv", ".parquet", ".arrow", ".feather", ".npy")
+
+def _parse_size(size: str) -> int:
+    return int(size.replace('K', '000').replace('M', '000000'))
+
+def parse_result_name(filename: str) -> tuple[int, int] | None:
+    """
+    Extract support size and sample size from a result filename such as '1000000_10000.parquet' or '1M-10K.csv'
+    :return: (n, samples) or None if the name doesn't follow the pattern
+    """
+    match = RESULT_NAME_PATTERN.match(filename)
+    if not match:
+        return None
+    support_str, sample_str = match.groups()
+    return _parse_size(support_str), _parse_size(sample_str)
+
+@lru_cache(maxsize=None)
+def theoretical_distribution(n: int, skew: float, buckets: int) -> np.ndarray:
+    """
+    Theoretical bucket probabilities for (n, skew, buckets), memoized in memory and in an on-disk cache
+    shared by all processes
+    """
+    path = THEORY_CACHE_DIR / f"{n}_{skew!r}_{buckets}.npy"
+    if path.exists():
+        return np.load(path)
+
+    probs = bucket_probabilities(n, skew, uniform_edges(n, buckets))
+
+    # Write to a private file first, so parallel jobs never read a partial cache entry
+    os.makedirs(THEORY_CACHE_DIR, exist_ok=True)
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp, probs)
+    os.replace(tmp, path)
+    return probs
+
+def accuracy_metrics(empirical_probs: np.ndarray, theoretical_probs: np.ndarray, samples: int) -> tuple[float, float, float]:
+    """
+    Compare empirical against theoretical bucket probabilities
+    :return: (TVD, KS statistic, KS p-value)
+    """
+    empirical_cdf = np.cumsum(empirical_probs)
+    theoretical_cdf = np.cumsum(theoretical_probs)
+    
+    tvd = 0.5 * np.sum(np.abs(empirical_probs - theoretical_probs))
+    ks_statistic = np.max(np.abs(empirical_cdf - theoretical_cdf))
+
+    lambda_n = np.sqrt(samples) * ks_statistic
+    p_value = stats.kstwobign.sf(lambda_n)
+    return float(tvd), float(ks_statistic), float(p_value)
+
+def result_metadata(filepath: Path) -> dict:
+    """
+    Metadata of the run behind a result file, from its JSON sidecar or from the schema of Parquet, Arrow and Feather files
+    :return: dict, empty if the file carries none
+    """
+    if sidecar_path(filepath).exists():
+        return read_sidecar(filepath)
+    if filepath.suffix in (".parquet", ".arrow", ".feather"):
+        return read_metadata(filepath)
+    return {}
+
+def result_buckets(metadata: dict, n: int) -> int | None:
+    """
+    Number of histogram entries of a run, n + 1 for exact runs, None if the metadata doesn't tell
+    """
+    if "buckets" not in metadata:
+        return None
+    exact = metadata.get("exact", metadata["buckets"] == metadata.get("samples"))
+    return n + 1 if exact else metadata["buckets"]
+
+def read_result(filepath: Path) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Read the histogram of a result file in any of the output formats
+    :return: (entries, counts) of the non-empty entries
+    """
+    if filepath.suffix == ".csv":
+        # Headers of older results are separated by ', '
+        df = pd.read_csv(filepath, skipinitialspace=True)
+        return df["entry"].to_numpy(dtype=np.int64), df["cnt"].to_numpy(dtype=np.int64)
+    chunks = list(read_chunks(filepath))
+    if not chunks:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate([entries for entries, _ in chunks]), np.concatenate([counts for _, counts in chunks])
+
+def evaluate_file(input_file: str, skew: float, buckets: int | None = None, scramble: ScrambleType = ScrambleType.NONE,
+                  scramble_seed: int = 0) -> dict | None:
+    """
+    Evaluate a single result file, whose generator is taken from its parent directory. The bucket count is taken from the
+    file's metadata, then from 'buckets'. Feistel-scrambled results are mapped back to their ranks first, which needs one
+    bucket per item
+    :return: dict with generator, n, samples, tvd, ks_stat and ks_p_value or None if the filename can't be parsed
+    """
+    filepath = Path(input_file)
+    sizes = parse_result_name(filepath.name)
+    if sizes is None:
+        return None
+    n, samples = sizes
+
+    entries, counts = read_result(filepath)
+    buckets = result_buckets(result_metadata(filepath), n) or buckets
+    if buckets is None:
+        if scramble != ScrambleType.FEISTEL:
+            # The largest entry undercounts whenever the tail buckets stayed empty, which skews TVD and KS
+            raise ValueError(f"{input_file} has no metadata on its bucket count, pass it with '--buckets'")
+        buckets = n + 1
+    if entries.size and (entries.min() < 0 or entries.max() >= buckets):
+        raise ValueError(f"{input_file} has entries outside of [0, {buckets})")
+
+    if scramble == ScrambleType.FEISTEL:
+        if buckets != n + 1:
+            raise ValueError(f"Unscrambling {input_file} needs exact results with {n + 1} buckets")
+        entries = FeistelScrambler(n + 1, scramble_seed).inverse(entries)
+    elif scramble != ScrambleType.NONE:
+        raise ValueError(f"{scramble.value} scrambling can't be inverted")
+
+    # Storages only write non-empty buckets, so place every frequency at its bucket index
+    empirical_probs = np.zeros(buckets)
+    empirical_probs[entries] = counts / samples
+
+    tvd, ks_statistic, p_value = accuracy_metrics(empirical_probs, theoretical_distribution(n, skew, buckets), samples)
+
+    return {
+        "generator": Path(input_file).parent.name,
+        "n": n,
+        "samples": samples,
+        "skew": skew,
+        "buckets": buckets,
+        "tvd": tvd,
+        "ks_stat": ks_statistic,
+        "ks_p_value": p_value,
+    }
+
+def evaluate_result(input_file: str, skew: float, buckets: int | None = None, scramble: ScrambleType = ScrambleType.NONE,
+                    scramble_seed: int = 0) -> dict | None:
+    """
+    evaluate_file for one of many files: a file that can't be evaluated yields a row with its 'error' instead of raising
+    :return: dict with the file and its metrics or error, None if the filename can't be parsed
+    """
+    try:
+        row = evaluate_file(input_file, skew, buckets, scramble, scramble_seed)
+    except Exception as e:
+        n, samples = parse_result_name(Path(input_file).name)
+        row = {"generator": Path(input_file).parent.name, "n": n, "samples": samples, "skew": skew, "error": f"{type(e).__name__}: {e}"}
+    return None if row is None else {"file": input_file, **row}
+
+class ConvergenceTracker:
+    """
+    Online accuracy of a sampling run: accumulates the histograms of the drawn chunks and evaluates TVD and KS against the
+    theoretical bucket probabilities at every checkpoint, recording the convergence curve
+    """
+    def __init__(self, n: int, skew: float, buckets: int):
+        self.theoretical_probs = theoretical_distribution(n, skew, buckets)
+        self.histogram = np.zeros(buckets, dtype=np.int64)
+        self.samples = 0
+        self.rows = []
+        self.start = time.perf_counter()
+
+    def update(self, histogram: np.ndarray, count: int) -> dict:
+        """
+        Add the histogram of 'count' further samples and evaluate the accuracy of all samples so far
+        :return: dict with samples, tvd, ks_stat, ks_p_value and elapsed_s
+        """
+        self.histogram += histogram
+        self.samples += count
+        tvd, ks_statistic, p_value = accuracy_metrics(self.histogram / self.samples, self.theoretical_probs, self.samples)
+
+        row = {
+            "samples": self.samples,
+            "tvd": tvd,
+            "ks_stat": ks_statistic,
+            "ks_p_value": p_value,
+            "elapsed_s": time.perf_counter() - self.start,
+        }
+        self.rows.append(row)
+        return row
+
+    def store(self, filepath: Path):
+        os.makedirs(filepath.parent, exist_ok=True)
+        pd.DataFrame(self.rows).to_csv(filepath, index=False)
@@ -0,0 +1,7 @@
+from SamplerLibrary import NativeSampler, SamplerKind
+
+class AliasSampler(NativeSampler):
+    """
+    Wrapper for the native alias method sampler (Walker/Vose), O(1) per variate with one table of 8 bytes per item
+    """
+    kind = SamplerKind.ALIAS
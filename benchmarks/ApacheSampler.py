@@ -1,6 +1,8 @@
 import jpype
 import jpype.imports
+from jpype.types import JArray, JLong
 from sortedcontainers import SortedDict
+import numpy as np
 
 from Sampler import Sampler
 
@@ -8,17 +10,28 @@ class ApacheSampler(Sampler):
     """
     "ApacheCommon"'s RJI sampler wrapper
     """
-    def __init__(self, n : int, samples: int, skew : float):
-        super().__init__(n, samples, skew)
+    def __init__(self, n : int, samples: int, skew : float, seed : int | None = None):
+        # The runner seeds its generator internally, so 'seed' is only recorded
+        super().__init__(n, samples, skew, seed)
 
         if not jpype.isJVMStarted():
             raise RuntimeError("JVM not started. Call jpype.startJVM() before creating a ApacheSampler object")
 
         ApacheRunner = jpype.JClass("zipf.zipfianRunner.ZipfianRunner", initialize=False)
         self.gen = ApacheRunner(0, self.n, self.skew)
+        # Jars not yet rebuilt with 'sampleInto(long[])' ('make' in jar/) only support single samples
+        self.bulk = hasattr(self.gen, "sampleInto")
 
     def sample(self) -> int:       
         return self.gen.sample()
 
+    def sample_batch(self, k: int) -> np.ndarray:
+        if not self.bulk:
+            return super().sample_batch(k)
+        # The Java array is filled in a single JNI call and viewed through its buffer without copying
+        buffer = JArray(JLong)(k)
+        self.gen.sampleInto(buffer)
+        return np.asarray(memoryview(buffer))
+
     def benchmark(self):
         return self.gen.benchmark(self.samples)
\ No newline at end of file
@@ -0,0 +1,152 @@
+import json
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from definitions import SAMPLE_CHUNK_SIZE
+from Sampler import Sampler
+
+BOOTSTRAP_RESAMPLES = 10000
+
+NATIVE_BENCHMARK_PATTERN = re.compile(r'BM_(Setup|Throughput|BatchThroughput)<(\w+)>')
+TIME_UNIT_NS = {"ns": 1, "us": 1e3, "ms": 1e6, "s": 1e9}
+
+def time_sampling(sampler: Sampler, samples: int) -> int:
+    """
+    Time drawing 'samples' variates through 'sampler.sample_batch' in chunks of SAMPLE_CHUNK_SIZE.
+    Every backend is measured with the same monotonic clock and call path
+    :return: elapsed nanoseconds
+    """
+    start = time.perf_counter_ns()
+    for offset in range(0, samples, SAMPLE_CHUNK_SIZE):
+        sampler.sample_batch(min(SAMPLE_CHUNK_SIZE, samples - offset))
+    return time.perf_counter_ns() - start
+
+@contextmanager
+def table_cache(directory: str):
+    """
+    Point the on-disk table cache of the native library (ZIPF_TABLE_CACHE) at 'directory' for the duration of the block,
+    unless the cache has been disabled explicitly
+    """
+    previous = os.environ.get("ZIPF_TABLE_CACHE")
+    if previous == "":
+        yield
+        return
+    os.environ["ZIPF_TABLE_CACHE"] = directory
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["ZIPF_TABLE_CACHE"]
+        else:
+            os.environ["ZIPF_TABLE_CACHE"] = previous
+
+def time_setup(factory: Callable[[], Sampler]) -> tuple[Sampler, int]:
+    """
+    Construct a sampler through 'factory'
+    :return: (sampler, elapsed nanoseconds)
+    """
+    start = time.perf_counter_ns()
+    sampler = factory()
+    return sampler, time.perf_counter_ns() - start
+
+def bootstrap_median_ci(values: np.ndarray, confidence: float = 0.95, resamples: int = BOOTSTRAP_RESAMPLES, seed: int = 0) -> tuple[float, float]:
+    """
+    Percentile bootstrap confidence interval of the median of 'values'
+    :return: (lower, upper)
+    """
+    rng = np.random.default_rng(seed)
+    medians = np.median(rng.choice(values, size=(resamples, values.size), replace=True), axis=1)
+    alpha = (1.0 - confidence) / 2
+    lower, upper = np.quantile(medians, [alpha, 1.0 - alpha])
+    return float(lower), float(upper)
+
+def summarize(times_ns: list[int], samples: int, confidence: float = 0.95) -> dict:
+    """
+    Summarize the repetition timings of a single benchmark as throughput in variates per second
+    :return: dict with median, quartiles and the bootstrap confidence interval of the median
+    """
+    times = np.asarray(times_ns, dtype=np.float64)
+    rates = samples / (times * 1e-9)
+    q25, median, q75 = np.quantile(rates, [0.25, 0.5, 0.75])
+    ci_low, ci_high = bootstrap_median_ci(rates, confidence)
+
+    return {
+        "median_ns": float(np.median(times)),
+        "median_vps": float(median),
+        "q25_vps": float(q25),
+        "q75_vps": float(q75),
+        "iqr_vps": float(q75 - q25),
+        "ci_low_vps": ci_low,
+        "ci_high_vps": ci_high,
+    }
+
+def run_benchmark(factory: Callable[[], Sampler], samples: int, warmup: int, repetitions: int, confidence: float = 0.95) -> dict:
+    """
+    Construct a sampler through 'factory', run 'warmup' untimed and 'repetitions' timed iterations of 'samples' variates each
+    :return: dict with the cold and warm setup time and table memory, the raw repetition timings, their summary and the RNG
+             share of the time
+    """
+    # The cold setup builds cached tables in an empty cache, the warm one then maps them from there. Both are the same for
+    # generators without a cache
+    with tempfile.TemporaryDirectory() as cache, table_cache(cache):
+        cold, setup_cold_ns = time_setup(factory)
+        del cold
+        sampler, setup_warm_ns = time_setup(factory)
+
+    for _ in range(warmup):
+        time_sampling(sampler, samples)
+
+    times_ns = [time_sampling(sampler, samples) for _ in range(repetitions)]
+    summary = summarize(times_ns, samples, confidence)
+    profile = sampler.rng_profile()
+    table_bytes = sampler.table_bytes()
+    del sampler
+
+    # Share of the per-variate time spent drawing random numbers, where the backend can be profiled
+    rng = {"rng_draws_per_variate": None, "rng_ns_per_draw": None, "rng_share": None}
+    if profile is not None:
+        rng["rng_draws_per_variate"] = profile["draws_per_variate"]
+        rng["rng_ns_per_draw"] = profile["ns_per_draw"]
+        rng["rng_share"] = profile["draws_per_variate"] * profile["ns_per_draw"] / (summary["median_ns"] / samples)
+
+    return {
+        "setup_cold_ns": setup_cold_ns,
+        "setup_warm_ns": setup_warm_ns,
+        "table_bytes": table_bytes,
+        **summary,
+        **rng,
+        "times_ns": times_ns,
+    }
+
+def load_native_benchmarks(path: str) -> pd.DataFrame:
+    """
+    Read the JSON output of the Google Benchmark suite in impl/ ('make bench') into one row per run
+    :return: pd.DataFrame with columns sampler, kind ('setup', 'throughput' or 'batch_throughput'), n, skew, time_ns, items_per_second
+             and table_bytes (setup runs of table-based samplers)
+    """
+    with open(path) as f:
+        runs = json.load(f)["benchmarks"]
+
+    records = []
+    for run in runs:
+        match = NATIVE_BENCHMARK_PATTERN.match(run["name"])
+        if match is None or run.get("run_type") != "iteration":
+            continue
+        kind, sampler = match.groups()
+        records.append({
+            "sampler": sampler,
+            "kind": re.sub(r'(?<!^)(?=[A-Z])', '_', kind).lower(),
+            "n": int(run["n"]),
+            "skew": run["skew"],
+            "time_ns": run["real_time"] * TIME_UNIT_NS[run["time_unit"]],
+            "items_per_second": run.get("items_per_second"),
+            "table_bytes": run.get("table_bytes"),
+        })
+    return pd.DataFrame(records)
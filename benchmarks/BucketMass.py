@@ -0,0 +1,79 @@
+import numpy as np
+
+# Ranks up to this bound are summed directly, everything beyond uses the Euler-Maclaurin formula
+DIRECT_TERMS = 1000
+
+# B_2j / (2j)! for j = 1..5
+BERNOULLI_FACTORS = (1 / 12, -1 / 720, 1 / 30240, -1 / 1209600, 1 / 47900160)
+
+def _head_sums(s: float) -> np.ndarray:
+    """Prefix sums of k^(-s) for k = 0..DIRECT_TERMS, with a leading 0"""
+    terms = np.arange(1, DIRECT_TERMS + 1, dtype=np.float64) ** -s
+    return np.concatenate(([0.0], np.cumsum(terms)))
+
+def _tail_sums(a: np.ndarray, b: np.ndarray, s: float) -> np.ndarray:
+    """
+    Euler-Maclaurin approximation of sum_{k=a}^{b} k^(-s) for a > DIRECT_TERMS and a <= b, elementwise.
+    The remainder after five correction terms is far below double precision at this distance from the origin
+    """
+    log_ratio = np.log(b / a)
+    if s == 1.0:
+        integral = log_ratio
+    else:
+        # Stable form of (b^(1-s) - a^(1-s)) / (1-s) for skews near 1
+        integral = a ** (1 - s) * np.expm1((1 - s) * log_ratio) / (1 - s)
+
+    total = integral + (a ** -s + b ** -s) / 2
+
+    # The (2j-1)-th derivative of x^(-s) is -s(s+1)...(s+2j-2) x^(-s-2j+1)
+    rising = s
+    for j, factor in enumerate(BERNOULLI_FACTORS, start=1):
+        order = 2 * j - 1
+        total += factor * -rising * (b ** (-s - order) - a ** (-s - order))
+        rising *= (s + order) * (s + order + 1)
+
+    return total
+
+def partial_harmonic(lo, hi, s: float) -> np.ndarray:
+    """
+    Vectorized sum_{k=lo+1}^{hi} k^(-s) for integer bounds 0 <= lo <= hi, i.e. H(hi, s) - H(lo, s)
+    computed without cancellation. Runs in O(len(lo)) time and memory, regardless of the magnitude of the bounds
+    """
+    lo = np.atleast_1d(np.asarray(lo, dtype=np.int64))
+    hi = np.atleast_1d(np.asarray(hi, dtype=np.int64))
+
+    head = _head_sums(s)
+    result = head[np.minimum(hi, DIRECT_TERMS)] - head[np.minimum(lo, DIRECT_TERMS)]
+
+    tail = hi > DIRECT_TERMS
+    if np.any(tail):
+        a = np.maximum(lo[tail], DIRECT_TERMS) + 1
+        b = hi[tail]
+        nonempty = a <= b
+        sums = np.zeros(len(a))
+        sums[nonempty] = _tail_sums(a[nonempty].astype(np.float64), b[nonempty].astype(np.float64), s)
+        result[tail] += sums
+
+    return result
+
+def generalized_harmonic(n, s: float) -> np.ndarray:
+    """
+    Vectorized generalized harmonic number H(n, s) = sum_{k=1}^{n} k^(-s)
+    """
+    n = np.asarray(n, dtype=np.int64)
+    return partial_harmonic(np.zeros_like(n), n, s)
+
+def uniform_edges(n: int, buckets: int) -> np.ndarray:
+    """
+    Edges of 'buckets' equally sized buckets over the ranks 1..n, as used by 'accuracy_zipf'
+    """
+    return np.linspace(0, n, num=buckets + 1, dtype=np.int64)
+
+def bucket_probabilities(n: int, skew: float, edges) -> np.ndarray:
+    """
+    Theoretical probability mass of each bucket (edges[j], edges[j+1]] of a Zipfian distribution over the ranks 1..n.
+    'edges' must be non-decreasing integers in [0, n], so non-uniform buckets are supported
+    :return: np.ndarray of length 'len(edges) - 1'
+    """
+    edges = np.asarray(edges, dtype=np.int64)
+    return partial_harmonic(edges[:-1], edges[1:], skew) / generalized_harmonic(n, skew)[0]
@@ -1,37 +1,59 @@
 from datetime import datetime
 import os
+import sys
 import subprocess
 import click
-from collections import Counter
 from definitions import ROOT_DIR, BATCH_SIZE
 import csv
 import io
 import pandas as pd 
-import re
 import pathlib
-from itertools import islice
+from itertools import islice, repeat, product
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 
-from definitions import OutputType, StorageType, EnumChoice
-from StorageInterface import DuckDBInterface, PolarsInterface, CounterInterface, SQLITEInterface
+from definitions import OutputType, StorageType, ScrambleType, EmitType, RawFormat, EnumChoice
+from StorageInterface import DuckDBInterface, PolarsInterface, CounterInterface, SQLITEInterface, ArrayInterface
+from Histogram import sample_histogram
+from Accuracy import evaluate_file, evaluate_result, ConvergenceTracker, RESULT_SUFFIXES
+from BenchmarkHarness import run_benchmark
+from Scrambler import ScrambledSampler, create_scrambler
+from RawEmitter import emit_raw, open_sink
+from Checkpoint import save_checkpoint, load_checkpoint, remove_checkpoint
+from Shards import spawn_seeds, split_samples, parse_shard, shard_path, write_sidecar, read_sidecar, merged_metadata, merge_histograms as merge_shards
 
 import jpype
 import json
 
+from Sampler import Sampler
 from YCSBSampler import YCSBSampler
 from ApacheSampler import ApacheSampler
 from FIOSampler import FIOSampler
 from RJISampler import RJISampler
+from RejectionInversionSampler import RejectionInversionSampler
 from LeanStoreSampler import LeanStoreSampler
 from RejectionSampler import RejectionSampler
 from MarsagliaSampler import MarsagliaSampler
+from AliasSampler import AliasSampler
+from HybridSampler import HybridSampler
+from GuideTableSampler import GuideTableSampler
+from SamplerLibrary import RngEngine
 from RustSampler import RustSampler
 from SysbenchSampler import SysbenchSampler
 from PgBenchSampler import PgBenchSampler
 
-import scipy.stats as stats
 import numpy as np
 
+GENERATORS = ("ycsb", "fio", "apache", "rji", "rji_native", "lean", "rejection", "marsaglia", "alias", "hybrid", "guide", "guide_f32", "pg_bench", "sysbench", "rust")
+# Generators backed by the native sampler library, whose random bit engine can be chosen
+ENGINE_GENERATORS = ("rejection", "rji_native", "marsaglia", "alias", "hybrid", "guide", "guide_f32")
+ENGINES = {engine.name.lower(): engine for engine in RngEngine}
+
 def start_jvm():
+    if jpype.isJVMStarted():
+        return
+
     jpype.startJVM(
         "-Xms1g",   
         "-Xmx4g",    
@@ -43,39 +65,22 @@ def start_jvm():
         convertStrings=True,
     )
 
-@click.command()
-@click.option('--generator', default='fio', help='Benchmark to use. The following are supported: "ycsb", "fio", "apache","rji", "lean", "base", "pg_bench", "sysbench", "rust"')
-@click.option('--skew', default=1.0,  help='Skew factor of the Zipfian Distribution')
-@click.option('--n', default=1, help='Range of items to sample from in the Zipfian in multiples of million (1.000.000)')
-@click.option('--samples', default=1, help='Number of samples that should be taken from the distribution in multiples of million (1.000.000)')
-@click.option('--output', type=EnumChoice(OutputType), default=OutputType.CSV.value, help='Defines the type of storage to use: "csv", "parquet"')
-@click.option('--storage', type=EnumChoice(StorageType), default=StorageType.COUNTER.value, help='Defines the type of storage to use: "duckdb", "polars", "counter", "sqlite"')
-@click.option('--buckets', default=100, help='Number of buckets to use to accumulate data')
-def sample_zipf(generator : str, skew : float, n : int, samples: int , output : OutputType, storage: StorageType, buckets:int):
-    """Program to run specified 'generator' option with the given Zipfian 'skew' factor using the item range in 'n'. This program outputs a CSV file with 
-    the following filename format: 'results_generator_date.csv' and following column structure 'bucket_num, cnt, rel_freq'."""
-    
-    match storage:
-        case StorageType.DUCKDB:
-            ds = DuckDBInterface(samples)
-        case StorageType.POLARS:
-            ds = PolarsInterface(samples)
-        case StorageType.COUNTER:   
-            ds = CounterInterface(samples)
-        case StorageType.SQLITE:
-            ds = SQLITEInterface(samples)
-        case _:
-            click.echo(f"Unsupported storage type {storage}. Supported storage types are: 'duckdb', 'polars', 'counter', 'sqlite'")
-    
+def create_sampler(generator: str, n: int, samples: int, skew: float, seed: int | None = None, engine: str | None = None) -> Sampler:
+    """Instantiate the sampler behind the 'generator' option. JVM-backed samplers start the JVM of the calling process.
+    'engine' selects the random bit engine of the generators in ENGINE_GENERATORS."""
+    if engine is not None and generator not in ENGINE_GENERATORS:
+        raise click.BadParameter(f"Generator {generator} has no selectable engine. Engines are supported by: {', '.join(map(repr, ENGINE_GENERATORS))}")
+    rng = ENGINES[engine or "mt19937_64"]
+
     match generator:
         case "ycsb":
             start_jvm()
-            sampler = YCSBSampler(n, samples, skew)
+            sampler = YCSBSampler(n, samples, skew, seed)
         case "apache":
             start_jvm()
-            sampler = ApacheSampler(n, samples, skew)
+            sampler = ApacheSampler(n, samples, skew, seed)
         case "fio":
-            sampler = FIOSampler(n, samples, skew)
+            sampler = FIOSampler(n, samples, skew, seed)
 
             # block_size = 4096
             # total_space_gib = (n * block_size) / (1024**3)
@@ -110,80 +115,309 @@ def sample_zipf(generator : str, skew : float, n : int, samples: int , output :
 
             # return 
         case "rji":
-            sampler = RJISampler(n, samples, skew)
+            sampler = RJISampler(n, samples, skew, seed)
+        case "rji_native":
+            sampler = RejectionInversionSampler(n, samples, skew, seed, rng)
         case "lean":
-            sampler = LeanStoreSampler(n, samples, skew)
+            sampler = LeanStoreSampler(n, samples, skew, seed)
         case "rejection": 
-            sampler = RejectionSampler(n, samples, skew)
+            sampler = RejectionSampler(n, samples, skew, seed, rng)
         case "marsaglia":
-            sampler = MarsagliaSampler(n, samples, skew)
+            sampler = MarsagliaSampler(n, samples, skew, seed, rng)
+        case "alias":
+            sampler = AliasSampler(n, samples, skew, seed, rng)
+        case "hybrid":
+            sampler = HybridSampler(n, samples, skew, seed, rng)
+        case "guide":
+            sampler = GuideTableSampler(n, samples, skew, seed, rng)
+        case "guide_f32":
+            sampler = GuideTableSampler(n, samples, skew, seed, rng, single_precision=True)
         case "pg_bench":
-            sampler = PgBenchSampler(n, samples, skew)
+            sampler = PgBenchSampler(n, samples, skew, seed)
         case "sysbench":
-            sampler = SysbenchSampler(n, samples, skew)
+            sampler = SysbenchSampler(n, samples, skew, seed)
         case "rust":   
-            sampler = RustSampler(n, samples, skew)
+            sampler = RustSampler(n, samples, skew, seed)
         case _:
-            click.echo(f"Unsupported generator {generator}. Supported generators are: 'ycsb', 'fio', 'apache', 'rji', 'lean', 'base', 'pg_bench', 'sysbench', 'rust'")
-            
-    match output:
-        case OutputType.CSV:
-            filepath = ROOT_DIR + f"/results/csv/{generator}/{n}_{samples}.csv"
-        case OutputType.PARQUET:
-            filepath = ROOT_DIR + f"/results/parquet/{generator}/{n}_{samples}.parquet"
+            raise click.BadParameter(f"Unsupported generator {generator}. Supported generators are: {', '.join(map(repr, GENERATORS))}")
+
+    return sampler
+
+def scrambled(sampler: Sampler, scramble: ScrambleType, scramble_seed: int) -> Sampler:
+    """Apply the '--scramble' output stage to 'sampler', whose items lie in [0, n]"""
+    scrambler = create_scrambler(scramble, sampler.n + 1, scramble_seed)
+    return sampler if scrambler is None else ScrambledSampler(sampler, scrambler)
+
+def result_path(output: OutputType, result_name: str, n: int, samples: int) -> pathlib.Path:
+    """Path of the result file of a run below results/<output>/<result_name>"""
+    return pathlib.Path(ROOT_DIR) / "results" / output.value / result_name / f"{n}_{samples}.{output.value}"
+
+def sample_worker(generator: str, n: int, samples: int, skew: float, seed: int, buckets: int, exact: bool, engine: str | None = None,
+                  scramble: ScrambleType = ScrambleType.NONE, scramble_seed: int = 0) -> np.ndarray:
+    """Entry point of a '--workers' process. Draws 'samples' from its own sampler instance and returns the partial histogram."""
+    sampler = scrambled(create_sampler(generator, n, samples, skew, seed, engine), scramble, scramble_seed)
+    histogram = sample_histogram(sampler, samples, n, buckets, exact)
+
+    if jpype.isJVMStarted():
+        jpype.shutdownJVM()
+
+    return histogram
+
+@click.command()
+@click.option('--generator', default='fio', help='Benchmark to use. The following are supported: "ycsb", "fio", "apache","rji", "rji_native", "lean", "rejection", "marsaglia", "alias", "hybrid", "guide", "guide_f32", "pg_bench", "sysbench", "rust"')
+@click.option('--skew', default=1.0,  help='Skew factor of the Zipfian Distribution')
+@click.option('--n', default=1, help='Range of items to sample from in the Zipfian in multiples of million (1.000.000)')
+@click.option('--samples', default=1, help='Number of samples that should be taken from the distribution in multiples of million (1.000.000)')
+@click.option('--output', type=EnumChoice(OutputType), default=OutputType.CSV.value, help='Defines the output format: "csv", "parquet", "arrow" (IPC file), "feather" (LZ4-compressed IPC file), or "npy" for the "array" storage')
+@click.option('--storage', type=EnumChoice(StorageType), default=StorageType.COUNTER.value, help='Defines the type of storage to use: "duckdb", "polars", "counter", "sqlite", "array"')
+@click.option('--buckets', default=100, help='Number of buckets to use to accumulate data')
+@click.option('--memmap', type=click.Path(dir_okay=False, path_type=pathlib.Path), default=None, help='Backs the "array" storage with a memory-mapped file at the given path')
+@click.option('--workers', default=1, type=click.IntRange(min=1), help='Number of processes to split the samples across, each with its own sampler instance')
+@click.option('--seed', default=None, type=int, help='Seed of the sampler. With several workers, the per-worker seeds are derived from it')
+@click.option('--engine', default=None, type=click.Choice(list(ENGINES)), help='Random bit engine of the native generators ("rejection", "rji_native", "marsaglia", "alias", "hybrid", "guide", "guide_f32"), defaults to mt19937_64')
+@click.option('--scramble', type=EnumChoice(ScrambleType), default=ScrambleType.NONE.value, help='Scramble the sampled items across the keyspace: "none", "hash" (YCSB-style) or "feistel" (exact bijection, invertible by accuracy_zipf)')
+@click.option('--scramble_seed', default=0, type=int, help='Seed of the --scramble permutation')
+@click.option('--emit', type=EnumChoice(EmitType), default=EmitType.HISTOGRAM.value, help='"histogram" stores the aggregated samples, "raw" streams every sample to --sink')
+@click.option('--raw_format', type=EnumChoice(RawFormat), default=RawFormat.U64.value, help='Encoding of the raw stream: little-endian "u32" or "u64" words, or "varint_delta"')
+@click.option('--sink', default="-", help='Destination of the raw stream: "-" for stdout, "unix:<path>" for a listening Unix socket, or the path of a named pipe')
+@click.option('--track_every', default=None, type=click.IntRange(min=1), help='Evaluate TVD and KS against the theoretical distribution every given number of samples and write the convergence curve to results/convergence')
+@click.option('--stop_when_ks_below', default=None, type=click.FloatRange(0, 1, min_open=True), help='Stop sampling at the first --track_every checkpoint whose KS statistic is below the given value')
+@click.option('--max_samples', default=None, type=click.IntRange(min=1), help='Upper bound of the samples drawn with --stop_when_ks_below, replaces --samples')
+@click.option('--shard', default=None, help='Draw only shard "i/k" of the run (0 <= i < k), a deterministic sub-stream of --seed, into a partial histogram for merge_histograms')
+@click.option('--checkpoint_every', default=None, type=click.IntRange(min=1), help='Persist the running histogram and the sampler state to results/checkpoints every given number of samples. A run resumed from them yields the same result as an uninterrupted one')
+@click.option('--resume', is_flag=True, help='Continue a --checkpoint_every run with the same options from its last checkpoint')
+def sample_zipf(generator : str, skew : float, n : int, samples: int , output : OutputType, storage: StorageType, buckets:int, memmap: pathlib.Path, workers: int, seed: int, engine: str,
+                scramble: ScrambleType, scramble_seed: int, emit: EmitType, raw_format: RawFormat, sink: str,
+                track_every: int, stop_when_ks_below: float, max_samples: int, shard: str, checkpoint_every: int, resume: bool):
+    """Program to run specified 'generator' option with the given Zipfian 'skew' factor using the item range in 'n'. This program outputs a CSV file with 
+    the following filename format: 'results_generator_date.csv' and following column structure 'bucket_num, cnt, rel_freq'.
+    With '--emit raw' the samples are streamed to 'sink' instead of being aggregated. With '--track_every' the accuracy is
+    evaluated while sampling, and '--stop_when_ks_below' ends the run once it has converged; the result files are then
+    named after the number of samples actually drawn. With '--shard i/k' only the i-th of k shares of the samples is
+    drawn, from the stream worker i of a '--workers k' run would draw, into a partial histogram with a JSON sidecar.
+    With '--checkpoint_every' an interrupted run can be continued with '--resume', yielding the same result as if it
+    had run through."""
+
+    tracking = track_every is not None
+    if stop_when_ks_below is not None and not tracking:
+        raise click.UsageError("'--stop_when_ks_below' is evaluated at the '--track_every' checkpoints, which are required")
+    if max_samples is not None:
+        if stop_when_ks_below is None:
+            raise click.UsageError("'--max_samples' bounds an early-stopping run, use '--samples' otherwise")
+        samples = max_samples
+    if tracking and (workers != 1 or emit == EmitType.RAW or scramble != ScrambleType.NONE):
+        raise click.UsageError("'--track_every' needs a single unscrambled sampler ('--workers 1', '--emit histogram', '--scramble none')")
+    if resume and checkpoint_every is None:
+        raise click.UsageError("'--resume' continues a '--checkpoint_every' run, pass the same options")
+    if checkpoint_every is not None and (workers != 1 or emit == EmitType.RAW or tracking):
+        raise click.UsageError("'--checkpoint_every' needs a single sampler ('--workers 1', '--emit histogram', no '--track_every')")
+    if output == OutputType.NPY and storage != StorageType.ARRAY and emit == EmitType.HISTOGRAM:
+        raise click.UsageError("'--output npy' writes the dense histogram of the 'array' storage, use '--storage array'")
+
+    # The results are named after the whole run, a shard draws its share of it from its own sub-stream
+    total_samples, root_seed = samples, seed
+    if shard is not None:
+        try:
+            shard_index, shard_count = parse_shard(shard)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="'--shard'")
+        if seed is None:
+            raise click.UsageError("'--shard' derives the sub-stream of each shard from '--seed', which is required")
+        if stop_when_ks_below is not None:
+            raise click.UsageError("Shards draw fixed shares of '--samples', they can't stop early")
+        seed = spawn_seeds(root_seed, shard_count)[shard_index]
+        samples = split_samples(total_samples, shard_count)[shard_index]
+
+    if emit == EmitType.RAW:
+        if workers != 1:
+            raise click.UsageError("'--emit raw' streams from a single sampler, use '--workers 1'")
+        if raw_format == RawFormat.U32 and n >= 1 << 32:
+            raise click.BadParameter(f"Samples of n={n} don't fit into 'u32', use 'u64' or 'varint_delta'")
+
+        sampler = scrambled(create_sampler(generator, n, samples, skew, seed, engine), scramble, scramble_seed)
+        stream = open_sink(sink)
+        try:
+            emit_raw(sampler, samples, stream, raw_format)
+        except BrokenPipeError:
+            # The consumer stopped reading, which ends the stream. Detach stdout so the interpreter's final flush stays quiet
+            click.echo("Consumer closed the stream", err=True)
+            if stream is sys.stdout.buffer:
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+
+        if jpype.isJVMStarted():
+            jpype.shutdownJVM()
+        return
+
+    exact = buckets == total_samples
+    # Scrambled results are kept apart from the plain ones of the same generator
+    result_name = generator if scramble == ScrambleType.NONE else f"{generator}_{scramble.value}"
     
-    counter = Counter()
+    match storage:
+        case StorageType.DUCKDB:
+            ds = DuckDBInterface(samples)
+        case StorageType.POLARS:
+            ds = PolarsInterface(samples)
+        case StorageType.COUNTER:   
+            ds = CounterInterface(samples)
+        case StorageType.SQLITE:
+            ds = SQLITEInterface(samples)
+        case StorageType.ARRAY:
+            ds = ArrayInterface(samples, n + 1 if exact else buckets, memmap)
+        case _:
+            click.echo(f"Unsupported storage type {storage}. Supported storage types are: 'duckdb', 'polars', 'counter', 'sqlite', 'array'")
+    
+    filepath = result_path(output, result_name, n, total_samples)
+    if shard is not None:
+        filepath = shard_path(filepath, shard_index, shard_count)
+    # Results are never overwritten, so fail before sampling rather than when storing
+    if filepath.exists():
+        raise click.ClickException(f"{filepath} already exists, remove it to sample it again")
+
+    if tracking:
+        sampler = create_sampler(generator, n, samples, skew, seed, engine)
+        tracker = ConvergenceTracker(n, skew, n + 1 if exact else buckets)
+
+        for start in range(0, samples, track_every):
+            count = min(track_every, samples - start)
+            histogram = sample_histogram(sampler, count, n, buckets, exact)
+            ds.insert_histogram(histogram)
+            checkpoint = tracker.update(histogram, count)
+            if stop_when_ks_below is not None and checkpoint["ks_stat"] < stop_when_ks_below:
+                click.echo(f"Converged after {tracker.samples} samples: KS {checkpoint['ks_stat']:.3g}, TVD {checkpoint['tvd']:.3g}", err=True)
+                break
+
+        # Name, normalize and describe the results by the samples actually drawn. Shards can't stop early, so these are all of the run's
+        if tracker.samples != samples:
+            samples = total_samples = ds.total_samples = tracker.samples
+            filepath = filepath.with_stem(f"{n}_{samples}")
+        tracker.store(pathlib.Path(ROOT_DIR + f"/results/convergence/{result_name}/{n}_{samples}.csv"))
+    elif checkpoint_every is not None:
+        sampler = scrambled(create_sampler(generator, n, samples, skew, seed, engine), scramble, scramble_seed)
+        if sampler.get_state() is None:
+            raise click.UsageError(f"'--checkpoint_every' restores the state of the native generators ({', '.join(ENGINE_GENERATORS)}), {generator} has none")
+
+        checkpoint = pathlib.Path(ROOT_DIR) / "results" / "checkpoints" / result_name / f"{filepath.stem}.json"
+        config = {"generator": generator, "n": n, "skew": skew, "samples": samples, "buckets": buckets, "seed": seed, "engine": engine,
+                  "scramble": scramble.value, "scramble_seed": scramble_seed, "checkpoint_every": checkpoint_every}
+        running = np.zeros(n + 1 if exact else buckets, dtype=np.int64)
+        drawn = 0
+        if resume:
+            try:
+                restored = load_checkpoint(checkpoint, config)
+            except ValueError as e:
+                raise click.UsageError(str(e))
+            if restored is not None:
+                running, drawn, state = restored
+                sampler.set_state(state)
+                click.echo(f"Resuming after {drawn} of {samples} samples", err=True)
+
+        while drawn < samples:
+            count = min(checkpoint_every, samples - drawn)
+            running += sample_histogram(sampler, count, n, buckets, exact)
+            drawn += count
+            if drawn < samples:
+                save_checkpoint(checkpoint, config, running, drawn, sampler.get_state())
+        ds.insert_histogram(running)
+    elif workers == 1:
+        sampler = scrambled(create_sampler(generator, n, samples, skew, seed, engine), scramble, scramble_seed)
 
-    if buckets != samples:
         for start in range(0, samples, BATCH_SIZE): 
             end = min(start + BATCH_SIZE, samples)
-            for i in range(start, end):
-                item = sampler.sample()
-                index = item * buckets // n 
-                if (index < buckets):
-                    counter[index] += 1
-            
-            ds.batch_insert(counter)
+            ds.insert_histogram(sample_histogram(sampler, end - start, n, buckets, exact))
     else:
-        for _ in range(samples):
-            item = sampler.sample()
-            counter[item] += 1
-            ds.batch_insert(counter) 
+        # Independent, reproducible 32-bit seeds for each worker, derived from a single root seed
+        seeds = spawn_seeds(seed, workers)
+        counts = split_samples(samples, workers)
+
+        # Spawn instead of fork, so that every worker loads its own libraries and JVM
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            partials = pool.map(sample_worker, repeat(generator), repeat(n), counts, repeat(skew), seeds, repeat(buckets), repeat(exact), repeat(engine),
+                                repeat(scramble), repeat(scramble_seed))
+            ds.insert_histogram(sum(partials))
 
     # if generator == "fio":
     #     ds.remap_highest_freq_to_smallest_rank()
 
-    ds.store(pathlib.Path(filepath), output)
+    metadata = {"generator": generator, "n": n, "skew": skew, "samples": total_samples, "buckets": buckets, "seed": root_seed}
+    if scramble != ScrambleType.NONE:
+        metadata |= {"scramble": scramble.value, "scramble_seed": scramble_seed}
+    if shard is not None:
+        metadata |= {"exact": exact, "engine": engine, "scramble": scramble.value, "scramble_seed": scramble_seed,
+                     "shard_count": shard_count, "shards": [shard_index], "shard_samples": samples}
+    ds.store(filepath, output, metadata)
+    if shard is not None:
+        write_sidecar(filepath, metadata)
+    if checkpoint_every is not None:
+        remove_checkpoint(checkpoint)
 
-    match generator:
-        case "ycsb", "apache":
-            jpype.shutdownJVM()
+    if jpype.isJVMStarted():
+        jpype.shutdownJVM()
         
 @click.command()
-@click.option('--skew', default=1.0,  help='Skew factor of the Zipfian Distribution')
-@click.option('--n', default=1, help='Range of items to sample from in the Zipfian in multiples of million (1.000.000)')
-@click.option('--samples', default=1, help='Number of samples that should be taken from the distribution in multiples of million (1.000.000)')
-def macrobenchmark(skew, n, samples):
-    """Command to run all available generators with the given Zipfian 'skew' factor using the item range in 'n'."""
+@click.argument('files', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option('--output', type=EnumChoice(OutputType), default=OutputType.CSV.value, help='Output format of the merged histogram: "csv", "parquet", "arrow", "feather" or "npy"')
+@click.option('--output_file', type=click.Path(dir_okay=False, path_type=pathlib.Path), default=None, help='Path of the merged histogram. Defaults to the result path of the run once all of its shards are merged')
+def merge_histograms(files, output, output_file):
+    """Reduce the partial histograms of 'sample_zipf --shard' runs (CSV, Parquet, Arrow, Feather or NPY, each with its JSON sidecar)
+    into one histogram, streaming them in bounded memory. The shards have to stem from the same run and be disjoint. Merging a
+    subset of the shards yields a partial histogram again, so reductions can be staged."""
+    # Sidecars matched by a glob such as '*.shard-*' are skipped, they are found next to their histograms
+    histograms = [file for file in files if file.suffix != ".json"]
+    try:
+        if output_file is None:
+            metadata = merged_metadata([read_sidecar(file) for file in histograms])
+            if len(metadata["shards"]) != metadata["shard_count"]:
+                missing = sorted(set(range(metadata["shard_count"])) - set(metadata["shards"]))
+                raise click.UsageError(f"Shards {missing} are missing, pass '--output_file' to write a partial merge")
+            result_name = metadata["generator"] if metadata["scramble"] == ScrambleType.NONE.value else f"{metadata['generator']}_{metadata['scramble']}"
+            output_file = result_path(output, result_name, metadata["n"], metadata["samples"])
+
+        metadata = merge_shards(histograms, output, output_file)
+    except (ValueError, FileNotFoundError, FileExistsError) as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f"Merged {len(metadata['shards'])}/{metadata['shard_count']} shards with {metadata['shard_samples']} samples into {output_file}")
 
-    start_jvm()
+@click.command()
+@click.option('--generator', 'generators', multiple=True, type=click.Choice(GENERATORS), help='Generator to benchmark, can be repeated. Defaults to all registered generators')
+@click.option('--skew', multiple=True, type=float, default=[1.0], show_default=True, help='Skew factor of the Zipfian Distribution, can be repeated')
+@click.option('--n', multiple=True, type=int, default=[1000000], show_default=True, help='Range of items to sample from in the Zipfian, can be repeated')
+@click.option('--samples', multiple=True, type=int, default=[10000000], show_default=True, help='Number of samples drawn per repetition, can be repeated')
+@click.option('--warmup', default=2, type=click.IntRange(min=0), show_default=True, help='Untimed iterations before the repetitions')
+@click.option('--repetitions', default=10, type=click.IntRange(min=2), show_default=True, help='Timed iterations per grid point')
+@click.option('--confidence', default=0.95, type=click.FloatRange(0, 1, min_open=True, max_open=True), show_default=True, help='Confidence level of the bootstrap interval of the median')
+@click.option('--seed', default=None, type=int, help='Seed of the samplers')
+@click.option('--engine', default=None, type=click.Choice(list(ENGINES)), help='Random bit engine of the native generators ("rejection", "rji_native", "marsaglia", "alias", "hybrid", "guide", "guide_f32"). Without --generator only those are run')
+def macrobenchmark(generators, skew, n, samples, warmup, repetitions, confidence, seed, engine):
+    """Command to run the given generators over the grid of Zipfian 'skew' factors, item ranges 'n' and sample counts. Every grid point
+    is timed with 'warmup' untimed and 'repetitions' timed iterations, reporting variates per second as median, IQR and confidence interval.
+    For generators with a selectable engine, the share of the time spent in the RNG is reported as well."""
 
     benchmark_results = {
         "metadata": {
-            "skew": skew,
-            "n": n,
-            "samples": samples,
+            "warmup": warmup,
+            "repetitions": repetitions,
+            "confidence": confidence,
+            "seed": seed,
+            "engine": engine,
             "timestamp": datetime.now().isoformat(),
         },
-        "results": {}
+        "records": []
     }
 
-    for generator in []: #,SysbenchSampler, FIOSampler, ApacheSampler, YCSBSampler]:
-        sampler = generator(n, samples, skew)
-        generator_name = generator.__name__
-
-        benchmark_results["results"][generator_name] = sampler.benchmark()
+    default_generators = ENGINE_GENERATORS if engine is not None else GENERATORS
+    for generator, skew_, n_, samples_ in product(generators or default_generators, skew, n, samples):
+        result = run_benchmark(partial(create_sampler, generator, n_, samples_, skew_, seed, engine), samples_, warmup, repetitions, confidence)
+        benchmark_results["records"].append({"sampler": generator, "n": n_, "skew": skew_, "samples": samples_, **result})
 
+        rng_share = f", RNG {result['rng_share']:.0%}" if result["rng_share"] is not None else ""
+        tables = f", tables {result['table_bytes'] / 2**20:.1f} MiB" if result["table_bytes"] is not None else ""
+        click.echo(f"{generator} n={n_} skew={skew_} samples={samples_}: {result['median_vps']:.4g} variates/s "
+                   f"(IQR {result['iqr_vps']:.3g}, CI [{result['ci_low_vps']:.4g}, {result['ci_high_vps']:.4g}]{rng_share}), "
+                   f"setup {result['setup_cold_ns'] / 1e6:.1f} ms cold, {result['setup_warm_ns'] / 1e6:.1f} ms warm{tables}")
 
     # Output JSON to file
     output_path = ROOT_DIR + f"/results/benchmarks/perf_{datetime.now().strftime('%Y-%m-%d-%H-%M-%S')}.json"
@@ -191,65 +425,72 @@ def macrobenchmark(skew, n, samples):
     with open(output_path, 'w') as f:
         json.dump(benchmark_results, f, indent=2)
 
-    jpype.shutdownJVM()
+    click.echo(output_path)
+
+    if jpype.isJVMStarted():
+        jpype.shutdownJVM()
 
 @click.command()
-@click.option('--input_file', required=True, help='Path to the Zipf distribution CSV file.')
+@click.option('--input_file', default=None, help='Path to the result file (CSV, Parquet, Arrow, Feather or NPY).')
+@click.option('--dir', 'directory', default=None, type=click.Path(exists=True, file_okay=False), help='Directory whose result files (searched recursively) are all evaluated.')
+@click.option('--jobs', default=1, type=click.IntRange(min=1), help='Number of processes evaluating files in parallel with --dir.')
+@click.option('--table', default=None, type=click.Path(dir_okay=False), help='Output table for --dir, written as Parquet if it ends in ".parquet" and as CSV otherwise.')
 @click.option('--skew', required=True, type=float, help='Skew factor of the Zipfian distribution.')
 @click.option('--metric', type=click.Choice(['tvd', 'ks_stat', 'ks_p_value', 'all']), default='tvd', 
               help='Metric to output: total variation distance (tvd), KS statistic (ks_stat), KS p-value (ks_p_value), or all metrics.')
-@click.option('--buckets', type=int, required=True, help="The number of buckets used")
-def accuracy_zipf(input_file, skew, metric, buckets):
-    """Evaluate accuracy (TVD, KS-test) for a single Zipf distribution CSV file."""
-    
-    # Extract support size and sample size from filename
-    filename = os.path.basename(input_file)
-    pattern = re.compile(r'(\d+[KM]?)[-_](\d+[KM]?)\.csv')
-    match = pattern.match(filename)
-    
-    if match:
-        support_str, sample_str = match.groups()
-        
-        if 'K' in support_str:
-            support_str = support_str.replace('K', '000')
-        if 'M' in support_str:
-            support_str = support_str.replace('M', '000000')
-    else:
-        click.echo(f"Couldn't parse support and sample size from filename: {filename}")
-        return
-    
-    # Read the CSV file
-    df = pd.read_csv(input_file, skipinitialspace=True)
-    
-    # Get empirical probabilities
-    empirical_probs = df["rel_freq"].values
+@click.option('--buckets', type=int, default=None, help="The number of buckets used, for results without metadata. Otherwise taken from the metadata")
+@click.option('--scramble', type=EnumChoice(ScrambleType), default=ScrambleType.NONE.value, help='Scrambling of the results to undo before evaluating, only "feistel" can be inverted')
+@click.option('--scramble_seed', default=0, type=int, help='Seed the results were scrambled with')
+def accuracy_zipf(input_file, directory, jobs, table, skew, metric, buckets, scramble, scramble_seed):
+    """Evaluate accuracy (TVD, KS-test) for a single result file, or for every result file in a directory. Files of a directory
+    that can't be evaluated are reported with their error in the table."""
 
-    
-    # Compute theoretical probabilities
-    bucket_edges = np.linspace(0, int(support_str), num=buckets+1, dtype=int)
-    harmonic_norm = np.sum(1 / np.arange(1, int(support_str) + 1) ** skew)
-    
-    theoretical_probs = [
-        np.sum((1 / np.arange(start + 1, end + 1) ** skew) / harmonic_norm)
-        for start, end in zip(bucket_edges[:-1], bucket_edges[1:])
-    ]
-    
-    theoretical_probs = np.array(theoretical_probs)
+    if (input_file is None) == (directory is None):
+        raise click.UsageError("Exactly one of '--input_file' and '--dir' is required")
+    if scramble == ScrambleType.HASH:
+        raise click.UsageError("Hash-scrambled results can't be inverted, use '--scramble feistel' when sampling")
 
-    empirical_cdf = np.cumsum(empirical_probs)
-    theoretical_cdf = np.cumsum(theoretical_probs)
-    
-    tvd = 0.5 * np.sum(np.abs(empirical_probs - theoretical_probs))
-    ks_statistic = np.max(np.abs(empirical_cdf - theoretical_cdf))
+    if directory is not None:
+        files = sorted(str(path) for path in pathlib.Path(directory).rglob("*") if path.suffix in RESULT_SUFFIXES and path.is_file())
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rows = list(pool.map(evaluate_result, files, repeat(skew), repeat(buckets), repeat(scramble), repeat(scramble_seed)))
+
+        for path, row in zip(files, rows):
+            if row is None:
+                click.echo(f"Couldn't parse support and sample size from filename: {os.path.basename(path)}")
+            elif "error" in row:
+                click.echo(f"Couldn't evaluate {path}: {row['error']}", err=True)
+
+        df = pd.DataFrame([row for row in rows if row is not None])
+        if not df.empty:
+            df = df.sort_values(["generator", "n", "samples"], ignore_index=True)
 
-    lambda_n = np.sqrt(int(sample_str)) * ks_statistic
-    p_value = stats.kstwobign.sf(lambda_n)
+        if table is None:
+            table = ROOT_DIR + f"/results/accuracy/accuracy_{datetime.now().strftime('%Y-%m-%d-%H-%M-%S')}.csv"
+        os.makedirs(os.path.dirname(os.path.abspath(table)), exist_ok=True)
+
+        if table.endswith(".parquet"):
+            df.to_parquet(table, index=False)
+        else:
+            df.to_csv(table, index=False)
+
+        click.echo(table)
+        return
+
+    try:
+        row = evaluate_file(input_file, skew, buckets, scramble, scramble_seed)
+    except (ValueError, KeyError, OSError) as e:
+        raise click.ClickException(str(e))
+    if row is None:
+        click.echo(f"Couldn't parse support and sample size from filename: {os.path.basename(input_file)}")
+        return
 
     if metric == 'tvd' or metric == 'all':
-        click.echo(f"TVD: {tvd}")
+        click.echo(f"TVD: {row['tvd']}")
     
     if metric == 'ks_stat' or metric == 'all':
-        click.echo("KS statistic: {0:.5f}".format(ks_statistic))
+        click.echo("KS statistic: {0:.5f}".format(row['ks_stat']))
     
     if metric == 'ks_p_value' or metric == 'all':
-        click.echo("KS p-value: {0:.5f}".format(p_value))
+        click.echo("KS p-value: {0:.5f}".format(row['ks_p_value']))
@@ -0,0 +1,63 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+def _write_durably(path: Path, write):
+    """
+    Write 'path' through 'write(file)' into a temporary file that is synced and then renamed over 'path', so readers
+    see either the old or the complete new contents
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _histogram_paths(path: Path) -> list[Path]:
+    return list(path.parent.glob(f"{path.stem}.*.npy"))
+
+def save_checkpoint(path: Path, config: dict, histogram: np.ndarray, drawn: int, state: str):
+    """
+    Persist the running 'histogram' after 'drawn' samples and the sampler 'state' as the JSON file 'path', with the
+    histogram in an NPY file next to it. The JSON is replaced last, so an interrupted save leaves the previous
+    checkpoint intact
+    """
+    os.makedirs(path.parent, exist_ok=True)
+    histogram_path = path.with_name(f"{path.stem}.{drawn}.npy")
+    _write_durably(histogram_path, lambda f: np.save(f, histogram))
+
+    checkpoint = {"config": config, "drawn": drawn, "histogram": histogram_path.name, "sampler_state": state}
+    _write_durably(path, lambda f: f.write(json.dumps(checkpoint, indent=2).encode()))
+
+    # Make the renames durable before the histogram of the previous checkpoint goes
+    directory = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+    for stale in _histogram_paths(path):
+        if stale != histogram_path:
+            stale.unlink()
+
+def load_checkpoint(path: Path, config: dict) -> tuple[np.ndarray, int, str] | None:
+    """
+    Load the checkpoint at 'path', which has to be one of a run with the same 'config'
+    :return: (histogram, drawn, sampler state) or None if there is no checkpoint
+    """
+    if not path.exists():
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+
+    mismatched = [field for field in config if checkpoint["config"].get(field) != config[field]]
+    if mismatched:
+        raise ValueError(f"The checkpoint {path} is one of a different run, it differs in {', '.join(mismatched)}")
+    return np.load(path.with_name(checkpoint["histogram"])), checkpoint["drawn"], checkpoint["sampler_state"]
+
+def remove_checkpoint(path: Path):
+    for histogram_path in _histogram_paths(path):
+        histogram_path.unlink()
+    path.unlink(missing_ok=True)
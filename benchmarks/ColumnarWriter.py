@@ -0,0 +1,133 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from definitions import OutputType
+
+# Rows per Parquet row group and per CSV/IPC record batch, large enough for histograms with 1e8 entries
+ROW_GROUP_SIZE = 1 << 20
+
+SCHEMA = pa.schema([
+    ("entry", pa.int64()),
+    ("cnt", pa.int64()),
+    ("rel_freq", pa.float64()),
+])
+
+Column = np.ndarray | pa.Array | pa.ChunkedArray
+
+def _int64_column(column: Column) -> pa.Array | pa.ChunkedArray:
+    """Wrap a column as int64 Arrow array, without copying NumPy int64/uint64 buffers"""
+    if isinstance(column, np.ndarray):
+        column = np.ascontiguousarray(column)
+        if column.dtype == np.uint64:
+            # Counts stay far below 2^63, so the bits can be reinterpreted
+            column = column.view(np.int64)
+        return pa.array(column, type=pa.int64())
+    return column if column.type == pa.int64() else pc.cast(column, pa.int64())
+
+def _schema(metadata: dict | None) -> pa.Schema:
+    """SCHEMA with the metadata values JSON-encoded"""
+    return SCHEMA.with_metadata({key: json.dumps(value) for key, value in metadata.items()}) if metadata else SCHEMA
+
+def histogram_table(entries: Column, counts: Column, total_samples: int, metadata: dict | None = None) -> pa.Table:
+    """
+    Assemble the (entry, cnt, rel_freq) table of a histogram, computing 'rel_freq' from 'total_samples'. The metadata
+    values are stored JSON-encoded in the schema
+    :return: pa.Table
+    """
+    entries, counts = _int64_column(entries), _int64_column(counts)
+    rel_freq = pc.divide(pc.cast(counts, pa.float64()), float(total_samples))
+    return pa.Table.from_arrays([entries, counts, rel_freq], schema=_schema(metadata))
+
+class HistogramWriter:
+    """
+    Streaming writer of a histogram in the columnar 'output' format, for histograms handed over in ascending chunks of
+    (entry, cnt) columns. Chunks are buffered into row groups of ROW_GROUP_SIZE rows. "npy" writes the dense counts of
+    'size' entries through a memory-mapped file. CSV and NPY can't hold the metadata, the other formats keep it in their
+    schema. Existing files are not overwritten
+    """
+    def __init__(self, filepath: Path, output: OutputType, total_samples: int, metadata: dict | None = None, size: int | None = None):
+        self.output = output
+        self.total_samples = total_samples
+        self.metadata = metadata
+        self.pending = []
+        self.pending_rows = 0
+
+        os.makedirs(filepath.parent, exist_ok=True)
+        if output == OutputType.NPY:
+            if size is None:
+                raise ValueError("npy output holds the dense histogram, which needs its size")
+            if filepath.exists():
+                raise FileExistsError(f"{filepath} already exists")
+            self.dense = np.lib.format.open_memmap(filepath, mode='w+', dtype=np.uint64, shape=(size,))
+            return
+
+        schema = _schema(metadata)
+        self.file = open(filepath, 'xb')
+        match output:
+            case OutputType.PARQUET:
+                self.writer = pq.ParquetWriter(self.file, schema)
+            case OutputType.ARROW:
+                self.writer = pa.ipc.new_file(self.file, schema)
+            case OutputType.FEATHER:
+                self.writer = pa.ipc.new_file(self.file, schema, options=pa.ipc.IpcWriteOptions(compression="lz4"))
+            case OutputType.CSV:
+                self.writer = pa_csv.CSVWriter(self.file, schema, write_options=pa_csv.WriteOptions(batch_size=ROW_GROUP_SIZE, quoting_style="none", quoting_header="none"))
+            case _:
+                self.file.close()
+                raise ValueError(f"{output.value} is not a columnar output")
+
+    def write(self, entries: Column, counts: Column):
+        if self.output == OutputType.NPY:
+            self.dense[np.asarray(entries)] = np.asarray(counts)
+            return
+        self.pending.append(histogram_table(entries, counts, self.total_samples, self.metadata))
+        self.pending_rows += len(entries)
+        if self.pending_rows >= ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.writer.write_table(pa.concat_tables(self.pending), ROW_GROUP_SIZE)
+            self.pending = []
+            self.pending_rows = 0
+
+    def close(self):
+        if self.output == OutputType.NPY:
+            self.dense.flush()
+            return
+        self._flush()
+        self.writer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_histogram(filepath: Path, output: OutputType, entries: Column, counts: Column, total_samples: int, metadata: dict | None = None):
+    """
+    Write the histogram given as (entry, cnt) columns to 'filepath' in the columnar 'output' format, see HistogramWriter
+    """
+    with HistogramWriter(filepath, output, total_samples, metadata) as writer:
+        writer.write(entries, counts)
+
+def read_metadata(filepath: Path) -> dict:
+    """
+    Metadata embedded by 'write_histogram' in a Parquet, Arrow or Feather file
+    :return: dict, empty if the file carries none
+    """
+    # Only the footer is read, the record batches stay untouched
+    if filepath.suffix == ".parquet":
+        schema = pq.read_schema(filepath)
+    else:
+        with pa.memory_map(str(filepath)) as source:
+            schema = pa.ipc.open_file(source).schema
+    return {key.decode(): json.loads(value) for key, value in (schema.metadata or {}).items()}
@@ -3,9 +3,10 @@ from collections import Counter
 from definitions import ROOT_DIR
 import matplotlib.pyplot as plt
 import pandas as pd 
+import numpy as np
 
 import ctypes
-from ctypes import POINTER, c_uint64, c_double, c_uint, c_bool, Structure, Union
+from ctypes import POINTER, c_uint64, c_double, c_uint, c_bool, c_long, Structure, Union
 
 class Taus88_state(Structure):
     _fields_ = [
@@ -60,6 +61,10 @@ lib.zipf_init.restype = None
 lib.zipf_next.argtypes = [POINTER(ZipfState)]
 lib.zipf_next.restype = c_uint64
 
+# Bind zipf_sample_into
+lib.zipf_sample_into.argtypes = [POINTER(ZipfState), np.ctypeslib.ndpointer(dtype=np.int64, flags="C_CONTIGUOUS"), c_long]
+lib.zipf_sample_into.restype = None
+
 # Bind pareto_init
 lib.pareto_init.argtypes = [POINTER(ZipfState), c_uint64, c_double, c_double, c_uint]
 lib.pareto_init.restype = None
@@ -81,13 +86,18 @@ class FIOSampler(Sampler):
     """
     "Flexible I/O Tester" sampler wrapper
     """
-    def __init__(self, n: int, samples: int, skew: float):
-        super().__init__(n, samples, skew)
+    def __init__(self, n: int, samples: int, skew: float, seed: int | None = None):
+        super().__init__(n, samples, skew, seed)
         self.zs = ZipfState()
-        lib.zipf_init(self.zs, self.n, self.skew, -1, 1)
+        lib.zipf_init(self.zs, self.n, self.skew, -1, 1 if seed is None else seed)
     
     def sample(self) -> int:
         return lib.zipf_next(self.zs)
+
+    def sample_batch(self, k: int) -> np.ndarray:
+        out = np.empty(k, dtype=np.int64)
+        lib.zipf_sample_into(self.zs, out, k)
+        return out
     
     def benchmark(self) -> int:
         return lib.zipf_benchmark(self.zs, self.samples)
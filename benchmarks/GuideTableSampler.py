@@ -0,0 +1,13 @@
+from SamplerLibrary import NativeSampler, SamplerKind, RngEngine
+
+class GuideTableSampler(NativeSampler):
+    """
+    Wrapper for the native guide table (Chen-Asau) inversion sampler. With 'single_precision' the CDF is stored as float32,
+    halving its memory at a resolution of 2^-24
+    """
+    kind = SamplerKind.GUIDE_TABLE
+
+    def __init__(self, n, samples, skew, seed=None, engine: RngEngine = RngEngine.MT19937_64, single_precision: bool = False):
+        if single_precision:
+            self.kind = SamplerKind.GUIDE_TABLE_F32
+        super().__init__(n, samples, skew, seed, engine)
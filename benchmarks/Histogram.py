@@ -0,0 +1,32 @@
+import numpy as np
+
+from definitions import SAMPLE_CHUNK_SIZE
+from Sampler import Sampler
+
+def bucketize(items: np.ndarray, n: int, buckets: int) -> np.ndarray:
+    """
+    Map samples from the range [0, n] onto 'buckets' equally sized buckets and count the hits per bucket.
+    Samples falling past the last bucket are dropped, as in the scalar 'item * buckets // n' mapping
+    :return: np.ndarray of dtype int64 and length 'buckets'
+    """
+    index = items * buckets // n
+    return np.bincount(index[index < buckets], minlength=buckets)
+
+def count_exact(items: np.ndarray, n: int) -> np.ndarray:
+    """
+    Count the hits per item for samples from the range [0, n]
+    :return: np.ndarray of dtype int64 and length 'n + 1'
+    """
+    return np.bincount(items[items <= n], minlength=n + 1)
+
+def sample_histogram(sampler: Sampler, count: int, n: int, buckets: int, exact: bool = False) -> np.ndarray:
+    """
+    Draw 'count' samples from 'sampler' in chunks of SAMPLE_CHUNK_SIZE and accumulate them into a dense histogram.
+    In 'exact' mode every item gets its own entry, otherwise the samples are bucketized
+    :return: np.ndarray of dtype int64
+    """
+    histogram = np.zeros(n + 1 if exact else buckets, dtype=np.int64)
+    for start in range(0, count, SAMPLE_CHUNK_SIZE):
+        items = sampler.sample_batch(min(SAMPLE_CHUNK_SIZE, count - start))
+        histogram += count_exact(items, n) if exact else bucketize(items, n, buckets)
+    return histogram
@@ -0,0 +1,8 @@
+from SamplerLibrary import NativeSampler, SamplerKind
+
+class HybridSampler(NativeSampler):
+    """
+    Wrapper for the native hybrid sampler: an alias table over the most frequent ranks, sized to the L2 cache,
+    and rejection-inversion for the remaining tail
+    """
+    kind = SamplerKind.HYBRID
@@ -1,5 +1,6 @@
 from Sampler import Sampler
 import ctypes
+import numpy as np
 
 from sortedcontainers import SortedDict
 
@@ -16,19 +17,28 @@ lib.zipf_create.restype = ctypes.c_void_p
 lib.zipf_sample.argtypes = [ctypes.c_void_p, ctypes.c_uint64, ctypes.c_double]
 lib.zipf_sample.restype = ctypes.c_long
 
+lib.zipf_sample_into.argtypes = [ctypes.c_void_p, ctypes.c_uint64, ctypes.c_double, np.ctypeslib.ndpointer(dtype=np.int64, flags="C_CONTIGUOUS"), ctypes.c_long]
+lib.zipf_sample_into.restype = None
+
 lib.zipf_benchmark.argtypes = [ctypes.c_void_p, ctypes.c_uint64, ctypes.c_uint64, ctypes.c_double]
 lib.zipf_benchmark.restype = ctypes.c_long
 
 class PgBenchSampler(Sampler):
-    def __init__(self, n, samples, skew):
+    def __init__(self, n, samples, skew, seed=None):
         self.n = n
         self.skew = skew
         self.samples = samples
-        self.sampler = lib.zipf_create(10)
+        self.seed = seed
+        self.sampler = lib.zipf_create(10 if seed is None else seed)
 
     def sample(self) -> int:
         return lib.zipf_sample(self.sampler, self.n, self.skew)
 
+    def sample_batch(self, k: int) -> np.ndarray:
+        out = np.empty(k, dtype=np.int64)
+        lib.zipf_sample_into(self.sampler, self.n, self.skew, out, k)
+        return out
+
     def benchmark(self) -> int:
         return lib.zipf_benchmark(self.sampler, self.n, self.samples, self.skew)
 
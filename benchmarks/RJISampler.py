@@ -2,6 +2,7 @@ from Sampler import Sampler
 
 import ctypes
 from ctypes import c_void_p, c_long, c_double
+import numpy as np
 
 from definitions import ROOT_DIR
 from sortedcontainers import SortedDict
@@ -19,18 +20,26 @@ zipf_lib.zipf_destroy.restype = None
 zipf_lib.zipf_sample.argtypes = [c_void_p]
 zipf_lib.zipf_sample.restype = c_long
 
+zipf_lib.zipf_sample_into.argtypes = [c_void_p, np.ctypeslib.ndpointer(dtype=np.int64, flags="C_CONTIGUOUS"), c_long]
+zipf_lib.zipf_sample_into.restype = None
+
 
 class RJISampler(Sampler):
     """
     Wrapper for the RJI sampler from Gabriel
     """
-    def __init__(self, n, samples, skew):
-        super().__init__(n, samples, skew)
-        self.sampler = zipf_lib.zipf_create(self.n, self.skew, 10)
+    def __init__(self, n, samples, skew, seed=None):
+        super().__init__(n, samples, skew, seed)
+        self.sampler = zipf_lib.zipf_create(self.n, self.skew, 10 if seed is None else seed)
 
     def sample(self) -> int:
         return zipf_lib.zipf_sample(self.sampler)
 
+    def sample_batch(self, k: int) -> np.ndarray:
+        out = np.empty(k, dtype=np.int64)
+        zipf_lib.zipf_sample_into(self.sampler, out, k)
+        return out
+
     def benchmark(self) -> int:
         return zipf_lib.zipf_benchmark(self.sampler, self.samples)
 
@@ -0,0 +1,103 @@
+import os
+import queue
+import socket
+import stat
+import sys
+import threading
+from typing import BinaryIO
+
+import numpy as np
+
+from definitions import RawFormat, SAMPLE_CHUNK_SIZE
+from Sampler import Sampler
+from SamplerLibrary import load_library
+
+# Upper bound of the varint encoding of one sample, must match MAX_VARINT_BYTES in impl/raw_encoding.hpp
+MAX_VARINT_BYTES = 10
+
+def open_sink(target: str) -> BinaryIO:
+    """
+    Open the destination of a raw stream: "-" for stdout, "unix:<path>" to connect to a listening Unix socket,
+    otherwise a named pipe, which is created if the path doesn't exist. Opening a pipe blocks until a reader attaches
+    :return: binary file object
+    """
+    if target == "-":
+        return sys.stdout.buffer
+    if target.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target.removeprefix("unix:"))
+        # The file object keeps the connection open after the socket object is released
+        sink = sock.makefile("wb")
+        sock.close()
+        return sink
+    if not os.path.exists(target):
+        os.mkfifo(target)
+    elif not stat.S_ISFIFO(os.stat(target).st_mode):
+        raise ValueError(f"{target} exists and is not a named pipe")
+    return open(target, "wb")
+
+class RawEncoder:
+    """
+    Encodes sample batches as little-endian uint32 or uint64 words, or as zigzag varints of the difference to the
+    previous sample (impl/raw_encoding.hpp). The varint stream continues across batches and starts after 0
+    """
+    def __init__(self, raw_format: RawFormat):
+        self.raw_format = raw_format
+        self.previous = 0
+
+    def encode(self, items: np.ndarray) -> memoryview:
+        """
+        Encode one batch of samples
+        :return: memoryview over the encoded bytes
+        """
+        match self.raw_format:
+            case RawFormat.U32:
+                return memoryview(items.astype("<u4"))
+            case RawFormat.U64:
+                return memoryview(items.astype("<u8"))
+            case RawFormat.VARINT_DELTA:
+                items = np.ascontiguousarray(items, dtype=np.int64)
+                out = np.empty(items.size * MAX_VARINT_BYTES, dtype=np.uint8)
+                length = load_library().encode_varint_delta(items, items.size, self.previous, out)
+                if items.size:
+                    self.previous = int(items[-1])
+                return memoryview(out[:length])
+
+def emit_raw(sampler: Sampler, samples: int, sink: BinaryIO, raw_format: RawFormat, chunk_size: int = SAMPLE_CHUNK_SIZE) -> None:
+    """
+    Stream 'samples' variates of 'sampler' to 'sink' in 'raw_format'. Batches are double-buffered: a writer thread
+    encodes and writes one batch while the next one is sampled, and sampling blocks while the consumer lags behind.
+    Both sides run outside the GIL for most of the time, the samples never become Python objects
+    """
+    pending = queue.Queue(maxsize=1)
+    encoder = RawEncoder(raw_format)
+    error = []
+
+    def write():
+        while (items := pending.get()) is not None:
+            if not error:
+                try:
+                    sink.write(encoder.encode(items))
+                except Exception as e:
+                    # Keep draining, so the producer never blocks on a dead consumer
+                    error.append(e)
+        if not error:
+            try:
+                sink.flush()
+            except Exception as e:
+                error.append(e)
+
+    writer = threading.Thread(target=write, name="raw-writer", daemon=True)
+    writer.start()
+
+    try:
+        for start in range(0, samples, chunk_size):
+            if error:
+                break
+            pending.put(sampler.sample_batch(min(chunk_size, samples - start)))
+    finally:
+        pending.put(None)
+        writer.join()
+
+    if error:
+        raise error[0]
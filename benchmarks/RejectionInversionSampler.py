@@ -0,0 +1,8 @@
+from SamplerLibrary import NativeSampler, SamplerKind
+
+class RejectionInversionSampler(NativeSampler):
+    """
+    Wrapper for the native rejection-inversion sampler (Hörmann and Derflinger), whose batches are drawn by a SIMD kernel.
+    Same algorithm as the vendored "rji" generator, but with a selectable engine
+    """
+    kind = SamplerKind.RJI
@@ -5,19 +5,23 @@ from zipf_rust import PyZipf
 
 import matplotlib.pyplot as plt
 import pandas as pd
+import numpy as np
 
 
 class RustSampler(Sampler):
     """
     Wrapper for the rust crate 'zipf'  
     """
-    def __init__(self, n, samples, skew):
-        super().__init__(n, samples, skew)
-        self.sampler = PyZipf(n, skew)
+    def __init__(self, n, samples, skew, seed=None):
+        super().__init__(n, samples, skew, seed)
+        self.sampler = PyZipf(n, skew, seed)
 
     def sample(self) -> int:
         return self.sampler.sample()
 
+    def sample_batch(self, k: int) -> np.ndarray:
+        return self.sampler.sample_batch(k)
+
     def benchmark(self) -> int:
         return self.sampler.benchmark(self.samples)
 
@@ -1,14 +1,16 @@
 from abc import ABC, abstractmethod
 from sortedcontainers import SortedDict
+import numpy as np
 
 class Sampler(ABC):
     """
     Interface wrapper for different sampling backends
     """
-    def __init__(self, n : int, samples : int, skew : float):
+    def __init__(self, n : int, samples : int, skew : float, seed : int | None = None):
         self.n = n
         self.samples = samples
         self.skew = skew
+        self.seed = seed
 
     @abstractmethod
     def sample() -> int:
@@ -16,4 +18,39 @@ class Sampler(ABC):
         Sample a Zipfian distribution
         :return: int 
         """
-        pass
\ No newline at end of file
+        pass
+
+    def sample_batch(self, k: int) -> np.ndarray:
+        """
+        Sample 'k' variates of a Zipfian distribution at once. Backends with a native
+        batch entry point override this to fill the buffer in a single call
+        :return: np.ndarray of dtype int64
+        """
+        return np.fromiter((self.sample() for _ in range(k)), dtype=np.int64, count=k)
+
+    def rng_profile(self) -> dict | None:
+        """
+        Random number consumption of the backend, for samplers whose engine can be profiled
+        :return: dict with 'draws_per_variate' and 'ns_per_draw' or None
+        """
+        return None
+
+    def table_bytes(self) -> int | None:
+        """
+        Memory held by the lookup tables of table-based backends
+        :return: size in bytes or None
+        """
+        return None
+
+    def get_state(self) -> str | None:
+        """
+        Serialized RNG state of backends that can be checkpointed, see set_state
+        :return: str or None
+        """
+        return None
+
+    def set_state(self, state: str):
+        """
+        Continue the sample stream from a state returned by get_state
+        """
+        raise NotImplementedError(f"{type(self).__name__} can't restore its state")
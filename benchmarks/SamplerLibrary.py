@@ -0,0 +1,229 @@
+import ctypes
+import os
+from enum import IntEnum
+from functools import lru_cache
+
+import numpy as np
+
+from definitions import ROOT_DIR
+from Sampler import Sampler
+
+# Library variants in order of preference, with the CPU flags each one requires
+ISA_VARIANTS = [
+    ("avx512", {"avx512f", "avx512bw", "avx512cd", "avx512dq", "avx512vl", "avx2", "fma", "bmi2"}),
+    ("avx2", {"avx2", "fma", "bmi", "bmi2", "f16c", "movbe"}),
+    ("baseline", set()),
+]
+
+SamplerHandle = ctypes.POINTER(ctypes.c_char)
+
+# Draws used to profile the RNG share of a sampler, see rng_profile
+RNG_PROFILE_DRAWS = 1 << 22
+
+# Seed of the native samplers constructed without one
+DEFAULT_SEED = 102
+
+class SamplerKind(IntEnum):
+    """
+    Samplers of the native library, must match 'sampler_kind' in impl/sampler_wrapper.cpp
+    """
+    REJECTION = 0
+    RJI = 1
+    MARSAGLIA = 2
+    ALIAS = 3
+    HYBRID = 4
+    GUIDE_TABLE = 5
+    GUIDE_TABLE_F32 = 6
+
+class ScrambleKind(IntEnum):
+    """
+    Key scramblers of the native library, must match 'scramble_kind' in impl/sampler_wrapper.cpp
+    """
+    HASH = 1
+    FEISTEL = 2
+
+class RngEngine(IntEnum):
+    """
+    Random bit engines of the native library, must match 'engine_kind' in impl/sampler_wrapper.cpp
+    """
+    MT19937_64 = 0
+    XOSHIRO256PP = 1
+    PCG64 = 2
+    PHILOX4X64 = 3
+
+def cpu_flags() -> set[str]:
+    """
+    Instruction set flags of the host CPU, empty if they can't be determined
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+def select_isa(flags: set[str]) -> str:
+    """
+    Pick the fastest library variant that is built and supported by a CPU with the given flags.
+    The ZIPF_SAMPLER_ISA environment variable forces a specific variant
+    """
+    forced = os.environ.get("ZIPF_SAMPLER_ISA")
+    if forced:
+        return forced
+
+    for isa, required in ISA_VARIANTS:
+        if required <= flags and os.path.exists(library_path(isa)):
+            return isa
+    raise FileNotFoundError(f"No libsampler variant found in {ROOT_DIR}/shared, run 'make install' in impl/")
+
+def library_path(isa: str) -> str:
+    return ROOT_DIR + f'/shared/libsampler_{isa}.so'
+
+@lru_cache(maxsize=None)
+def load_library() -> ctypes.CDLL:
+    """
+    Load the native sampler library once per process, in the variant matching the host
+    """
+    lib = ctypes.CDLL(library_path(select_isa(cpu_flags())))
+
+    lib.create_sampler.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_long, ctypes.c_double, ctypes.c_long]
+    lib.sample.argtypes = [SamplerHandle]
+    lib.destroy_sampler.argtypes = [SamplerHandle]
+    lib.sample_into.argtypes = [SamplerHandle, np.ctypeslib.ndpointer(dtype=np.int64, flags="C_CONTIGUOUS"), ctypes.c_long]
+    lib.benchmark.argtypes = [SamplerHandle, ctypes.c_long]
+    lib.skip_sampler.argtypes = [SamplerHandle, ctypes.c_ulonglong]
+    lib.sampler_table_bytes.argtypes = [SamplerHandle]
+    lib.rng_draws_per_variate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_long, ctypes.c_double, ctypes.c_long, ctypes.c_long]
+    lib.engine_ns_per_draw.argtypes = [ctypes.c_int, ctypes.c_long]
+    lib.scramble_keys.argtypes = [ctypes.c_int, ctypes.c_uint64, ctypes.c_uint64, np.ctypeslib.ndpointer(dtype=np.int64, flags="C_CONTIGUOUS"), ctypes.c_long, ctypes.c_int]
+    lib.scramble_key.argtypes = [ctypes.c_int, ctypes.c_uint64, ctypes.c_uint64, ctypes.c_int64]
+    lib.get_sampler_state.argtypes = [SamplerHandle, ctypes.c_char_p, ctypes.c_long]
+    lib.set_sampler_state.argtypes = [SamplerHandle, ctypes.c_char_p]
+    lib.encode_varint_delta.argtypes = [np.ctypeslib.ndpointer(dtype=np.int64, flags="C_CONTIGUOUS"), ctypes.c_long, ctypes.c_int64, np.ctypeslib.ndpointer(dtype=np.uint8, flags="C_CONTIGUOUS")]
+
+    lib.create_sampler.restype = SamplerHandle
+    lib.sample.restype = ctypes.c_long
+    lib.sample_into.restype = None
+    lib.benchmark.restype = ctypes.c_long
+    lib.skip_sampler.restype = None
+    lib.sampler_table_bytes.restype = ctypes.c_size_t
+    lib.rng_draws_per_variate.restype = ctypes.c_double
+    lib.engine_ns_per_draw.restype = ctypes.c_double
+    lib.scramble_keys.restype = ctypes.c_int
+    lib.scramble_key.restype = ctypes.c_int64
+    lib.get_sampler_state.restype = ctypes.c_long
+    lib.set_sampler_state.restype = ctypes.c_int
+    lib.encode_varint_delta.restype = ctypes.c_long
+    lib.sampler_isa.restype = ctypes.c_char_p
+    return lib
+
+def rng_profile(kind: SamplerKind, engine: RngEngine, n: int, skew: float, seed: int, samples: int = RNG_PROFILE_DRAWS) -> dict:
+    """
+    Profile the random number consumption of a sampler: engine draws per variate, measured on a separate instance
+    with a counting engine, and the time per draw of the engine alone
+    :return: dict with 'draws_per_variate' and 'ns_per_draw'
+    """
+    lib = load_library()
+    return {
+        "draws_per_variate": lib.rng_draws_per_variate(kind, engine, n, skew, seed, samples),
+        "ns_per_draw": lib.engine_ns_per_draw(engine, RNG_PROFILE_DRAWS),
+    }
+
+class LibWrapper:
+    def __init__(self, kind: SamplerKind, n, skew, seed, engine: RngEngine = RngEngine.MT19937_64):
+        self.lib = load_library()
+        self.kind = kind
+        self.engine = engine
+        self.sampler = self.lib.create_sampler(kind, engine, n, skew, seed)
+        if not self.sampler:
+            raise ValueError(f"The native {kind.name.lower()} sampler does not support n={n}, skew={skew}")
+
+    @property
+    def isa(self) -> str:
+        return self.lib.sampler_isa().decode()
+
+    def sample(self) -> int:
+        return self.lib.sample(self.sampler)
+
+    def sample_into(self, out: np.ndarray) -> None:
+        self.lib.sample_into(self.sampler, out, len(out))
+
+    def skip(self, draws: int) -> None:
+        """
+        Advance the engine by 'draws' outputs, in O(1) for Philox, e.g. to give parallel instances disjoint streams
+        """
+        self.lib.skip_sampler(self.sampler, draws)
+
+    def table_bytes(self) -> int:
+        """
+        Memory held by the sampler's lookup tables, 0 for samplers without tables
+        """
+        return self.lib.sampler_table_bytes(self.sampler)
+
+    def get_state(self) -> str:
+        """
+        State of the sampler's engine in its stream serialization, enough to continue the sample stream in a new instance
+        :return: str
+        """
+        length = self.lib.get_sampler_state(self.sampler, None, 0)
+        buffer = ctypes.create_string_buffer(length + 1)
+        self.lib.get_sampler_state(self.sampler, buffer, len(buffer))
+        return buffer.value.decode()
+
+    def set_state(self, state: str) -> None:
+        """
+        Restore a state returned by get_state of a sampler with the same kind, engine and parameters
+        """
+        if self.lib.set_sampler_state(self.sampler, state.encode()) != 0:
+            raise ValueError(f"Not a state of the {self.engine.name.lower()} engine")
+
+    def destroy(self) -> None:
+        # Also reached from __del__, so a failed create or a second call must not free anything
+        if getattr(self, "sampler", None):
+            self.lib.destroy_sampler(self.sampler)
+            self.sampler = None
+
+    def __del__(self):
+        self.destroy()
+
+    def benchmark(self, samples) -> int:
+        return self.lib.benchmark(self.sampler, samples)
+
+class NativeSampler(Sampler):
+    """
+    Sampler backed by the native library, the subclasses only choose its 'kind'
+    """
+    kind: SamplerKind
+
+    def __init__(self, n, samples, skew, seed=None, engine: RngEngine = RngEngine.MT19937_64):
+        super().__init__(n, samples, skew, seed)
+        self.native_seed = DEFAULT_SEED if seed is None else seed
+        self.sampler = LibWrapper(self.kind, n, skew, self.native_seed, engine)
+
+    def sample(self) -> int:
+        return self.sampler.sample()
+
+    def sample_batch(self, k: int) -> np.ndarray:
+        out = np.empty(k, dtype=np.int64)
+        self.sampler.sample_into(out)
+        return out
+
+    def benchmark(self):
+        return self.sampler.benchmark(self.samples)
+
+    def rng_profile(self) -> dict:
+        return rng_profile(self.kind, self.sampler.engine, self.n, self.skew, self.native_seed)
+
+    def table_bytes(self) -> int | None:
+        """
+        Memory held by the lookup tables, None for the samplers without tables
+        """
+        return self.sampler.table_bytes() or None
+
+    def get_state(self) -> str:
+        return self.sampler.get_state()
+
+    def set_state(self, state: str):
+        self.sampler.set_state(state)
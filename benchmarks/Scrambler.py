@@ -0,0 +1,100 @@
+import numpy as np
+
+from definitions import ScrambleType
+from Sampler import Sampler
+from SamplerLibrary import ScrambleKind, load_library
+
+class Scrambler:
+    """
+    Output stage mapping the items in [0, size) of a sample batch onto scrambled keys in [0, size), so that the
+    most frequent ranks are spread across the keyspace instead of clustering at its start. The kernels are the SIMD
+    loops of impl/scrambler.hpp
+    """
+    kind: ScrambleKind
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.seed = seed
+        self.lib = load_library()
+
+    def _run(self, items: np.ndarray, inverse: bool) -> np.ndarray:
+        out = np.array(items, dtype=np.int64, copy=True, order="C")
+        if out.size and (out.min() < 0 or out.max() >= self.size):
+            raise ValueError(f"Items must lie in [0, {self.size})")
+        if self.lib.scramble_keys(self.kind, self.size, self.seed, out, out.size, inverse) != 0:
+            raise ValueError(f"The {self.kind.name.lower()} scrambler has no inverse")
+        return out
+
+    def scramble_one(self, item: int) -> int:
+        """
+        Scramble a single item, passed by value instead of through an array
+        :return: int
+        """
+        if not 0 <= item < self.size:
+            raise ValueError(f"Items must lie in [0, {self.size})")
+        return self.lib.scramble_key(self.kind, self.size, self.seed, item)
+
+    def __call__(self, items: np.ndarray) -> np.ndarray:
+        """
+        Scramble a batch of items
+        :return: np.ndarray of dtype int64
+        """
+        return self._run(items, False)
+
+class HashScrambler(Scrambler):
+    """
+    YCSB-style scrambling: a seeded 64-bit hash permutation of the item, reduced to [0, size). The reduction merges
+    some items and leaves some keys unused, so it has no inverse
+    """
+    kind = ScrambleKind.HASH
+
+class FeistelScrambler(Scrambler):
+    """
+    Exact bijection over [0, size): a balanced Feistel network with cycle walking. The inverse maps scrambled keys
+    back to their items, e.g. to evaluate the accuracy of scrambled samples
+    """
+    kind = ScrambleKind.FEISTEL
+
+    def inverse(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Map scrambled keys back to their items
+        :return: np.ndarray of dtype int64
+        """
+        return self._run(keys, True)
+
+def create_scrambler(scramble: ScrambleType, size: int, seed: int = 0) -> Scrambler | None:
+    """Instantiate the scrambler behind the 'scramble' option, None for ScrambleType.NONE"""
+    match scramble:
+        case ScrambleType.HASH:
+            return HashScrambler(size, seed)
+        case ScrambleType.FEISTEL:
+            return FeistelScrambler(size, seed)
+        case _:
+            return None
+
+class ScrambledSampler(Sampler):
+    """
+    Wraps any sampler and scrambles its batches, leaving the sampling itself to the wrapped backend
+    """
+    def __init__(self, sampler: Sampler, scrambler: Scrambler):
+        super().__init__(sampler.n, sampler.samples, sampler.skew, sampler.seed)
+        self.sampler = sampler
+        self.scrambler = scrambler
+
+    def sample(self) -> int:
+        return self.scrambler.scramble_one(self.sampler.sample())
+
+    def sample_batch(self, k: int) -> np.ndarray:
+        return self.scrambler(self.sampler.sample_batch(k))
+
+    def rng_profile(self) -> dict | None:
+        return self.sampler.rng_profile()
+
+    def table_bytes(self) -> int | None:
+        return self.sampler.table_bytes()
+
+    def get_state(self) -> str | None:
+        return self.sampler.get_state()
+
+    def set_state(self, state: str):
+        self.sampler.set_state(state)
@@ -0,0 +1,176 @@
+import json
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from ColumnarWriter import HistogramWriter, ROW_GROUP_SIZE
+from definitions import OutputType
+
+# Entries accumulated densely per step of merge_histograms, bounding its memory independently of the histogram size
+MERGE_WINDOW = 1 << 22
+
+# Sidecar fields that have to agree between all partial histograms of one run
+CONSISTENT_FIELDS = ("generator", "n", "skew", "samples", "buckets", "exact", "seed", "engine", "scramble", "scramble_seed", "shard_count")
+
+def spawn_seeds(seed: int | None, count: int) -> list[int]:
+    """
+    Independent, reproducible 32-bit seeds for 'count' sub-streams, derived from a single root seed. The same derivation
+    serves '--workers' and '--shard', so shard i of k draws the stream of worker i of a '--workers k' run
+    :return: list of seeds
+    """
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(count)]
+
+def split_samples(samples: int, count: int) -> list[int]:
+    """Split 'samples' into 'count' near-equal parts"""
+    return [samples // count + (i < samples % count) for i in range(count)]
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """
+    Parse a '--shard' value of the form 'i/k' with 0 <= i < k
+    :return: (i, k)
+    """
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard '{shard}' is not of the form 'i/k'")
+    if not 0 <= index < count:
+        raise ValueError(f"Shard '{shard}' needs 0 <= i < k")
+    return index, count
+
+def shard_path(filepath: Path, index: int, count: int) -> Path:
+    """Path of the partial histogram of shard 'index' of 'count', next to the result of the whole run"""
+    return filepath.with_name(f"{filepath.stem}.shard-{index}-of-{count}{filepath.suffix}")
+
+def sidecar_path(filepath: Path) -> Path:
+    return filepath.with_name(filepath.name + ".json")
+
+def write_sidecar(filepath: Path, metadata: dict):
+    with open(sidecar_path(filepath), 'x') as f:
+        json.dump(metadata, f, indent=2)
+
+def read_sidecar(filepath: Path) -> dict:
+    with open(sidecar_path(filepath)) as f:
+        return json.load(f)
+
+def merged_metadata(sidecars: list[dict]) -> dict:
+    """
+    Check that the sidecars of partial histograms belong to the same run and cover disjoint shards
+    :return: the sidecar of their merge
+    """
+    first = sidecars[0]
+    for sidecar in sidecars[1:]:
+        mismatched = [field for field in CONSISTENT_FIELDS if sidecar.get(field) != first.get(field)]
+        if mismatched:
+            raise ValueError(f"Partial histograms of different runs, they differ in {', '.join(mismatched)}")
+
+    shards = [shard for sidecar in sidecars for shard in sidecar["shards"]]
+    if len(set(shards)) != len(shards):
+        raise ValueError(f"Shards {sorted({shard for shard in shards if shards.count(shard) > 1})} are included more than once")
+
+    return first | {"shards": sorted(shards), "shard_samples": sum(sidecar["shard_samples"] for sidecar in sidecars)}
+
+def histogram_size(metadata: dict) -> int:
+    """Number of histogram entries of a run, one per item in exact mode and one per bucket otherwise"""
+    return metadata["n"] + 1 if metadata["exact"] else metadata["buckets"]
+
+def read_chunks(filepath: Path) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Stream a histogram file as ascending (entries, counts) chunks of at most about ROW_GROUP_SIZE rows, without loading
+    it as a whole. Supports the outputs of the columnar writer and dense npy counts
+    """
+    match filepath.suffix:
+        case ".csv":
+            convert = pa_csv.ConvertOptions(include_columns=["entry", "cnt"], column_types={"entry": pa.int64(), "cnt": pa.int64()})
+            batches = pa_csv.open_csv(filepath, read_options=pa_csv.ReadOptions(block_size=ROW_GROUP_SIZE * 16), convert_options=convert)
+        case ".parquet":
+            batches = pq.ParquetFile(filepath).iter_batches(batch_size=ROW_GROUP_SIZE, columns=["entry", "cnt"])
+        case ".arrow" | ".feather":
+            reader = pa.ipc.open_file(pa.memory_map(str(filepath)))
+            batches = (reader.get_batch(i).select(["entry", "cnt"]) for i in range(reader.num_record_batches))
+        case ".npy":
+            dense = np.load(filepath, mmap_mode='r')
+            for start in range(0, len(dense), ROW_GROUP_SIZE):
+                chunk = dense[start:start + ROW_GROUP_SIZE]
+                entries = np.flatnonzero(chunk)
+                yield entries + start, chunk[entries].astype(np.int64)
+            return
+        case _:
+            raise ValueError(f"Unsupported histogram file {filepath}")
+
+    for batch in batches:
+        yield batch.column(0).to_numpy(), batch.column(1).to_numpy()
+
+class _Cursor:
+    """Position in the chunk stream of one partial histogram"""
+    def __init__(self, filepath: Path, size: int):
+        self.filepath = filepath
+        self.size = size
+        self.chunks = read_chunks(filepath)
+        self.entries = self.counts = np.empty(0, dtype=np.int64)
+        self.previous = -1
+        self._fill()
+
+    def _fill(self):
+        """Load chunks until the head is non-empty or the stream ends"""
+        while self.entries.size == 0:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return
+            self.entries, self.counts = chunk
+            if self.entries.size and (self.entries[0] <= self.previous or np.any(np.diff(self.entries) <= 0) or self.entries[-1] >= self.size):
+                raise ValueError(f"{self.filepath} is not a histogram with ascending entries in [0, {self.size})")
+            if self.entries.size:
+                self.previous = self.entries[-1]
+
+    @property
+    def done(self) -> bool:
+        return self.entries.size == 0
+
+    def take_below(self, bound: int) -> tuple[np.ndarray, np.ndarray]:
+        """Remove and return the head entries below 'bound'"""
+        cut = np.searchsorted(self.entries, bound)
+        taken = self.entries[:cut], self.counts[:cut]
+        self.entries, self.counts = self.entries[cut:], self.counts[cut:]
+        self._fill()
+        return taken
+
+def merge_chunks(filepaths: list[Path], size: int) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    k-way merge of the histograms in 'filepaths', as ascending (entries, counts) chunks of their summed counts. Every
+    step accumulates one window of MERGE_WINDOW entries, so memory stays bounded by the window and one chunk per file
+    """
+    cursors = [_Cursor(filepath, size) for filepath in filepaths]
+    window = np.zeros(MERGE_WINDOW, dtype=np.int64)
+
+    while cursors := [cursor for cursor in cursors if not cursor.done]:
+        # Windows without entries are skipped
+        low = min(int(cursor.entries[0]) for cursor in cursors)
+        for cursor in cursors:
+            while not cursor.done and cursor.entries[0] < low + MERGE_WINDOW:
+                entries, counts = cursor.take_below(low + MERGE_WINDOW)
+                # Entries are unique within a file, so the fancy-indexed add doesn't lose updates
+                window[entries - low] += counts
+
+        occupied = np.flatnonzero(window)
+        yield occupied + low, window[occupied]
+        window[occupied] = 0
+
+def merge_histograms(filepaths: list[Path], output: OutputType, output_path: Path) -> dict:
+    """
+    Reduce the partial histograms in 'filepaths' with their sidecars into 'output_path', which gets the sidecar of the
+    merge. Merging the results of earlier merges is supported, so reductions can be staged
+    :return: the sidecar of the merge
+    """
+    metadata = merged_metadata([read_sidecar(filepath) for filepath in filepaths])
+    size = histogram_size(metadata)
+
+    with HistogramWriter(output_path, output, metadata["shard_samples"], metadata, size) as writer:
+        for entries, counts in merge_chunks(filepaths, size):
+            writer.write(entries, counts)
+
+    write_sidecar(output_path, metadata)
+    return metadata
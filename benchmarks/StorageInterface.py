@@ -5,8 +5,14 @@ import polars as pl
 import os 
 import sqlite3
 from collections import Counter
+import numpy as np
+import pyarrow as pa
 
 from definitions import OutputType
+from ColumnarWriter import HistogramWriter, write_histogram
+
+# Pending rows below which PolarsInterface keeps appending batches without merging them
+MIN_MERGE_ROWS = 1 << 16
 
 class StorageInterface(ABC):
     """
@@ -14,9 +20,17 @@ class StorageInterface(ABC):
     It should provide the following methods:
     - insert
     - batch_insert
+    - columns
     - post_process
     """
 
+    def insert_histogram(self, histogram: np.ndarray):
+        """
+        Add the dense histogram of a single batch, where 'histogram[i]' holds the count of entry 'i'
+        """
+        entries = np.flatnonzero(histogram)
+        self.batch_insert(Counter(dict(zip(entries.tolist(), histogram[entries].tolist()))))
+
     @abstractmethod
     def insert(self, entry: int):
         pass
@@ -26,9 +40,20 @@ class StorageInterface(ABC):
         pass
 
     @abstractmethod
-    def store(self, filepath: Path, output_type: OutputType):
+    def columns(self) -> tuple[np.ndarray | pa.Array | pa.ChunkedArray, np.ndarray | pa.Array | pa.ChunkedArray]:
+        """
+        The stored histogram as columns of the non-empty entries in ascending order and their counts
+        :return: (entries, counts)
+        """
         pass
 
+    def store(self, filepath: Path, output_type: OutputType, metadata: dict | None = None):
+        """
+        Write the histogram through the columnar writer, 'metadata' is embedded in the formats that support it
+        """
+        entries, counts = self.columns()
+        write_histogram(filepath, output_type, entries, counts, self.total_samples, metadata)
+
     @abstractmethod
     def remap_highest_freq_to_smallest_rank(self):
         pass
@@ -57,20 +82,35 @@ class SQLITEInterface(StorageInterface):
         """)
 
     def batch_insert(self, counter: Counter):
-        self.con.executemany("""
-        INSERT INTO sampling (entry, cnt) VALUES (?, ?) 
-        ON CONFLICT(entry) DO UPDATE SET cnt = cnt + excluded.cnt
-    """, counter.items())
+        self._merge(counter.items())
+
+    def insert_histogram(self, histogram: np.ndarray):
+        entries = np.flatnonzero(histogram)
+        self._merge(zip(entries.tolist(), histogram[entries].tolist()))
+
+    def _merge(self, rows):
+        """
+        Upsert the (entry, cnt) delta rows in a single transaction. Every row has to pass the sqlite3 bindings once, which
+        dominates, so they are upserted directly instead of being staged in a temporary table and merged from there
+        """
+        with self.con:
+            self.con.executemany("""
+                INSERT INTO sampling (entry, cnt) VALUES (?, ?)
+                ON CONFLICT(entry) DO UPDATE SET cnt = cnt + excluded.cnt
+            """, rows)
 
+    def columns(self):
+        rows = np.array(self.con.execute("SELECT entry, cnt FROM sampling ORDER BY entry").fetchall(), dtype=np.int64).reshape(-1, 2)
+        return rows[:, 0], rows[:, 1]
 
-    def store(self, filepath: Path, output: OutputType):
-        if output == OutputType.PARQUET:
-            raise NotImplementedError("Parquet output not supported for SQLite")
-        if output == OutputType.CSV:
-            with open(filepath, 'x') as f:
-                f.write("entry,cnt,rel_freq\n")
-                for row in self.con.execute("SELECT * FROM sampling"):
-                    f.write(f"{row[0]},{row[1]},{row[2]}\n")
+    def remap_highest_freq_to_smallest_rank(self):
+        # Renumbering in place could collide with the primary key, so the table is rebuilt
+        self.con.executescript("""
+            CREATE TABLE remapped (entry INTEGER PRIMARY KEY, cnt INTEGER DEFAULT 0, rel_freq DOUBLE);
+            INSERT INTO remapped (entry, cnt) SELECT row_number() OVER (ORDER BY cnt DESC, entry) - 1, cnt FROM sampling;
+            DROP TABLE sampling;
+            ALTER TABLE remapped RENAME TO sampling;
+        """)
 
 class DuckDBInterface(StorageInterface):
     """
@@ -83,8 +123,8 @@ class DuckDBInterface(StorageInterface):
         # Create a table without a generated column; recalculate rel_freq at the end
         self.con.execute("""
             CREATE TABLE sampling (
-                entry INTEGER PRIMARY KEY,
-                cnt INTEGER DEFAULT 0,
+                entry BIGINT PRIMARY KEY,
+                cnt BIGINT DEFAULT 0,
                 rel_freq DOUBLE
             )
         """)
@@ -95,20 +135,37 @@ class DuckDBInterface(StorageInterface):
         """)
 
     def batch_insert(self, entries: Counter):
-        self.con.executemany("""
-            INSERT INTO sampling (entry, cnt) VALUES (?, ?) 
-            ON CONFLICT DO UPDATE SET cnt = cnt + excluded.cnt
-        """, entries.items())
- 
-    def store(self, filepath : Path, output: OutputType):
-        if output == OutputType.PARQUET:
-            self.con.execute(f"""
-                COPY sampling TO '{filepath}' (FORMAT 'parquet')
-            """)
-        if output == OutputType.CSV:
-            self.con.execute(f"""
-                COPY sampling TO '{filepath}' (FORMAT 'csv')
+        self._merge(np.fromiter(entries.keys(), dtype=np.int64, count=len(entries)),
+                    np.fromiter(entries.values(), dtype=np.int64, count=len(entries)))
+
+    def insert_histogram(self, histogram: np.ndarray):
+        entries = np.flatnonzero(histogram)
+        self._merge(entries, histogram[entries].astype(np.int64, copy=False))
+
+    def _merge(self, entries: np.ndarray, counts: np.ndarray):
+        """Register the delta columns as a relation, scanned by DuckDB without a copy, and add them to 'sampling' in one statement"""
+        self.con.register("delta", pa.table({"entry": entries, "cnt": counts}))
+        try:
+            self.con.execute("""
+                INSERT INTO sampling (entry, cnt) SELECT entry, SUM(cnt) FROM delta GROUP BY entry
+                ON CONFLICT DO UPDATE SET cnt = cnt + excluded.cnt
             """)
+        finally:
+            self.con.unregister("delta")
+
+    def columns(self):
+        # DuckDB hands its result over as Arrow columns without a copy
+        table = self.con.execute("SELECT entry, cnt FROM sampling ORDER BY entry").to_arrow_table()
+        return table["entry"], table["cnt"]
+
+    def remap_highest_freq_to_smallest_rank(self):
+        # Renumbering in place could collide with the primary key, so the table is rebuilt
+        self.con.execute("""
+            CREATE TABLE remapped (entry BIGINT PRIMARY KEY, cnt BIGINT DEFAULT 0, rel_freq DOUBLE);
+            INSERT INTO remapped (entry, cnt) SELECT row_number() OVER (ORDER BY cnt DESC, entry) - 1, cnt FROM sampling;
+            DROP TABLE sampling;
+            ALTER TABLE remapped RENAME TO sampling;
+        """)
                     
 class CounterInterface(StorageInterface):
     """
@@ -127,68 +184,112 @@ class CounterInterface(StorageInterface):
         # Just copy the reference
         self.data = counter 
 
-    def store(self, filepath: Path, output: OutputType):
-        if output == OutputType.PARQUET:
-            raise NotImplementedError("Parquet output not supported for SortedDict")
-        if output == OutputType.CSV:
-            os.makedirs(filepath.parent, exist_ok=True)
-            with open(filepath, 'x') as f:
-                f.write("entry,cnt,rel_freq\n")
-                for entry, cnt in sorted(self.data.items()):
-                    f.write(f"{entry},{cnt},{cnt/self.total_samples}\n")
+    def insert_histogram(self, histogram: np.ndarray):
+        entries = np.flatnonzero(histogram)
+        self.data.update(dict(zip(entries.tolist(), histogram[entries].tolist())))
+
+    def columns(self):
+        entries = np.fromiter(self.data.keys(), dtype=np.int64, count=len(self.data))
+        counts = np.fromiter(self.data.values(), dtype=np.int64, count=len(self.data))
+        order = np.argsort(entries)
+        return entries[order], counts[order]
 
     def remap_highest_freq_to_smallest_rank(self):
-        sorted_values = sorted(self.data.items(), key=lambda x: (-x[1], x[0]))
-        mapping = {orig: new for new, (orig, _) in enumerate(sorted_values)}
-        self.data = Counter({mapping[orig]: count for orig, count in self.data.items()})
+        entries = np.fromiter(self.data.keys(), dtype=np.int64, count=len(self.data))
+        counts = np.fromiter(self.data.values(), dtype=np.int64, count=len(self.data))
+        # Descending count, ties by entry, the i-th of that order becomes rank i
+        order = np.lexsort((entries, -counts))
+        self.data = Counter(dict(enumerate(counts[order].tolist())))
                     
 class PolarsInterface(StorageInterface):
     """
-    Wrapper for using Polars as a in-memory DS
+    Wrapper for using Polars as a in-memory DS. Inserted batches are appended as frames and merged lazily, by a single
+    concat and group-by sum once the pending rows outgrow the merged histogram, so appends are amortized O(1) per row
     """
 
     def __init__(self, total_samples: int):
         self.total_samples = total_samples
-        self.data = pl.DataFrame({
-            "entry": [],
-            "cnt": []
-        }).with_columns([
-            pl.col("entry").cast(pl.Int64),
-            pl.col("cnt").cast(pl.Int64)
-        ])
+        self.data = pl.DataFrame(schema={"entry": pl.Int64, "cnt": pl.Int64})
+        self.pending = []
+        self.pending_rows = 0
     
     def insert(self, entry: int):
-        if entry in self.data["entry"]:
-            self.data = self.data.with_columns([
-                pl.when(pl.col("entry") == entry)
-                .then(pl.col("cnt") + 1)
-                .otherwise(pl.col("cnt"))
-                .alias("cnt")
-            ])
+        self._append(pl.DataFrame({"entry": [entry], "cnt": [1]}, schema=self.data.schema))
+
+    def batch_insert(self, counter: Counter):
+        self._append(pl.DataFrame({
+            "entry": np.fromiter(counter.keys(), dtype=np.int64, count=len(counter)),
+            "cnt": np.fromiter(counter.values(), dtype=np.int64, count=len(counter)),
+        }))
+
+    def insert_histogram(self, histogram: np.ndarray):
+        entries = np.flatnonzero(histogram)
+        self._append(pl.DataFrame({"entry": entries.astype(np.int64, copy=False), "cnt": histogram[entries].astype(np.int64, copy=False)}))
+
+    def _append(self, frame: pl.DataFrame):
+        self.pending.append(frame)
+        self.pending_rows += frame.height
+        if self.pending_rows > max(self.data.height, MIN_MERGE_ROWS):
+            self._merge()
+
+    def _merge(self):
+        """Fold the pending frames into 'data'"""
+        if self.pending:
+            self.data = (
+                pl.concat([self.data, *self.pending], rechunk=False)
+                .group_by("entry")
+                .agg(pl.col("cnt").sum())
+            )
+            self.pending = []
+            self.pending_rows = 0
+
+    def columns(self):
+        self._merge()
+        table = self.data.sort("entry").to_arrow()
+        return table["entry"], table["cnt"]
+
+    def remap_highest_freq_to_smallest_rank(self):
+        self._merge()
+        self.data = self.data.sort(["cnt", "entry"], descending=[True, False]).select(
+            pl.int_range(pl.len(), dtype=pl.Int64).alias("entry"),
+            pl.col("cnt"),
+        )
+
+class ArrayInterface(StorageInterface):
+    """
+    Wrapper for using a fixed-size NumPy array as a DS, optionally memory-mapped to a file on disk
+    """
+
+    def __init__(self, total_samples: int, size: int, memmap_path: Path | None = None):
+        self.total_samples = total_samples
+        if memmap_path is None:
+            self.data = np.zeros(size, dtype=np.uint64)
         else:
-            self.data = self.data.vstack(pl.DataFrame({
-                "entry": [entry],
-                "cnt": [1]
-            }))
+            os.makedirs(memmap_path.parent, exist_ok=True)
+            self.data = np.memmap(memmap_path, dtype=np.uint64, mode='w+', shape=(size,))
+
+    def insert(self, entry: int):
+        self.data[entry] += 1
 
     def batch_insert(self, counter: Counter):
-        for entry, cnt in counter.items():
-            if entry in self.data["entry"]:
-                self.data = self.data.with_columns([
-                    pl.when(pl.col("entry") == entry)
-                    .then(pl.col("cnt") + cnt)
-                    .otherwise(pl.col("cnt"))
-                    .alias("cnt")
-                ])
-            else:
-                self.data = self.data.vstack(pl.DataFrame({
-                    "entry": [entry],
-                    "cnt": [cnt]
-                    })
-                )
-
-    def store(self, filepath: Path, output: OutputType):
-        if output == OutputType.PARQUET:
-            self.data.write_parquet(filepath)
-        if type(output) == OutputType.CSV:
-            self.data.write_csv(filepath)
\ No newline at end of file
+        entries = np.fromiter(counter.keys(), dtype=np.int64, count=len(counter))
+        counts = np.fromiter(counter.values(), dtype=np.uint64, count=len(counter))
+        np.add.at(self.data, entries, counts)
+
+    def insert_histogram(self, histogram: np.ndarray):
+        self.data += histogram.astype(np.uint64)
+
+    def columns(self):
+        entries = np.flatnonzero(self.data)
+        return entries, self.data[entries]
+
+    def store(self, filepath: Path, output: OutputType, metadata: dict | None = None):
+        if output == OutputType.NPY:
+            # The dense counts, refusing to overwrite an existing result like the other outputs
+            with HistogramWriter(filepath, output, self.total_samples, metadata, size=len(self.data)) as writer:
+                writer.write(*self.columns())
+            return
+        super().store(filepath, output, metadata)
+
+    def remap_highest_freq_to_smallest_rank(self):
+        self.data[:] = np.sort(self.data)[::-1]
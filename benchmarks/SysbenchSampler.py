@@ -3,6 +3,7 @@ from Sampler import Sampler
 
 import ctypes
 from ctypes import c_void_p, c_long, c_double
+import numpy as np
 
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -13,12 +14,15 @@ from definitions import ROOT_DIR
 zipf_lib = ctypes.CDLL(ROOT_DIR + '/shared/sysbench_wrapper.so')
 
 # Define function signatures
-zipf_lib.zipf_create.argtypes = [c_long, c_double]
+zipf_lib.zipf_create.argtypes = [c_long, c_double, ctypes.c_uint]
 zipf_lib.zipf_create.restype = c_void_p
 
 zipf_lib.zipf_sample.argtypes = []
 zipf_lib.zipf_sample.restype = c_long
 
+zipf_lib.zipf_sample_into.argtypes = [np.ctypeslib.ndpointer(dtype=np.int64, flags="C_CONTIGUOUS"), c_long]
+zipf_lib.zipf_sample_into.restype = None
+
 zipf_lib.zipf_benchmark.argtypes = [c_long]
 zipf_lib.zipf_benchmark.restype = c_long
 
@@ -27,13 +31,19 @@ class SysbenchSampler(Sampler):
     """
     Wrapper for the RJI sampler from Gabriel
     """
-    def __init__(self, n, samples, skew):
-        super().__init__(n, samples, skew)
-        zipf_lib.zipf_create(self.n, self.skew)
+    def __init__(self, n, samples, skew, seed=None):
+        super().__init__(n, samples, skew, seed)
+        # Unseeded random() behaves as if seeded with 1
+        zipf_lib.zipf_create(self.n, self.skew, 1 if seed is None else seed)
 
     def sample(self) -> int:
         return zipf_lib.zipf_sample()
 
+    def sample_batch(self, k: int) -> np.ndarray:
+        out = np.empty(k, dtype=np.int64)
+        zipf_lib.zipf_sample_into(out, k)
+        return out
+
     def benchmark(self) -> int:
         return zipf_lib.zipf_benchmark(self.samples)
 
@@ -1,12 +1,13 @@
 import jpype
 import jpype.imports
-from jpype.types import *
+from jpype.types import JArray, JLong
 
 from sortedcontainers import SortedDict
 
 from Sampler import Sampler
 from matplotlib import pyplot as plt
 import pandas as pd
+import numpy as np
 
 from definitions import ROOT_DIR
 
@@ -15,8 +16,9 @@ class YCSBSampler(Sampler):
     "Yahoo! Cloud Serving Benchmark" sampler wrapper
     """
     
-    def __init__(self, n : int, samples: int, skew : float):
-        super().__init__(n, samples, skew)
+    def __init__(self, n : int, samples: int, skew : float, seed : int | None = None):
+        # The runner seeds its generator internally, so 'seed' is only recorded
+        super().__init__(n, samples, skew, seed)
 
         if not jpype.isJVMStarted():
             raise RuntimeError("JVM not started. Call jpype.startJVM() before creating a YCSBSampler object")
@@ -24,9 +26,19 @@ class YCSBSampler(Sampler):
         YCSBRunner = jpype.JClass("com.zipfianRunner.ZipfianRunner")
 
         self.zipf = YCSBRunner(0, self.n, self.skew) 
+        # Jars not yet rebuilt with 'sampleInto(long[])' ('make' in jar/) only support single samples
+        self.bulk = hasattr(self.zipf, "sampleInto")
     
     def sample(self) -> int:       
         return self.zipf.sample()
+
+    def sample_batch(self, k: int) -> np.ndarray:
+        if not self.bulk:
+            return super().sample_batch(k)
+        # The Java array is filled in a single JNI call and viewed through its buffer without copying
+        buffer = JArray(JLong)(k)
+        self.zipf.sampleInto(buffer)
+        return np.asarray(memoryview(buffer))
     
     def benchmark(self):
         return self.zipf.benchmark(self.samples)
@@ -4,10 +4,14 @@ import click
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 BATCH_SIZE = 100000000
+SAMPLE_CHUNK_SIZE = 1 << 22
 
 class OutputType(Enum):
     PARQUET = "parquet"
     CSV = "csv"
+    NPY = "npy"
+    ARROW = "arrow"
+    FEATHER = "feather"
 
 class PostProcessing(Enum):
     NONE = "none" 
@@ -18,6 +22,21 @@ class StorageType(Enum):
     DUCKDB = "duckdb"
     COUNTER = "counter"
     SQLITE = "sqlite"
+    ARRAY = "array"
+
+class ScrambleType(Enum):
+    NONE = "none"
+    HASH = "hash"
+    FEISTEL = "feistel"
+
+class EmitType(Enum):
+    HISTOGRAM = "histogram"
+    RAW = "raw"
+
+class RawFormat(Enum):
+    U32 = "u32"
+    U64 = "u64"
+    VARINT_DELTA = "varint_delta"
 
 class EnumChoice(click.Choice):
     def __init__(self, enum_cls):
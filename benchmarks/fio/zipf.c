@@ -74,6 +74,14 @@ uint64_t zipf_next(struct zipf_state *zs)
 	return (val + zs->rand_off) % n;
 }
 
+void zipf_sample_into(struct zipf_state *zs, int64_t *out, long count)
+{
+	long i;
+
+	for (i = 0; i < count; i++)
+		out[i] = zipf_next(zs);
+}
+
 void pareto_init(struct zipf_state *zs, uint64_t nranges, double h,
 		 double center, unsigned int seed)
 {
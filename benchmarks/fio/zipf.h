@@ -19,6 +19,7 @@ struct zipf_state {
 void zipf_init(struct zipf_state *zs, uint64_t nranges, double theta,
 	       double center, unsigned int seed);
 uint64_t zipf_next(struct zipf_state *zs);
+void zipf_sample_into(struct zipf_state *zs, int64_t *out, long count);
 
 void pareto_init(struct zipf_state *zs, uint64_t nranges, double h,
 		 double center, unsigned int seed);
@@ -0,0 +1,44 @@
+package zipf.zipfianRunner;
+
+import org.apache.commons.rng.sampling.distribution.RejectionInversionZipfSampler;
+import org.apache.commons.rng.simple.RandomSource;
+
+/**
+ * Runner around Apache Commons RNG's rejection-inversion Zipf sampler, driven from Python through JPype
+ */
+public class ZipfianRunner {
+    public long first;
+    public long last;
+    public double skew;
+    public RejectionInversionZipfSampler generator;
+
+    public ZipfianRunner(long first, long last, double skew) {
+        generator = new RejectionInversionZipfSampler(RandomSource.create(RandomSource.MT), (int) (last - first), skew);
+    }
+
+    public long sample() {
+        return generator.sample();
+    }
+
+    /**
+     * Fill 'out' with samples, so a batch costs a single JNI call instead of one per sample
+     */
+    public void sampleInto(long[] out) {
+        for (int i = 0; i < out.length; i++) {
+            out[i] = generator.sample();
+        }
+    }
+
+    public long benchmark(long samples) {
+        long start = System.currentTimeMillis();
+        long sample = 0;
+        long temp = 0;
+        for (int i = 0; i < samples; i++) {
+            sample = sample();
+            temp = sample;
+        }
+        temp += 1;
+        long end = System.currentTimeMillis();
+        return end - start;
+    }
+}
@@ -0,0 +1,46 @@
+package com.zipfianRunner;
+
+import site.ycsb.generator.ZipfianGenerator;
+
+/**
+ * Runner around YCSB's Zipfian generator, driven from Python through JPype
+ */
+public class ZipfianRunner {
+    public long first;
+    public long last;
+    public double skew;
+    public ZipfianGenerator generator;
+
+    public ZipfianRunner(long first, long last, double skew) {
+        this.first = first;
+        this.last = last;
+        this.skew = skew;
+        generator = new ZipfianGenerator(first, last, skew);
+    }
+
+    public long sample() {
+        return generator.nextValue().longValue();
+    }
+
+    /**
+     * Fill 'out' with samples, so a batch costs a single JNI call instead of one per sample
+     */
+    public void sampleInto(long[] out) {
+        for (int i = 0; i < out.length; i++) {
+            out[i] = generator.nextValue().longValue();
+        }
+    }
+
+    public long benchmark(long samples) {
+        long start = System.currentTimeMillis();
+        long sample = 0;
+        long temp = 0;
+        for (int i = 0; i < samples; i++) {
+            sample = sample();
+            temp = sample;
+        }
+        temp += 1;
+        long end = System.currentTimeMillis();
+        return end - start;
+    }
+}
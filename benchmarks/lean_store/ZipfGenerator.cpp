@@ -43,6 +43,11 @@ uint64_t ZipfGenerator::rand()
    return ret;
 }
 // -------------------------------------------------------------------------------------
+void ZipfGenerator::seed(u64 seed)
+{
+   mt_generator = MersenneTwister(seed);
+}
+// -------------------------------------------------------------------------------------
 }  // namespace utils
 }  // namespace leanstore
    // -------------------------------------------------------------------------------------
@@ -29,6 +29,8 @@ class ZipfGenerator
    ZipfGenerator(uint64_t ex_n, double theta);
    // uint64_t rand(u64 new_n);
    uint64_t rand();
+   // Reseeds the thread-local generator used by rand()
+   void seed(u64 seed);
 };
 // -------------------------------------------------------------------------------------
 }  // namespace utils
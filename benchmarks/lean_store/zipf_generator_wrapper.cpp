@@ -10,12 +10,14 @@ using std::chrono::milliseconds;
 struct ZipfWrapper {
     leanstore::utils::ZipfGenerator generator;
 
-    ZipfWrapper(long numberOfElements, double exponent)
-        : generator(numberOfElements, exponent) {}
+    ZipfWrapper(long numberOfElements, double exponent, unsigned long seed)
+        : generator(numberOfElements, exponent) {
+        generator.seed(seed);
+    }
 };
 
 void* zipf_create(long numberOfElements, double exponent, unsigned long seed) {
-    return new ZipfWrapper(numberOfElements, exponent);
+    return new ZipfWrapper(numberOfElements, exponent, seed);
 };
 
 void zipf_destroy(void* wrapper) {
@@ -27,6 +29,13 @@ long zipf_sample(void* wrapper) {
     return zipf->generator.rand();
 };
 
+void zipf_sample_into(void* wrapper, int64_t* out, long count) {
+    auto* zipf = static_cast<ZipfWrapper*>(wrapper);
+    for (long i = 0; i < count; i++) {
+        out[i] = zipf->generator.rand();
+    }
+};
+
 long zipf_benchmark(void* wrapper, long samples) {
     auto* zipf = static_cast<ZipfWrapper*>(wrapper);
     
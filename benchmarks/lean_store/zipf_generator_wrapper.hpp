@@ -2,6 +2,7 @@
 #define ZIPF_GENERATOR_WRAPPER_H
 
 #include <cstring> // For memset
+#include <cstdint>
 
 extern "C" {
     void* zipf_create(long numberOfElements, double exponent, unsigned long seed);
@@ -10,6 +11,8 @@ extern "C" {
 
     long zipf_sample(void* sampler);
 
+    void zipf_sample_into(void* sampler, int64_t* out, long count);
+
     long zipf_benchmark(void* sampler, long samples); 
 }
 
@@ -17,6 +17,13 @@ long zipf_sample(pg_prng_state* state, uint64_t n, double s)
     return computeInterativeZipfian(state, n, s);
 }
 
+void zipf_sample_into(pg_prng_state* state, uint64_t n, double s, int64_t* out, long count)
+{
+    for (long i = 0; i < count; i++) {
+        out[i] = computeInterativeZipfian(state, n, s);
+    }
+}
+
 void zipf_destroy(pg_prng_state* state)
 {
     if (state == NULL)
@@ -8,6 +8,7 @@
 
 void* zipf_create(uint64_t seed);
 long zipf_sample(pg_prng_state* state, uint64_t n, double s);
+void zipf_sample_into(pg_prng_state* state, uint64_t n, double s, int64_t* out, long count);
 void zipf_destroy(pg_prng_state* state);
 long zipf_benchmark(pg_prng_state* state, uint64_t n, uint64_t samples, double s);
 
@@ -5,7 +5,7 @@ library(jsonlite)
 library(ggplot2)
 library(patchwork)
 
-# Get command line arguments (JSON file paths)
+# Get command line arguments (JSON file paths produced by `macrobenchmark`)
 args <- commandArgs(trailingOnly = TRUE)
 if (length(args) == 0) {
   stop("Please provide at least one JSON file path as a positional argument.")
@@ -15,16 +15,13 @@ data_list <- list()
 
 for (file in args) {
   json_data <- fromJSON(file)
-  samples <- json_data$metadata$samples
-  
-  df <- data.frame(
-    sampler = names(json_data$results),
-    milliseconds = as.numeric(unlist(json_data$results)),
-    stringsAsFactors = FALSE
-  )
-  
-  df$samples <- samples
-  
+
+  # One row per (sampler, n, skew, samples) grid point, the raw repetition timings are not needed here
+  df <- as.data.frame(json_data$records)
+  df$times_ns <- NULL
+  df$confidence <- json_data$metadata$confidence
+  df$repetitions <- json_data$metadata$repetitions
+
   data_list[[file]] <- df
 }
 
@@ -32,20 +29,24 @@ plot_list <- list()
 
 for (file in args) {
   df <- data_list[[file]]
-  
-  p <- ggplot(df, aes(x = 1, y = milliseconds, color = sampler)) +
-    geom_point(size = 3) +
+  df$grid <- paste0("n = ", format(df$n, big.mark = ","), ", s = ", df$skew)
+
+  p <- ggplot(df, aes(x = samples, y = median_vps, color = sampler)) +
+    geom_point(size = 3, position = position_dodge(width = 0.3)) +
+    geom_errorbar(aes(ymin = ci_low_vps, ymax = ci_high_vps), width = 0.2, position = position_dodge(width = 0.3)) +
+    scale_x_log10(labels = scales::label_comma()) +
+    scale_y_continuous(labels = scales::label_comma()) +
+    facet_wrap(~ grid) +
     labs(
-      y = "Milliseconds",
+      x = "Samples",
+      y = "Variates per second (median)",
       color = "Sampler",
-      caption = paste("Samples:", format(df$samples[1], big.mark = ","))
+      caption = paste0(
+        "Error bars: ", df$confidence[1] * 100, "% bootstrap CI of the median over ",
+        df$repetitions[1], " repetitions"
+      )
     ) +
-    theme_minimal() +
-    theme(
-      axis.title.x = element_blank(),
-      axis.text.x  = element_blank(),
-      axis.ticks.x = element_blank()
-    )
+    theme_minimal()
   plot_list[[file]] <- p
 }
 
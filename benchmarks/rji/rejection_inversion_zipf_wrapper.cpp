@@ -28,6 +28,14 @@ long zipf_sample(void* wrapper) {
     return zipf->sampler.sample(zipf->rng);
 }
 
+// Fill a caller-owned buffer with 'count' samples
+void zipf_sample_into(void* wrapper, int64_t* out, long count) {
+    auto* zipf = static_cast<ZipfWrapper*>(wrapper);
+    for (long i = 0; i < count; i++) {
+        out[i] = zipf->sampler.sample(zipf->rng);
+    }
+}
+
 long zipf_benchmark(void* wrapper, long samples) {
     auto* zipf = static_cast<ZipfWrapper*>(wrapper);
     
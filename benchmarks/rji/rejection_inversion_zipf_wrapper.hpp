@@ -1,6 +1,7 @@
 #ifndef REJECTION_INVERSION_ZIPF_WRAPPER_HPP
 #define REJECTION_INVERSION_ZIPF_WRAPPER_HPP
 
+#include <cstdint>
 #include "RejectionInversionZipf.hpp"
 
 extern "C" {
@@ -14,6 +15,9 @@ void zipf_destroy(void* sampler);
 // Sample a number using the Zipf sampler
 long zipf_sample(void* sampler);
 
+// Fill a caller-owned buffer with 'count' samples
+void zipf_sample_into(void* sampler, int64_t* out, long count);
+
 long zipf_benchmark(void* sampler, long samples);
 
 }
@@ -11,13 +11,15 @@ setup(
         "JPype1",
         "sortedcontainers",
         "numpy",
-        "scipy"
+        "scipy",
+        "pyarrow"
     ],
     entry_points={
         'console_scripts': [
             'sample_zipf = CLI:sample_zipf',
             'macrobenchmark = CLI:macrobenchmark',
             'accuracy_zipf = CLI:accuracy_zipf',
+            'merge_histograms = CLI:merge_histograms',
         ],
     },
 )
@@ -7,7 +7,7 @@ extern long n_sys;
 static void BM_ZipfThroughput(benchmark::State& state) {
     static bool initialized = false;
     if (!initialized) {
-        zipf_create(10000000, 1.0); 
+        zipf_create(10000000, 1.0, 1); 
         initialized = true;
     }
     
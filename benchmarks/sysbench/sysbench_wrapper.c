@@ -4,10 +4,11 @@
 
 long n_sys;
 
-void zipf_create(long numberOfElements, double exponent)
+void zipf_create(long numberOfElements, double exponent, unsigned int seed)
 {
     zipf_exp = exponent;
     n_sys = numberOfElements;
+    srandom(seed);
     sb_rand_init();
 }
 
@@ -16,6 +17,13 @@ long zipf_sample()
     return sb_rand_zipfian_int(n_sys, zipf_exp, zipf_s, zipf_hIntegralX1);
 }
 
+void zipf_sample_into(int64_t* out, long count)
+{
+    for (long i = 0; i < count; i++) {
+        out[i] = sb_rand_zipfian_int(n_sys, zipf_exp, zipf_s, zipf_hIntegralX1);
+    }
+}
+
 long zipf_benchmark(long samples)
 { 
     clock_t t1 = clock();
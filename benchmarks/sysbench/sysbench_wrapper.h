@@ -3,8 +3,9 @@
 
 #include "stdint.h"
 
-void zipf_create(long numberOfElements, double exponent);
+void zipf_create(long numberOfElements, double exponent, unsigned int seed);
 long zipf_sample();
+void zipf_sample_into(int64_t* out, long count);
 long zipf_benchmark(long samples); 
 
 #endif // SYSBENCH_WRAPPER_H
\ No newline at end of file
@@ -1,42 +1,80 @@
 use pyo3::prelude::*;
 use rand::prelude::*; // Import RNG traits
+use rand::rngs::SmallRng;
 use rand::distributions::Distribution; // Required for `sample`
+use numpy::{IntoPyArray, PyArray1, PyReadwriteArray1};
 use zipf::ZipfDistribution;
 
 /// A struct that wraps ZipfDistribution for Python
 #[pyclass]
 struct PyZipf {
     inner: ZipfDistribution,
+    rng: SmallRng,
 }
 
 #[pymethods]
 impl PyZipf {
     #[new]
-    fn new(size: usize, exponent: f64) -> PyResult<Self> {
+    #[pyo3(signature = (size, exponent, seed=None))]
+    fn new(size: usize, exponent: f64, seed: Option<u64>) -> PyResult<Self> {
+        // Seeded runs are reproducible, otherwise the RNG is seeded from the OS
+        let rng = match seed {
+            Some(seed) => SmallRng::seed_from_u64(seed),
+            None => SmallRng::from_entropy(),
+        };
+
         // Handle any errors when creating the Zipf distribution
         match ZipfDistribution::new(size, exponent) {
-            Ok(dist) => Ok(Self { inner: dist }),
+            Ok(dist) => Ok(Self { inner: dist, rng }),
             Err(_) => Err(pyo3::exceptions::PyValueError::new_err(
                 "Failed to create ZipfDistribution. Ensure size > 0 and exponent > 1.",
             )),
         }
     }
 
-    fn sample(&self) -> usize {
-        let mut rng = rand::thread_rng();
-        self.inner.sample(&mut rng)
+    fn sample(&mut self) -> usize {
+        self.inner.sample(&mut self.rng)
     }
 
-    fn benchmark(&self, samples: usize) -> usize {
-        let mut rng = rand::thread_rng();
-        let start = std::time::Instant::now();
-        
-        for _ in 0..samples {
-            self.inner.sample(&mut rng);
-        }
-        
-        let duration = start.elapsed();
-        duration.as_millis() as usize
+    /// Fills a one-dimensional int64 NumPy array in place, without holding the GIL
+    fn sample_into(&mut self, py: Python<'_>, mut out: PyReadwriteArray1<'_, i64>) -> PyResult<()> {
+        let out = out.as_slice_mut()?;
+        let inner = &self.inner;
+        let rng = &mut self.rng;
+
+        py.allow_threads(|| {
+            for slot in out.iter_mut() {
+                *slot = inner.sample(rng) as i64;
+            }
+        });
+        Ok(())
+    }
+
+    /// Returns a new int64 NumPy array with `k` samples, generated without holding the GIL
+    fn sample_batch<'py>(&mut self, py: Python<'py>, k: usize) -> Bound<'py, PyArray1<i64>> {
+        let inner = &self.inner;
+        let rng = &mut self.rng;
+
+        let samples: Vec<i64> = py.allow_threads(|| {
+            (0..k).map(|_| inner.sample(rng) as i64).collect()
+        });
+        samples.into_pyarray(py)
+    }
+
+    fn benchmark(&mut self, py: Python<'_>, samples: usize) -> usize {
+        let inner = &self.inner;
+        let rng = &mut self.rng;
+
+        py.allow_threads(|| {
+            let start = std::time::Instant::now();
+
+            for _ in 0..samples {
+                std::hint::black_box(inner.sample(rng));
+            }
+
+            let duration = start.elapsed();
+            duration.as_millis() as usize
+        })
     }
 }
 
@@ -0,0 +1,192 @@
+#ifndef ALIAS_SAMPLER_HPP
+#define ALIAS_SAMPLER_HPP
+
+#include <random>
+#include <vector>
+#include <cmath>
+#include <algorithm>
+#include <cstdint>
+#include <limits>
+#include <stdexcept>
+#include <thread>
+
+#include "engines.hpp"
+
+/**
+ * Walker's alias table with Vose's construction (Vose, "A linear algorithm for generating random numbers with a given
+ * distribution", IEEE TSE 1991). Every index owns one packed 8 byte entry of (alias, threshold), so picking an index costs
+ * one 64-bit draw, one table load and one select: the high half of draw * size selects the entry, the next 32 bits are the
+ * coin compared against the threshold. Acceptance probabilities thus have 2^32 steps per entry.
+ *
+ * Normalization and quantization run on parallel threads. The pairing of light and heavy entries is a sequential sweep
+ * with two scanning positions instead of work lists, consuming the heavy entries in index order.
+ */
+class alias_table {
+public:
+    /* Packed table entry, 'threshold' is the probability of keeping the entry's own index scaled to 2^32 */
+    struct entry {
+        uint32_t alias;
+        uint32_t threshold;
+    };
+    static_assert(sizeof(entry) == 8);
+
+    static constexpr long MAX_SIZE = 1L << 32;
+
+    alias_table() = default;
+
+    /* Build the table for the unnormalized 'weight', 'total' being its sum */
+    alias_table(std::vector<double> weight, double total) : entries(weight.size()) {
+        const long size = static_cast<long>(weight.size());
+        if (size < 1 || size > MAX_SIZE) {
+            throw std::invalid_argument("alias_table supports 1 to 2^32 entries");
+        }
+
+        // Scale to a mean of 1, entries with weight >= 1 are heavy
+        const double scale = size / total;
+        parallel_for(size, [&](long, long begin, long end) {
+            for (long i = begin; i < end; i++) {
+                weight[i] *= scale;
+                entries[i] = {static_cast<uint32_t>(i), quantize(weight[i])};
+            }
+        });
+
+        // Vose's pairing: each light entry is topped up by the current heavy one, whose remainder turns it light in turn.
+        // Without a heavy entry, which only rounding can cause, entry 0 serves as the first donor
+        auto next_heavy = [&](long j) {
+            while (j < size && weight[j] < 1.0) {
+                j++;
+            }
+            return j;
+        };
+        const long first_donor = next_heavy(0) < size ? next_heavy(0) : 0;
+        long donor = first_donor;
+        double remainder = weight[donor];
+        for (long light = 0; light < size; light++) {
+            if (light == first_donor || weight[light] >= 1.0) {
+                continue;
+            }
+            entries[light].alias = static_cast<uint32_t>(donor);
+            remainder -= 1.0 - weight[light];
+            while (remainder < 1.0) {
+                const long next = next_heavy(donor + 1);
+                if (next == size) {
+                    break;
+                }
+                entries[donor] = {static_cast<uint32_t>(next), quantize(remainder)};
+                remainder = weight[next] - (1.0 - remainder);
+                donor = next;
+            }
+        }
+
+        // The last donor and the untouched heavy entries keep their index, up to rounding
+        for (long i = donor; i < size; i = next_heavy(i + 1)) {
+            entries[i] = {static_cast<uint32_t>(i), FULL};
+        }
+    }
+
+    /* Index for a uniform 64-bit draw */
+    uint64_t pick(uint64_t draw) const {
+        const unsigned __int128 scaled = static_cast<unsigned __int128>(draw) * entries.size();
+        const uint64_t index = static_cast<uint64_t>(scaled >> 64);
+        const uint32_t coin = static_cast<uint32_t>(static_cast<uint64_t>(scaled) >> 32);
+        const entry e = entries[index];
+        return coin < e.threshold ? index : e.alias;
+    }
+
+    size_t size() const {
+        return entries.size();
+    }
+
+    /* Size of the table in bytes */
+    size_t bytes() const {
+        return entries.size() * sizeof(entry);
+    }
+
+    /* Run f(chunk, begin, end) on the chunk_count(size) disjoint chunks of [0, size) on parallel threads */
+    template <typename F>
+    static void parallel_for(long size, F&& f) {
+        const long chunks = chunk_count(size);
+        std::vector<std::thread> threads;
+        for (long c = 1; c < chunks; c++) {
+            threads.emplace_back(f, c, size * c / chunks, size * (c + 1) / chunks);
+        }
+        f(0, 0, size / chunks);
+        for (auto& thread : threads) {
+            thread.join();
+        }
+    }
+
+    /* Number of chunks parallel_for splits 'size' into, one per hardware thread unless the chunks get too small */
+    static long chunk_count(long size) {
+        return std::clamp(size / MIN_CHUNK, 1L, static_cast<long>(std::max(1u, std::thread::hardware_concurrency())));
+    }
+
+private:
+    // Below this many entries per thread, spawning threads costs more than it saves
+    static constexpr long MIN_CHUNK = 1L << 16;
+    static constexpr double SCALE = 4294967296.0;
+    // Threshold of entries that always keep their index, their alias points to themselves
+    static constexpr uint32_t FULL = std::numeric_limits<uint32_t>::max();
+
+    std::vector<entry> entries;
+
+    static uint32_t quantize(double p) {
+        return p >= 1.0 ? FULL : static_cast<uint32_t>(p * SCALE);
+    }
+};
+
+/**
+ * Zipf sampler over an alias_table of all ranks. A variate is one 64-bit draw and one table probe, the table takes 8 bytes
+ * per rank and supports ranges up to 2^32. The weights k^-skew are computed on parallel threads.
+ */
+template <typename Engine = std::mt19937_64>
+class basic_alias_sampler {
+public:
+    static_assert(Engine::min() == 0 && Engine::max() == std::numeric_limits<uint64_t>::max(), "alias_sampler needs 64-bit draws");
+
+    basic_alias_sampler(long range, double skew, long seed) : rng(seed) {
+        if (range < 1 || range > alias_table::MAX_SIZE) {
+            throw std::invalid_argument("alias_sampler supports ranges in [1, 2^32]");
+        }
+
+        // Unnormalized weights k^-skew and their per-chunk sums
+        std::vector<double> weight(range);
+        std::vector<double> partial(alias_table::chunk_count(range));
+        alias_table::parallel_for(range, [&](long chunk, long begin, long end) {
+            double sum = 0.0;
+            for (long i = begin; i < end; i++) {
+                weight[i] = std::exp(-skew * std::log(static_cast<double>(i + 1)));
+                sum += weight[i];
+            }
+            partial[chunk] = sum;
+        });
+
+        double total = 0.0;
+        for (double sum : partial) {
+            total += sum;
+        }
+        table = alias_table(std::move(weight), total);
+    }
+
+    long sample() {
+        return static_cast<long>(table.pick(rng())) + 1;
+    }
+
+    /* Size of the alias table in bytes */
+    size_t table_bytes() const {
+        return table.bytes();
+    }
+
+    /* The random bit engine, e.g. to skip ahead or to read the draws of a counting_engine */
+    Engine& engine() {
+        return rng;
+    }
+
+private:
+    alias_table table;
+    Engine rng;
+};
+
+using alias_sampler = basic_alias_sampler<>;
+
+#endif
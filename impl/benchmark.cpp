@@ -1,25 +1,223 @@
 #include <benchmark/benchmark.h>
+#include <cstdlib>
+#include <cstdint>
+#include <vector>
+
+#include "rejection_sampler.hpp"
+#include "rji_sampler.hpp"
 #include "marsaglia_sampler.hpp"
+#include "alias_sampler.hpp"
+#include "hybrid_sampler.hpp"
+#include "guide_table_sampler.hpp"
+
+// Vendored generators, built from their sources in ../benchmarks (see the Makefile)
+extern "C" {
+#include "fio/zipf.h"
+#include "sysbench/sb_rand.h"
+}
+#include "pg_bench/zipf.h"
+#include "rocksdb/zipf.hpp"
+#include "lean_store/ZipfGenerator.hpp"
+
+/**
+ * Google Benchmark suite over every native sampler. For each sampler two families are registered on an n x skew grid:
+ *  - BM_Setup<S>:      construction cost (tables, harmonic numbers), one construction per iteration
+ *  - BM_Throughput<S>: per-variate cost of sample() on an already constructed sampler
+ * Samplers with a SIMD batch kernel additionally register BM_BatchThroughput<S>, table-based ones report their
+ * memory as the 'table_bytes' counter of BM_Setup.
+ * The skew is passed in hundredths, as benchmark arguments are integers. Every run also reports 'n' and 'skew' as
+ * counters, so the JSON output (make bench) can be read back by the Python tooling without parsing benchmark names.
+ */
+
+constexpr long SEED = 42;
+
+/* Adapters giving every generator the same (n, skew) constructor and sample() */
+
+struct rejection {
+    rejection_sampler sampler;
+    rejection(long n, double skew) : sampler(n, skew, SEED) {}
+    long sample() { return sampler.sample(); }
+};
+
+struct rji {
+    rji_sampler sampler;
+    rji(long n, double skew) : sampler(n, skew, SEED) {}
+    long sample() { return sampler.sample(); }
+    void sample_batch(int64_t* out, long count) { sampler.sample_batch(out, count); }
+};
+
+struct marsaglia {
+    marsaglia_sampler sampler;
+    marsaglia(long n, double skew) : sampler(n, skew, SEED) {}
+    long sample() { return sampler.sample(); }
+    size_t table_bytes() const { return sampler.table_bytes(); }
+};
+
+struct alias {
+    alias_sampler sampler;
+    alias(long n, double skew) : sampler(n, skew, SEED) {}
+    long sample() { return sampler.sample(); }
+    size_t table_bytes() const { return sampler.table_bytes(); }
+};
 
-static void BM_ZipfThroughput(benchmark::State& state) {
-    static bool initialized = false;
-    unsigned long n = 10000000;
-    double zipf_exp = 0.8;
-    static marsaglia_sampler sampler = marsaglia_sampler(n, zipf_exp, 0);
+struct hybrid {
+    hybrid_sampler sampler;
+    hybrid(long n, double skew) : sampler(n, skew, SEED) {}
+    long sample() { return sampler.sample(); }
+    size_t table_bytes() const { return sampler.table_bytes(); }
+};
 
-    if (!initialized) {
-        initialized = true;
+template <typename Impl>
+struct guide_table_adapter {
+    Impl sampler;
+    guide_table_adapter(long n, double skew) : sampler(n, skew, SEED) {}
+    long sample() { return sampler.sample(); }
+    void sample_batch(int64_t* out, long count) { sampler.sample_batch(out, count); }
+    size_t table_bytes() const { return sampler.table_bytes(); }
+};
+using guide = guide_table_adapter<guide_table_sampler>;
+using guide_f32 = guide_table_adapter<guide_table_sampler_f32>;
+
+struct fio {
+    zipf_state state;
+    fio(long n, double skew) { zipf_init(&state, n, skew, -1, SEED); }
+    long sample() { return zipf_next(&state); }
+};
+
+struct lean_store {
+    leanstore::utils::ZipfGenerator generator;
+    lean_store(long n, double skew) : generator(n, skew) { generator.seed(SEED); }
+    long sample() { return generator.rand(); }
+};
+
+/* sysbench keeps its state in globals, so only one instance is alive at a time */
+struct sysbench {
+    uint32_t n;
+    sysbench(long n, double skew) : n(n) {
+        zipf_exp = skew;
+        srandom(SEED);
+        sb_rand_init();
+    }
+    long sample() { return sb_rand_zipfian_int(n, zipf_exp, zipf_s, zipf_hIntegralX1); }
+};
+
+struct pg_bench {
+    pg_prng_state state;
+    long n;
+    double skew;
+    pg_bench(long n, double skew) : n(n), skew(skew) { pg_prng_seed(&state, SEED); }
+    long sample() { return computeInterativeZipfian(&state, n, skew); }
+};
+
+/* RocksDB's hot key generator keeps its CDF table in globals as well */
+struct rocksdb {
+    Random64 prng;
+    long n;
+    rocksdb(long n, double skew) : prng(SEED), n(n) { InitializeHotKeyGenerator(skew); }
+    long sample() {
+        double u = static_cast<double>(prng.Next() % n) / n;
+        return GetOneHotKeyID(u, n);
     }
-    
+};
+
+static void set_grid_counters(benchmark::State& state, long n, double skew) {
+    state.counters["n"] = n;
+    state.counters["skew"] = skew;
+}
+
+template <typename Sampler>
+static void BM_Setup(benchmark::State& state) {
+    const long n = state.range(0);
+    const double skew = state.range(1) / 100.0;
+
+    for (auto _ : state) {
+        Sampler sampler(n, skew);
+        benchmark::DoNotOptimize(&sampler);
+        benchmark::ClobberMemory();
+    }
+
+    set_grid_counters(state, n, skew);
+    if constexpr (requires(const Sampler& sampler) { sampler.table_bytes(); }) {
+        state.counters["table_bytes"] = Sampler(n, skew).table_bytes();
+    }
+}
+
+template <typename Sampler>
+static void BM_Throughput(benchmark::State& state) {
+    const long n = state.range(0);
+    const double skew = state.range(1) / 100.0;
+    Sampler sampler(n, skew);
+
     for (auto _ : state) {
         long sample = sampler.sample();
         benchmark::DoNotOptimize(sample);
     }
-    
+
     state.SetItemsProcessed(state.iterations());
+    set_grid_counters(state, n, skew);
 }
 
-BENCHMARK(BM_ZipfThroughput)
-    ->MeasureProcessCPUTime(); 
+/* Throughput of samplers with a native sample_batch kernel, in blocks of 'BATCH' variates */
+template <typename Sampler>
+static void BM_BatchThroughput(benchmark::State& state) {
+    constexpr long BATCH = 4096;
+    const long n = state.range(0);
+    const double skew = state.range(1) / 100.0;
+    Sampler sampler(n, skew);
+    std::vector<int64_t> out(BATCH);
 
-BENCHMARK_MAIN();
\ No newline at end of file
+    for (auto _ : state) {
+        sampler.sample_batch(out.data(), BATCH);
+        benchmark::DoNotOptimize(out.data());
+        benchmark::ClobberMemory();
+    }
+
+    state.SetItemsProcessed(state.iterations() * BATCH);
+    set_grid_counters(state, n, skew);
+}
+
+const std::vector<int64_t> SIZES = {10'000, 1'000'000, 10'000'000};
+const std::vector<int64_t> SKEWS = {80, 99, 120, 150};
+// Gray et al.'s method (fio, LeanStore) is only defined for skew < 1, pgbench's rejection method only for skew > 1
+const std::vector<int64_t> GRAY_SKEWS = {50, 80, 99};
+const std::vector<int64_t> PG_SKEWS = {120, 150};
+
+#define REGISTER_SAMPLER(sampler, skews)                                             \
+    BENCHMARK_TEMPLATE(BM_Setup, sampler)                                            \
+        ->ArgNames({"n", "skew"})->ArgsProduct({SIZES, skews})                       \
+        ->Unit(benchmark::kMillisecond)->UseRealTime();                              \
+    BENCHMARK_TEMPLATE(BM_Throughput, sampler)                                       \
+        ->ArgNames({"n", "skew"})->ArgsProduct({SIZES, skews})                       \
+        ->Unit(benchmark::kNanosecond)->UseRealTime()
+
+REGISTER_SAMPLER(rejection, SKEWS);
+REGISTER_SAMPLER(rji, SKEWS);
+BENCHMARK_TEMPLATE(BM_BatchThroughput, rji)
+    ->ArgNames({"n", "skew"})->ArgsProduct({SIZES, SKEWS})->Unit(benchmark::kNanosecond)->UseRealTime();
+REGISTER_SAMPLER(marsaglia, SKEWS);
+REGISTER_SAMPLER(alias, SKEWS);
+REGISTER_SAMPLER(hybrid, SKEWS);
+REGISTER_SAMPLER(guide, SKEWS);
+BENCHMARK_TEMPLATE(BM_BatchThroughput, guide)
+    ->ArgNames({"n", "skew"})->ArgsProduct({SIZES, SKEWS})->Unit(benchmark::kNanosecond)->UseRealTime();
+REGISTER_SAMPLER(guide_f32, SKEWS);
+BENCHMARK_TEMPLATE(BM_BatchThroughput, guide_f32)
+    ->ArgNames({"n", "skew"})->ArgsProduct({SIZES, SKEWS})->Unit(benchmark::kNanosecond)->UseRealTime();
+REGISTER_SAMPLER(fio, GRAY_SKEWS);
+REGISTER_SAMPLER(lean_store, GRAY_SKEWS);
+REGISTER_SAMPLER(sysbench, SKEWS);
+REGISTER_SAMPLER(pg_bench, PG_SKEWS);
+REGISTER_SAMPLER(rocksdb, SKEWS);
+
+int main(int argc, char** argv) {
+    // Measure table construction of the Condensed Table Lookup rather than a cache lookup, unless a cache is set explicitly
+    setenv("ZIPF_TABLE_CACHE", "", 0);
+
+    benchmark::Initialize(&argc, argv);
+    if (benchmark::ReportUnrecognizedArguments(argc, argv)) {
+        return 1;
+    }
+    benchmark::RunSpecifiedBenchmarks();
+    benchmark::Shutdown();
+    return 0;
+}
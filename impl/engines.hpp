@@ -0,0 +1,298 @@
+#ifndef ENGINES_HPP
+#define ENGINES_HPP
+
+#include <cstdint>
+#include <istream>
+#include <limits>
+#include <ostream>
+
+/**
+ * Random bit engines the samplers can be instantiated with, as alternatives to std::mt19937_64 (2.5 KB of state).
+ * All of them model std::uniform_random_bit_generator with 64-bit outputs, so the std distributions work unchanged, and
+ * are constructed from a single integer seed (expanded through splitmix64, or used as the Philox key).
+ *  - xoshiro256pp: 32 bytes of state, jump() skips 2^128 draws
+ *  - pcg64:        PCG XSL-RR 128/64, discard() in O(log n)
+ *  - philox4x64:   counter-based Philox4x64-10 (Salmon et al., SC'11), discard() in O(1)
+ * Like the std engines, their state can be written to and restored from a stream as space-separated integers.
+ */
+namespace engines {
+
+inline uint64_t splitmix64(uint64_t& state) {
+    uint64_t z = (state += 0x9e3779b97f4a7c15ULL);
+    z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+    z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+    return z ^ (z >> 31);
+}
+
+inline constexpr uint64_t rotl(uint64_t x, int k) {
+    return (x << k) | (x >> (64 - k));
+}
+
+class xoshiro256pp {
+public:
+    using result_type = uint64_t;
+
+    explicit xoshiro256pp(uint64_t seed) {
+        for (auto& word : s) {
+            word = splitmix64(seed);
+        }
+    }
+
+    static constexpr result_type min() { return 0; }
+    static constexpr result_type max() { return std::numeric_limits<result_type>::max(); }
+
+    result_type operator()() {
+        const uint64_t result = rotl(s[0] + s[3], 23) + s[0];
+        const uint64_t t = s[1] << 17;
+        s[2] ^= s[0];
+        s[3] ^= s[1];
+        s[1] ^= s[2];
+        s[0] ^= s[3];
+        s[2] ^= t;
+        s[3] = rotl(s[3], 45);
+        return result;
+    }
+
+    void discard(unsigned long long n) {
+        for (; n > 0; n--) {
+            (*this)();
+        }
+    }
+
+    /* Equivalent to 2^128 draws, yields non-overlapping streams for parallel instances */
+    void jump() {
+        static constexpr uint64_t JUMP[] = {0x180ec6d33cfd0aba, 0xd5a61266f0c9392c, 0xa9582618e03fc9aa, 0x39abdc4529b1661c};
+        uint64_t t[4] = {0, 0, 0, 0};
+        for (uint64_t word : JUMP) {
+            for (int b = 0; b < 64; b++) {
+                if (word & (1ULL << b)) {
+                    for (int i = 0; i < 4; i++) {
+                        t[i] ^= s[i];
+                    }
+                }
+                (*this)();
+            }
+        }
+        for (int i = 0; i < 4; i++) {
+            s[i] = t[i];
+        }
+    }
+
+    friend std::ostream& operator<<(std::ostream& os, const xoshiro256pp& engine) {
+        return os << engine.s[0] << ' ' << engine.s[1] << ' ' << engine.s[2] << ' ' << engine.s[3];
+    }
+
+    friend std::istream& operator>>(std::istream& is, xoshiro256pp& engine) {
+        return is >> engine.s[0] >> engine.s[1] >> engine.s[2] >> engine.s[3];
+    }
+
+private:
+    uint64_t s[4];
+};
+
+class pcg64 {
+public:
+    using result_type = uint64_t;
+
+    explicit pcg64(uint64_t seed) {
+        const unsigned __int128 init_state = (static_cast<unsigned __int128>(splitmix64(seed)) << 64) | splitmix64(seed);
+        const unsigned __int128 init_seq = (static_cast<unsigned __int128>(splitmix64(seed)) << 64) | splitmix64(seed);
+        state = 0;
+        inc = (init_seq << 1) | 1;
+        step();
+        state += init_state;
+        step();
+    }
+
+    static constexpr result_type min() { return 0; }
+    static constexpr result_type max() { return std::numeric_limits<result_type>::max(); }
+
+    result_type operator()() {
+        step();
+        const uint64_t hi = static_cast<uint64_t>(state >> 64);
+        const uint64_t lo = static_cast<uint64_t>(state);
+        const int rot = static_cast<int>(hi >> 58);
+        const uint64_t x = hi ^ lo;
+        return (x >> rot) | (x << ((64 - rot) & 63));
+    }
+
+    /* Jump ahead by n draws in O(log n) (Brown, "Random number generation with arbitrary strides") */
+    void discard(unsigned long long n) {
+        unsigned __int128 cur_mult = MULTIPLIER, cur_plus = inc, acc_mult = 1, acc_plus = 0;
+        while (n > 0) {
+            if (n & 1) {
+                acc_mult *= cur_mult;
+                acc_plus = acc_plus * cur_mult + cur_plus;
+            }
+            cur_plus = (cur_mult + 1) * cur_plus;
+            cur_mult *= cur_mult;
+            n >>= 1;
+        }
+        state = acc_mult * state + acc_plus;
+    }
+
+    /* The 128-bit state and increment are written as their high and low words */
+    friend std::ostream& operator<<(std::ostream& os, const pcg64& engine) {
+        return os << static_cast<uint64_t>(engine.state >> 64) << ' ' << static_cast<uint64_t>(engine.state) << ' '
+                  << static_cast<uint64_t>(engine.inc >> 64) << ' ' << static_cast<uint64_t>(engine.inc);
+    }
+
+    friend std::istream& operator>>(std::istream& is, pcg64& engine) {
+        uint64_t state_hi, state_lo, inc_hi, inc_lo;
+        if (is >> state_hi >> state_lo >> inc_hi >> inc_lo) {
+            engine.state = (static_cast<unsigned __int128>(state_hi) << 64) | state_lo;
+            engine.inc = (static_cast<unsigned __int128>(inc_hi) << 64) | inc_lo;
+        }
+        return is;
+    }
+
+private:
+    static constexpr unsigned __int128 MULTIPLIER =
+        (static_cast<unsigned __int128>(0x2360ed051fc65da4ULL) << 64) | 0x4385df649fccf645ULL;
+
+    unsigned __int128 state;
+    unsigned __int128 inc;
+
+    void step() {
+        state = state * MULTIPLIER + inc;
+    }
+};
+
+class philox4x64 {
+public:
+    using result_type = uint64_t;
+
+    /* The seed is the key, the counter starts at 0 */
+    explicit philox4x64(uint64_t seed) : key{seed, 0}, counter{0, 0, 0, 0}, buffer{}, index(4) {}
+
+    static constexpr result_type min() { return 0; }
+    static constexpr result_type max() { return std::numeric_limits<result_type>::max(); }
+
+    result_type operator()() {
+        if (index == 4) {
+            generate();
+            increment(1);
+            index = 0;
+        }
+        return buffer[index++];
+    }
+
+    /* Skip n draws in O(1) by moving the counter */
+    void discard(unsigned long long n) {
+        const unsigned long long buffered = 4 - index;
+        if (n <= buffered) {
+            index += static_cast<int>(n);
+            return;
+        }
+        n -= buffered;
+        increment(n / 4);
+        index = 4;
+        if (n % 4 != 0) {
+            generate();
+            increment(1);
+            index = static_cast<int>(n % 4);
+        }
+    }
+
+    /* Key, counter, the buffered block and the position in it */
+    friend std::ostream& operator<<(std::ostream& os, const philox4x64& engine) {
+        os << engine.key[0] << ' ' << engine.key[1];
+        for (int i = 0; i < 4; i++) {
+            os << ' ' << engine.counter[i];
+        }
+        for (int i = 0; i < 4; i++) {
+            os << ' ' << engine.buffer[i];
+        }
+        return os << ' ' << engine.index;
+    }
+
+    friend std::istream& operator>>(std::istream& is, philox4x64& engine) {
+        philox4x64 restored(0);
+        is >> restored.key[0] >> restored.key[1];
+        for (int i = 0; i < 4; i++) {
+            is >> restored.counter[i];
+        }
+        for (int i = 0; i < 4; i++) {
+            is >> restored.buffer[i];
+        }
+        if (is >> restored.index && 0 <= restored.index && restored.index <= 4) {
+            engine = restored;
+        } else {
+            is.setstate(std::ios::failbit);
+        }
+        return is;
+    }
+
+private:
+    static constexpr uint64_t M0 = 0xd2e7470ee14c6c93ULL;
+    static constexpr uint64_t M1 = 0xca5a826395121157ULL;
+    static constexpr uint64_t W0 = 0x9e3779b97f4a7c15ULL;
+    static constexpr uint64_t W1 = 0xbb67ae8584caa73bULL;
+    static constexpr int ROUNDS = 10;
+
+    uint64_t key[2];
+    uint64_t counter[4];
+    uint64_t buffer[4];
+    int index;
+
+    static void mulhilo(uint64_t a, uint64_t b, uint64_t& hi, uint64_t& lo) {
+        const unsigned __int128 product = static_cast<unsigned __int128>(a) * b;
+        hi = static_cast<uint64_t>(product >> 64);
+        lo = static_cast<uint64_t>(product);
+    }
+
+    void generate() {
+        uint64_t x[4] = {counter[0], counter[1], counter[2], counter[3]};
+        uint64_t k0 = key[0], k1 = key[1];
+        for (int round = 0; round < ROUNDS; round++) {
+            uint64_t hi0, lo0, hi1, lo1;
+            mulhilo(M0, x[0], hi0, lo0);
+            mulhilo(M1, x[2], hi1, lo1);
+            x[0] = hi1 ^ x[1] ^ k0;
+            x[1] = lo1;
+            x[2] = hi0 ^ x[3] ^ k1;
+            x[3] = lo0;
+            k0 += W0;
+            k1 += W1;
+        }
+        for (int i = 0; i < 4; i++) {
+            buffer[i] = x[i];
+        }
+    }
+
+    /* 256-bit counter addition */
+    void increment(unsigned long long blocks) {
+        const uint64_t before = counter[0];
+        counter[0] += blocks;
+        if (counter[0] < before) {
+            for (int i = 1; i < 4 && ++counter[i] == 0; i++) {}
+        }
+    }
+};
+
+/* Wraps an engine and counts its draws, used to profile how many random numbers a sampler consumes */
+template <typename Engine>
+class counting_engine {
+public:
+    using result_type = typename Engine::result_type;
+
+    explicit counting_engine(uint64_t seed) : engine(seed), draws(0) {}
+
+    static constexpr result_type min() { return Engine::min(); }
+    static constexpr result_type max() { return Engine::max(); }
+
+    result_type operator()() {
+        draws++;
+        return engine();
+    }
+
+    uint64_t count() const { return draws; }
+
+private:
+    Engine engine;
+    uint64_t draws;
+};
+
+}
+
+#endif
@@ -0,0 +1,167 @@
+#ifndef GUIDE_TABLE_SAMPLER_HPP
+#define GUIDE_TABLE_SAMPLER_HPP
+
+#include <random>
+#include <vector>
+#include <cmath>
+#include <algorithm>
+#include <cstdint>
+#include <limits>
+#include <stdexcept>
+
+#include "zipf_dist.hpp"
+#include "simd_math.hpp"
+#include "engines.hpp"
+
+/**
+ * Inversion through a guide table (Chen and Asau, "On generating random variates from an empirical distribution", 1974).
+ * The CDF over all ranks is stored as 'Real' (double, or float to halve its memory at 2^-24 resolution), and guide[j]
+ * holds the first rank whose CDF falls into guide cell j or above. A variate u starts its linear search at the guide
+ * entry of its cell u * range, which takes less than two comparisons in expectation. The result is exact inversion, so
+ * it is monotone in u and works with common random numbers across samplers (see quantile).
+ *
+ * The weights are computed in SIMD lanes and normalized by zipf_dist's harmonic sum. Supports ranges up to 2^32.
+ */
+template <typename Engine = std::mt19937_64, typename Real = double>
+class basic_guide_table_sampler {
+public:
+    static_assert(Engine::min() == 0 && Engine::max() == std::numeric_limits<uint64_t>::max(), "guide_table_sampler needs 64-bit draws");
+
+    static constexpr long MAX_RANGE = 1L << 32;
+
+    basic_guide_table_sampler(long range, double skew, long seed) : range(range), rng(seed) {
+        if (range < 1 || range > MAX_RANGE) {
+            throw std::invalid_argument("guide_table_sampler supports ranges in [1, 2^32]");
+        }
+        build_cdf(skew);
+        build_guide();
+    }
+
+    /* Rank of the uniform u in [0, 1), the inverse CDF */
+    long quantile(double u) const {
+        uint64_t k = guide[cell(u)];
+        while (cdf[k] <= u) {
+            k++;
+        }
+        return static_cast<long>(k) + 1;
+    }
+
+    long sample() {
+        return quantile(uniform());
+    }
+
+    /**
+     * Fill 'out' with 'count' samples, equal to repeated sample() calls. For blocks of uniforms, the guide lookups and the
+     * first search steps run branch-free in SIMD lanes (as gathers), only the rare lanes still short of their rank finish
+     * in a scalar loop.
+     */
+    void sample_batch(int64_t* out, long count) {
+        alignas(64) double u[BATCH_BLOCK];
+        alignas(64) uint64_t k[BATCH_BLOCK];
+
+        const uint32_t* guide_ = guide.data();
+        const Real* cdf_ = cdf.data();
+
+        for (long filled = 0; filled < count; filled += BATCH_BLOCK) {
+            const long block = std::min<long>(BATCH_BLOCK, count - filled);
+            for (long i = 0; i < block; i++) {
+                u[i] = uniform();
+            }
+
+            #pragma omp simd aligned(u, k : 64)
+            for (long i = 0; i < block; i++) {
+                uint64_t k_i = guide_[cell(u[i])];
+                for (int step = 0; step < SIMD_STEPS; step++) {
+                    k_i += cdf_[k_i] <= u[i];
+                }
+                k[i] = k_i;
+            }
+
+            for (long i = 0; i < block; i++) {
+                uint64_t k_i = k[i];
+                while (cdf_[k_i] <= u[i]) {
+                    k_i++;
+                }
+                out[filled + i] = static_cast<int64_t>(k_i) + 1;
+            }
+        }
+    }
+
+    /* Size of the CDF and guide table in bytes */
+    size_t table_bytes() const {
+        return cdf.size() * sizeof(Real) + guide.size() * sizeof(uint32_t);
+    }
+
+    /* The random bit engine, e.g. to skip ahead or to read the draws of a counting_engine */
+    Engine& engine() {
+        return rng;
+    }
+
+private:
+    static constexpr long BATCH_BLOCK = 256;
+    // Branch-free search steps of the batch kernel, covering the expected < 2 comparisons of most lanes
+    static constexpr int SIMD_STEPS = 2;
+
+    long range;
+    std::vector<Real> cdf;
+    std::vector<uint32_t> guide;
+
+    Engine rng;
+
+    /* Guide cell of u in [0, 1]. Rounding can map u just below 1 to 'range', so the guide has range + 1 cells */
+    uint64_t cell(double u) const {
+        return simd_math::to_index(u * static_cast<double>(range));
+    }
+
+    /* Uniform in [0, 1) with 53 random bits */
+    double uniform() {
+        return static_cast<double>(rng() >> 11) * 0x1p-53;
+    }
+
+    void build_cdf(double skew) {
+        cdf.resize(range);
+        std::vector<double> weight(range);
+        double* weight_ = weight.data();
+
+        if constexpr (simd_math::VECTORIZED) {
+            #pragma omp simd
+            for (long i = 0; i < range; i++) {
+                weight_[i] = simd_math::exp(-skew * simd_math::log(simd_math::from_index(i + 1)));
+            }
+        } else {
+            for (long i = 0; i < range; i++) {
+                weight_[i] = std::exp(-skew * std::log(static_cast<double>(i + 1)));
+            }
+        }
+
+        // Accumulate in double regardless of Real
+        const double inv_norm = 1.0 / zipf_dist::_generate_harmonic_range(skew, 1, range);
+        double sum = 0.0;
+        for (long i = 0; i < range; i++) {
+            sum += weight_[i];
+            cdf[i] = static_cast<Real>(std::min(sum * inv_norm, 1.0));
+        }
+        // Every search ends at the last rank at the latest
+        cdf[range - 1] = 1;
+    }
+
+    /* cell() is monotone, so any u in cell j has its rank at or after the first CDF entry in cell j or above */
+    void build_guide() {
+        guide.resize(range + 1);
+        uint64_t k = 0;
+        for (long j = 0; j <= range; j++) {
+            while (cell(cdf[k]) < static_cast<uint64_t>(j)) {
+                k++;
+            }
+            guide[j] = static_cast<uint32_t>(k);
+        }
+    }
+};
+
+template <typename Engine = std::mt19937_64>
+using basic_guide_table_sampler_f32 = basic_guide_table_sampler<Engine, float>;
+
+using guide_table_sampler = basic_guide_table_sampler<>;
+using guide_table_sampler_f32 = basic_guide_table_sampler_f32<>;
+
+#endif
@@ -0,0 +1,78 @@
+#ifndef HYBRID_SAMPLER_HPP
+#define HYBRID_SAMPLER_HPP
+
+#include <random>
+#include <vector>
+#include <cmath>
+#include <algorithm>
+#include <cstdint>
+#include <limits>
+#include <unistd.h>
+
+#include "alias_sampler.hpp"
+#include "rji_sampler.hpp"
+#include "zipf_dist.hpp"
+#include "engines.hpp"
+
+/**
+ * Bounded-memory Zipf sampler: an alias_table covers only the 'head' most frequent ranks, the tail [head + 1, range] is
+ * sampled by rejection-inversion. The table has one extra entry carrying the tail's mass, so a single draw and table probe
+ * either yield a head rank or hand over to the tail sampler. The mixture weights are exact, the tail mass being the
+ * generalized harmonic sum over the tail (zipf_dist::_generate_harmonic_range).
+ *
+ * By default the head is sized so the table takes half of the L2 cache. Memory and setup time are then independent of
+ * the range, while most variates still cost one table probe, as most of the Zipf mass sits in the first ranks.
+ */
+template <typename Engine = std::mt19937_64>
+class basic_hybrid_sampler {
+public:
+    static_assert(Engine::min() == 0 && Engine::max() == std::numeric_limits<uint64_t>::max(), "hybrid_sampler needs 64-bit draws");
+
+    /* 'head' is the number of ranks in the table, 0 sizes it to the L2 cache */
+    basic_hybrid_sampler(long range, double skew, long seed, long head = 0)
+        : head(std::min(range, head > 0 ? head : default_head())),
+          tail(range, skew, seed, std::min(this->head + 1, range)) {
+        std::vector<double> weight(this->head + 1);
+        double total = 0.0;
+        for (long i = this->head; i >= 1; i--) {
+            weight[i - 1] = std::exp(-skew * std::log(static_cast<double>(i)));
+            total += weight[i - 1];
+        }
+        weight[this->head] = zipf_dist::_generate_harmonic_range(skew, this->head + 1, range);
+        total += weight[this->head];
+
+        table = alias_table(std::move(weight), total);
+    }
+
+    long sample() {
+        const long index = static_cast<long>(table.pick(engine()()));
+        return index < head ? index + 1 : tail.sample();
+    }
+
+    /* Size of the head table in bytes */
+    size_t table_bytes() const {
+        return table.bytes();
+    }
+
+    /* The random bit engine, shared by the head table and the tail sampler */
+    Engine& engine() {
+        return tail.engine();
+    }
+
+private:
+    static constexpr long DEFAULT_L2_BYTES = 1L << 20;
+
+    long head;
+    alias_table table;
+    basic_rji_sampler<Engine> tail;
+
+    /* Ranks whose table, including the tail entry, fills half of the L2 cache */
+    static long default_head() {
+        const long l2 = sysconf(_SC_LEVEL2_CACHE_SIZE);
+        return (l2 > 0 ? l2 : DEFAULT_L2_BYTES) / 2 / static_cast<long>(sizeof(alias_table::entry)) - 1;
+    }
+};
+
+using hybrid_sampler = basic_hybrid_sampler<>;
+
+#endif
@@ -6,29 +6,53 @@
 #include <cmath>
 #include <algorithm>
 #include <iostream>
+#include <cstdint>
+#include <cstring>
 
 #include "zipf_dist.hpp"
+#include "table_cache.hpp"
+#include "engines.hpp"
 
 /**
  * Implementation based on Marsaglia's Condensed Table lookup. Modification includes a MacLaurin approximated Harmonic Number
  * Heavily inspired by Apache Common's implementation:  https://github.com/apache/commons-rng/blob/master/commons-rng-sampling/src/main/java/org/apache/commons/rng/sampling/distribution/MarsagliaTsangWangDiscreteSampler.java
  * and the original paper: https://www.jstatsoft.org/article/view/v011i03 
+ *
+ * The built tables are cached on disk (see table_cache.hpp) and memory-mapped read-only by later constructions
+ * with the same (range, skew, precision), so repeated runs and parallel workers share one copy.
  */
-class marsaglia_sampler {
+template <typename Engine = std::mt19937_64>
+class basic_marsaglia_sampler {
 public:
-    marsaglia_sampler(long range, double skew, long seed)
-        : range(range), skew(skew), rng(seed), dist(0.0, (1 << 30) - 1), pmf(range) {
-        
+    basic_marsaglia_sampler(long range, double skew, long seed)
+        : range(range), skew(skew), rng(seed), dist(0.0, (1 << 30) - 1) {
+
+        const std::string path = table_cache::path("marsaglia", CACHE_VERSION, range, skew, PRECISION);
+        if (!path.empty() && map_tables(path)) {
+            table_cache::touch(path);
+            return;
+        }
+
         // Precompute PMF table
+        std::vector<double> pmf(range);
         H_n = zipf_dist::_generate_harmonic(skew, range);
         for (int i = 1; i <= range; ++i) {
             pmf[i - 1] = 1.0 / (std::pow(i, skew) * H_n);
         }
 
         // Build tables
-        build_tables();
+        build_tables(pmf);
+        bind_tables();
+
+        // Swap the private copy for the shared mapping once the tables are on disk
+        if (!path.empty() && store_tables(path) && map_tables(path)) {
+            release_tables();
+        }
     }
 
+    basic_marsaglia_sampler(const basic_marsaglia_sampler&) = delete;
+    basic_marsaglia_sampler& operator=(const basic_marsaglia_sampler&) = delete;
+
     long sample() {
        int j = dist(rng);
         if (j < t1_) {
@@ -44,19 +68,121 @@ public:
         } 
     }
 
+    /* Size of the five tables in bytes, whether built or mapped from the cache */
+    size_t table_bytes() const {
+        const size_t entries = (t1_ >> 24) + ((t2_ - t1_) >> 18) + ((t3_ - t2_) >> 12) + ((t4_ - t3_) >> 6)
+                               + ((1L << PRECISION) - t4_);
+        return entries * sizeof(int);
+    }
+
+    /* The random bit engine, e.g. to skip ahead or to read the draws of a counting_engine */
+    Engine& engine() {
+        return rng;
+    }
+
 private:
+    static constexpr uint32_t CACHE_VERSION = 1;
+    static constexpr int PRECISION = 30;
+
+    /* Layout of a cached table file: this header followed by the five tables as int32 */
+    struct cache_header {
+        char magic[8];
+        uint32_t version;
+        uint32_t precision;
+        int64_t range;
+        double skew;
+        uint64_t sizes[5];
+        int32_t bounds[4];
+    };
+
     long range;
     double skew;
     double H_n;
-    std::vector<int> table1_, table2_, table3_, table4_, table5_;
-    std::vector<double> pmf;
+    std::vector<int> tables_[5];
+    const int* table1_;
+    const int* table2_;
+    const int* table3_;
+    const int* table4_;
+    const int* table5_;
     int t1_, t2_, t3_, t4_;
+    mapped_file mapped_;
 
-    std::mt19937_64 rng;
+    Engine rng;
     std::uniform_int_distribution<int> dist;
 
-    void build_tables() {
-        constexpr int64_t TOTAL = 1LL << 30; 
+    void bind_tables() {
+        table1_ = tables_[0].data();
+        table2_ = tables_[1].data();
+        table3_ = tables_[2].data();
+        table4_ = tables_[3].data();
+        table5_ = tables_[4].data();
+    }
+
+    void release_tables() {
+        for (auto& table : tables_) {
+            std::vector<int>().swap(table);
+        }
+    }
+
+    bool map_tables(const std::string& path) {
+        if (!mapped_.open(path) || mapped_.size() < sizeof(cache_header)) {
+            mapped_.close();
+            return false;
+        }
+
+        cache_header header;
+        std::memcpy(&header, mapped_.data(), sizeof(header));
+
+        size_t expected = sizeof(header);
+        for (uint64_t size : header.sizes) {
+            expected += size * sizeof(int32_t);
+        }
+
+        if (std::memcmp(header.magic, "MTWZIPF", 8) != 0 || header.version != CACHE_VERSION
+            || header.precision != PRECISION || header.range != range
+            || std::memcmp(&header.skew, &skew, sizeof(skew)) != 0 || mapped_.size() != expected) {
+            mapped_.close();
+            return false;
+        }
+
+        const int* table = reinterpret_cast<const int*>(mapped_.data() + sizeof(header));
+        const int** targets[5] = {&table1_, &table2_, &table3_, &table4_, &table5_};
+        for (int k = 0; k < 5; k++) {
+            *targets[k] = table;
+            table += header.sizes[k];
+        }
+
+        t1_ = header.bounds[0];
+        t2_ = header.bounds[1];
+        t3_ = header.bounds[2];
+        t4_ = header.bounds[3];
+        return true;
+    }
+
+    bool store_tables(const std::string& path) const {
+        cache_header header{};
+        std::memcpy(header.magic, "MTWZIPF", 8);
+        header.version = CACHE_VERSION;
+        header.precision = PRECISION;
+        header.range = range;
+        header.skew = skew;
+        for (int k = 0; k < 5; k++) {
+            header.sizes[k] = tables_[k].size();
+        }
+        header.bounds[0] = t1_;
+        header.bounds[1] = t2_;
+        header.bounds[2] = t3_;
+        header.bounds[3] = t4_;
+
+        std::vector<std::pair<const void*, size_t>> parts = {{&header, sizeof(header)}};
+        for (const auto& table : tables_) {
+            parts.emplace_back(table.data(), table.size() * sizeof(int));
+        }
+        return table_cache::write(path, parts);
+    }
+
+    void build_tables(const std::vector<double>& pmf) {
+        constexpr int64_t TOTAL = 1LL << PRECISION; 
         double sum = 0.0;
         for (double p : pmf) {
             sum += p;
@@ -98,11 +224,16 @@ private:
             size4 += getBase64Digit(m, 4);
             size5 += getBase64Digit(m, 5);
         }
-        table1_.resize(size1);
-        table2_.resize(size2);
-        table3_.resize(size3);
-        table4_.resize(size4);
-        table5_.resize(size5);
+        std::vector<int>& table1 = tables_[0];
+        std::vector<int>& table2 = tables_[1];
+        std::vector<int>& table3 = tables_[2];
+        std::vector<int>& table4 = tables_[3];
+        std::vector<int>& table5 = tables_[4];
+        table1.resize(size1);
+        table2.resize(size2);
+        table3.resize(size3);
+        table4.resize(size4);
+        table5.resize(size5);
 
         size_t pos1 = 0, pos2 = 0, pos3 = 0, pos4 = 0, pos5 = 0;
         for (int i = 0; i < range; i++) {
@@ -113,26 +244,26 @@ private:
             int d4 = getBase64Digit(prob[i], 4);
             int d5 = getBase64Digit(prob[i], 5);
             for (int j = 0; j < d1; j++) {
-                table1_[pos1++] = value;
+                table1[pos1++] = value;
             }
             for (int j = 0; j < d2; j++) {
-                table2_[pos2++] = value;
+                table2[pos2++] = value;
             }
             for (int j = 0; j < d3; j++) {
-                table3_[pos3++] = value;
+                table3[pos3++] = value;
             }
             for (int j = 0; j < d4; j++) {
-                table4_[pos4++] = value;
+                table4[pos4++] = value;
             }
             for (int j = 0; j < d5; j++) {
-                table5_[pos5++] = value;
+                table5[pos5++] = value;
             }
         }
 
-        t1_ = table1_.size() << 24;
-        t2_ = t1_ + (table2_.size() << 18);
-        t3_ = t2_ + (table3_.size() << 12);
-        t4_ = t3_ + (table4_.size() << 6);
+        t1_ = table1.size() << 24;
+        t2_ = t1_ + (table2.size() << 18);
+        t3_ = t2_ + (table3.size() << 12);
+        t4_ = t3_ + (table4.size() << 6);
     }
 
     static int getBase64Digit(int m, int k) {
@@ -140,6 +271,8 @@ private:
     }
 }; 
 
+using marsaglia_sampler = basic_marsaglia_sampler<>;
+
 #endif
     
     
\ No newline at end of file
@@ -0,0 +1,37 @@
+#ifndef RAW_ENCODING_HPP
+#define RAW_ENCODING_HPP
+
+#include <cstdint>
+
+/**
+ * Compact encodings of raw sample streams. varint_delta writes the difference of each sample to its predecessor,
+ * zigzag-mapped to unsigned and stored as a LEB128 varint (7 bits per byte, high bit set on all but the last byte).
+ * Zipf samples cluster at the first ranks, so most deltas fit into one or two bytes.
+ */
+namespace raw_encoding {
+
+/* Upper bound of the encoded size of one sample */
+constexpr long MAX_VARINT_BYTES = 10;
+
+[[gnu::always_inline]] inline uint64_t zigzag(int64_t value) {
+    return (static_cast<uint64_t>(value) << 1) ^ static_cast<uint64_t>(value >> 63);
+}
+
+/* Encode 'count' items after 'previous' into 'out', which holds at least count * MAX_VARINT_BYTES bytes. Returns the bytes written */
+inline long encode_varint_delta(const int64_t* items, long count, int64_t previous, uint8_t* out) {
+    uint8_t* cursor = out;
+    for (long i = 0; i < count; i++) {
+        uint64_t value = zigzag(static_cast<int64_t>(static_cast<uint64_t>(items[i]) - static_cast<uint64_t>(previous)));
+        previous = items[i];
+        while (value >= 0x80) {
+            *cursor++ = static_cast<uint8_t>(value) | 0x80;
+            value >>= 7;
+        }
+        *cursor++ = static_cast<uint8_t>(value);
+    }
+    return cursor - out;
+}
+
+}
+
+#endif
@@ -3,21 +3,22 @@
 
 #include <random>
 
+#include "engines.hpp"
+
 /**
  * Base implementation of the sampler using rejection sampling, due to Jason Crease (https://jasoncrease.medium.com/rejection-sampling-the-zipf-distribution-6b359792cffa)
  * with optimizations inspired on https://docs.rs/rand_distr/latest/src/rand_distr/zipf.rs.html
  */
-class rejection_sampler {
+template <typename Engine = std::mt19937_64>
+class basic_rejection_sampler {
 public:
-    rejection_sampler(long range, double skew, long seed)
+    basic_rejection_sampler(long range, double skew, long seed)
         : range(range), skew(skew), seed(seed),
           one_minus_skew(1.0 - skew),
           inv_one_minus_skew(1.0 / (1.0 - skew)),
-          inv_max(1.0 / (std::mt19937_64::max() + 1.0)) 
+          inv_max(1.0 / (Engine::max() + 1.0)),
+          gen(seed)
     {
-        std::random_device rd;
-        std::mt19937_64 gen(rd());
-        std::uniform_real_distribution<double> dis(0.0, 1.0);
         _t = (std::pow(range, one_minus_skew) - skew) * inv_one_minus_skew;
     }
 
@@ -41,6 +42,11 @@ public:
         }
     }
 
+    /* The random bit engine, e.g. to skip ahead or to read the draws of a counting_engine */
+    Engine& engine() {
+        return gen;
+    }
+
 private:
     const long range;
     const double skew;
@@ -51,7 +57,9 @@ private:
     
     double _t;
     std::uniform_real_distribution<double> dis;
-    std::mt19937_64 gen;
+    Engine gen;
 };
 
+using rejection_sampler = basic_rejection_sampler<>;
+
 #endif
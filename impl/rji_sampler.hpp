@@ -3,16 +3,26 @@
 
 #include <iostream>
 #include <random>
+#include <algorithm>
+#include <cstdint>
+
+#include "simd_math.hpp"
+#include "engines.hpp"
 
 #define TAYLOR_THRESHOLD 1e-8
 
-class rji_sampler {
+/**
+ * Rejection-inversion sampler (Hoermann and Derflinger) over the ranks [first, range], with weights proportional to
+ * k^-skew. 'first' defaults to 1, the full Zipf distribution; larger values sample only its tail.
+ */
+template <typename Engine = std::mt19937_64>
+class basic_rji_sampler {
 public:
-    rji_sampler(long range, double skew, long seed)
-        : range(range), exponent(skew), seed(seed) {
-            hIntegralX1 = hIntegral(1.5) - 1;
+    basic_rji_sampler(long range, double skew, long seed, long first = 1)
+        : range(range), first(first), exponent(skew), seed(seed), rng(seed) {
+            hIntegralX1 = hIntegral(first + 0.5) - h(first);
             hIntegralNumberOfElements = hIntegral(range + 0.5);
-            s = 2 - hIntegralInverse(hIntegral(2.5) - h(2));
+            s = (first + 1) - hIntegralInverse(hIntegral(first + 1.5) - h(first + 1));
             dist = std::uniform_real_distribution<double>(hIntegralX1, hIntegralNumberOfElements);
         }
 
@@ -24,8 +34,8 @@ public:
             double x = hIntegralInverse(u);
             long k = (long)(x + 0.5);
 
-            if (k < 1) {
-                k = 1;
+            if (k < first) {
+                k = first;
             } else if (k > range) {
                 k = range;
             }
@@ -36,16 +46,88 @@ public:
         }
     }
 
+    /**
+     * Fill 'out' with 'count' samples. Uniforms are drawn in blocks from the same stream as sample() and inverted in SIMD
+     * lanes. Most lanes pass the cheap 'k - x <= s' test, only the remaining ones are packed together for the second,
+     * costlier acceptance test. A compaction pass then keeps the accepted lanes in order, and the rejected ones are
+     * refilled by the next block, which draws only as many uniforms as samples are still missing. The output thus equals
+     * that of repeated sample() calls, up to the last-ulp differences of the vectorized log/exp.
+     */
+    void sample_batch(int64_t* out, long count) {
+        if constexpr (!simd_math::VECTORIZED) {
+            for (long i = 0; i < count; i++) {
+                out[i] = sample();
+            }
+            return;
+        }
+
+        alignas(64) double u[BATCH_BLOCK];
+        alignas(64) double k[BATCH_BLOCK];
+        alignas(64) int64_t accept[BATCH_BLOCK];
+        alignas(64) double pending_u[BATCH_BLOCK];
+        alignas(64) double pending_k[BATCH_BLOCK];
+        alignas(64) int64_t pending_accept[BATCH_BLOCK];
+        long pending_index[BATCH_BLOCK];
+
+        const double min_k = static_cast<double>(first);
+        const double max_k = static_cast<double>(range);
+        long filled = 0;
+        while (filled < count) {
+            const long block = std::min<long>(BATCH_BLOCK, count - filled);
+            for (long i = 0; i < block; i++) {
+                u[i] = dist(this->rng);
+            }
+
+            #pragma omp simd aligned(u, k, accept : 64)
+            for (long i = 0; i < block; i++) {
+                const double x = hIntegralInverseSimd(u[i]);
+                const double k_i = simd_math::floor_positive(std::clamp(x + 0.5, min_k, max_k));
+                k[i] = k_i;
+                accept[i] = k_i - x <= s;
+            }
+
+            long pending = 0;
+            for (long i = 0; i < block; i++) {
+                pending_index[pending] = i;
+                pending_u[pending] = u[i];
+                pending_k[pending] = k[i];
+                pending += !accept[i];
+            }
+
+            #pragma omp simd aligned(pending_u, pending_k, pending_accept : 64)
+            for (long j = 0; j < pending; j++) {
+                pending_accept[j] = pending_u[j] >= hIntegralSimd(pending_k[j] + 0.5) - hSimd(pending_k[j]);
+            }
+
+            for (long j = 0; j < pending; j++) {
+                accept[pending_index[j]] = pending_accept[j];
+            }
+
+            // Compaction: every lane is written, but only accepted lanes advance the output position
+            for (long i = 0; i < block; i++) {
+                out[filled] = static_cast<int64_t>(k[i]);
+                filled += accept[i];
+            }
+        }
+    }
+
+    /* The random bit engine, e.g. to skip ahead or to read the draws of a counting_engine */
+    Engine& engine() {
+        return rng;
+    }
+
 private:
+    static constexpr long BATCH_BLOCK = 256;
+
     long range;
+    long first;
     double exponent;
     long seed;
 
     /* Private constants related to RJI */
     std::uniform_real_distribution<double> dist;
-    std::mt19937_64 rng; 
+    Engine rng;
     double s;
-    double r;
     double hIntegralX1;
     double hIntegralNumberOfElements;
 
@@ -67,6 +149,33 @@ private:
         return std::exp(helper1(t) * x);
     }
 
+    /* Branch-free variants of the methods above for the SIMD batch kernel */
+    inline double hIntegralSimd(const double x) const {
+        const double logX = simd_math::log(x);
+        return helper2Simd((1 - exponent) * logX) * logX;
+    }
+
+    inline double hSimd(const double x) const {
+        return simd_math::exp(-exponent * simd_math::log(x));
+    }
+
+    inline double hIntegralInverseSimd(const double x) const {
+        const double t = std::max(x * (1 - exponent), -1.0);
+        return simd_math::exp(helper1Simd(t) * x);
+    }
+
+    inline static double helper1Simd(const double x) {
+        const double exact = simd_math::log1p(x) / x;
+        const double taylor = 1 - x * (0.5 - x * (0.33333333333333333 - 0.25 * x));
+        return std::abs(x) > 1e-8 ? exact : taylor;
+    }
+
+    inline static double helper2Simd(const double x) {
+        const double exact = simd_math::expm1(x) / x;
+        const double taylor = 1 + x * 0.5 *(1 + x * 0.33333333333333333 * (1 + 0.25 * x));
+        return std::abs(x) > 1e-8 ? exact : taylor;
+    }
+
     inline static double helper1(const double x) {
         if (std::abs(x) > 1e-8) {
             return std::log1p(x) / x;
@@ -84,4 +193,6 @@ private:
     }
 };
 
+using rji_sampler = basic_rji_sampler<>;
+
 #endif
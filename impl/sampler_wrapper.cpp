@@ -1,28 +1,63 @@
 #include <chrono>
+#include <cstdint>
+#include <sstream>
+#include <stdexcept>
+#include <string>
 
-volatile long dummy;
+#include "rejection_sampler.hpp"
+#include "rji_sampler.hpp"
+#include "marsaglia_sampler.hpp"
+#include "alias_sampler.hpp"
+#include "hybrid_sampler.hpp"
+#include "guide_table_sampler.hpp"
+#include "scrambler.hpp"
+#include "raw_encoding.hpp"
+#include "engines.hpp"
 
-#ifdef USE_REJ_SAMPLER
-    #include "rejection_sampler.hpp"
-#elif defined(USE_RJI_SAMPLER)
-    #include "rji_sampler.hpp"
-#elif defined(USE_MARSAGLIA_SAMPLER)
-    #include "marsaglia_sampler.hpp"
-#else
-    #error "No sampler implementation selected. Define USE_BASE_SAMPLER or USE_IMPL2_SAMPLER."
+#ifndef SAMPLER_ISA
+    #define SAMPLER_ISA "native"
 #endif
 
+volatile long dummy;
+
+/**
+ * Runtime-selectable sampler interface. The per-variate loops live in the templated subclasses,
+ * so only the per-call dispatch is virtual, not the sampling itself. Both the sampler and its
+ * random bit engine (see engines.hpp) are chosen at runtime.
+ */
+class zipf_sampler {
+public:
+    virtual ~zipf_sampler() = default;
+    virtual long sample() = 0;
+    virtual void sample_into(int64_t* out, long count) = 0;
+    virtual long benchmark(long samples) = 0;
+    virtual void discard(unsigned long long draws) = 0;
+    virtual size_t table_bytes() const = 0;
+    virtual std::string get_state() = 0;
+    virtual bool set_state(const std::string& state) = 0;
+};
+
 template <typename SamplerImpl>
-class sampler_wrapper {
+class sampler_wrapper : public zipf_sampler {
 public:
     sampler_wrapper(long range, long seed, double skew)
         : sampler(range, skew, seed) {}
 
-    long sample() {
+    long sample() override {
         return sampler.sample();
     }
 
-    long benchmark(long samples) {
+    void sample_into(int64_t* out, long count) override {
+        if constexpr (requires { sampler.sample_batch(out, count); }) {
+            sampler.sample_batch(out, count);
+        } else {
+            for (long i = 0; i < count; i++) {
+                out[i] = sampler.sample();
+            }
+        }
+    }
+
+    long benchmark(long samples) override {
         auto t1 = std::chrono::high_resolution_clock::now();
         for (long i = 0; i < samples; i++) {
             dummy = sampler.sample();
@@ -31,36 +66,249 @@ public:
         return std::chrono::duration_cast<std::chrono::milliseconds>(t2 - t1).count();
     }
 
+    void discard(unsigned long long draws) override {
+        sampler.engine().discard(draws);
+    }
+
+    size_t table_bytes() const override {
+        if constexpr (requires { sampler.table_bytes(); }) {
+            return sampler.table_bytes();
+        } else {
+            return 0;
+        }
+    }
+
+    /* The samplers draw through stateless distributions, so the engine holds all of their mutable state */
+    std::string get_state() override {
+        std::ostringstream os;
+        os << sampler.engine();
+        return os.str();
+    }
+
+    /* Leaves the engine untouched if 'state' doesn't parse */
+    bool set_state(const std::string& state) override {
+        std::istringstream is(state);
+        auto engine = sampler.engine();
+        if (!(is >> engine)) {
+            return false;
+        }
+        sampler.engine() = engine;
+        return true;
+    }
+
 private:
     SamplerImpl sampler;
 };
 
+/* Must match SamplerKind in benchmarks/SamplerLibrary.py */
+enum sampler_kind {
+    REJECTION_SAMPLER = 0,
+    RJI_SAMPLER = 1,
+    MARSAGLIA_SAMPLER = 2,
+    ALIAS_SAMPLER = 3,
+    HYBRID_SAMPLER = 4,
+    GUIDE_TABLE_SAMPLER = 5,
+    GUIDE_TABLE_F32_SAMPLER = 6,
+};
+
+/* Must match RngEngine in benchmarks/SamplerLibrary.py */
+enum engine_kind {
+    MT19937_64 = 0,
+    XOSHIRO256PP = 1,
+    PCG64 = 2,
+    PHILOX4X64 = 3,
+};
+
+/* Must match ScrambleKind in benchmarks/SamplerLibrary.py */
+enum scramble_kind {
+    SCRAMBLE_HASH = 1,
+    SCRAMBLE_FEISTEL = 2,
+};
+
+static bool is_valid(int kind, int engine) {
+    return REJECTION_SAMPLER <= kind && kind <= GUIDE_TABLE_F32_SAMPLER && MT19937_64 <= engine && engine <= PHILOX4X64;
+}
+
+/* Call f.operator()<T>() with the sampler type for 'kind', instantiated with Engine */
+template <typename Engine, typename F>
+static auto with_sampler(int kind, F&& f) {
+    switch (kind) {
+        case REJECTION_SAMPLER:
+            return f.template operator()<basic_rejection_sampler<Engine>>();
+        case RJI_SAMPLER:
+            return f.template operator()<basic_rji_sampler<Engine>>();
+        case ALIAS_SAMPLER:
+            return f.template operator()<basic_alias_sampler<Engine>>();
+        case HYBRID_SAMPLER:
+            return f.template operator()<basic_hybrid_sampler<Engine>>();
+        case GUIDE_TABLE_SAMPLER:
+            return f.template operator()<basic_guide_table_sampler<Engine>>();
+        case GUIDE_TABLE_F32_SAMPLER:
+            return f.template operator()<basic_guide_table_sampler_f32<Engine>>();
+        default:
+            return f.template operator()<basic_marsaglia_sampler<Engine>>();
+    }
+}
+
+/* Call f.operator()<T>() with the engine type for 'engine' */
+template <typename F>
+static auto with_engine(int engine, F&& f) {
+    switch (engine) {
+        case XOSHIRO256PP:
+            return f.template operator()<engines::xoshiro256pp>();
+        case PCG64:
+            return f.template operator()<engines::pcg64>();
+        case PHILOX4X64:
+            return f.template operator()<engines::philox4x64>();
+        default:
+            return f.template operator()<std::mt19937_64>();
+    }
+}
+
 // Extern C API
 extern "C" {
-    // Template instantiations
-#ifdef USE_REJ_SAMPLER
-    using SelectedSampler = sampler_wrapper<rejection_sampler>;
-#elif defined(USE_RJI_SAMPLER)
-    using SelectedSampler = sampler_wrapper<rji_sampler>;
-#elif defined(USE_MARSAGLIA_SAMPLER)
-    using SelectedSampler = sampler_wrapper<marsaglia_sampler>;
-#else
-    #error "No sampler implementation selected"
-#endif
-
-    SelectedSampler* create_sampler(long range, long seed, double skew) {
-        return new SelectedSampler(range, seed, skew);
+    /* nullptr for an invalid kind or engine, or parameters the sampler doesn't support */
+    zipf_sampler* create_sampler(int kind, int engine, long range, double skew, long seed) {
+        if (!is_valid(kind, engine)) {
+            return nullptr;
+        }
+        try {
+            return with_engine(engine, [&]<typename Engine>() {
+                return with_sampler<Engine>(kind, [&]<typename Sampler>() -> zipf_sampler* {
+                    return new sampler_wrapper<Sampler>(range, seed, skew);
+                });
+            });
+        } catch (const std::invalid_argument&) {
+            return nullptr;
+        }
     }
 
-    void destroy_sampler(SelectedSampler* sampler) {
+    void destroy_sampler(zipf_sampler* sampler) {
         delete sampler;
     }
 
-    long sample(SelectedSampler* sampler) {
+    long sample(zipf_sampler* sampler) {
         return sampler->sample();
     }
 
-    long benchmark(SelectedSampler* sampler, long samples) {
+    void sample_into(zipf_sampler* sampler, int64_t* out, long count) {
+        sampler->sample_into(out, count);
+    }
+
+    long benchmark(zipf_sampler* sampler, long samples) {
         return sampler->benchmark(samples);
     }
+
+    /* Memory held by the sampler's lookup tables, 0 for samplers without tables */
+    size_t sampler_table_bytes(zipf_sampler* sampler) {
+        return sampler->table_bytes();
+    }
+
+    /* Skip 'draws' outputs of the sampler's engine, O(1) for Philox and O(log n) for PCG64 */
+    void skip_sampler(zipf_sampler* sampler, unsigned long long draws) {
+        sampler->discard(draws);
+    }
+
+    /**
+     * Write the engine state of the sampler as a null-terminated string into 'buffer' if it fits into 'capacity' bytes.
+     * Returns the length of the state without the terminator, so callers can retry with a larger buffer
+     */
+    long get_sampler_state(zipf_sampler* sampler, char* buffer, long capacity) {
+        const std::string state = sampler->get_state();
+        const long length = static_cast<long>(state.size());
+        if (length < capacity) {
+            state.copy(buffer, state.size());
+            buffer[length] = '\0';
+        }
+        return length;
+    }
+
+    /* Restore a state written by get_sampler_state, -1 if it doesn't parse as a state of the sampler's engine */
+    int set_sampler_state(zipf_sampler* sampler, const char* state) {
+        return sampler->set_state(state) ? 0 : -1;
+    }
+
+    /* Average number of engine draws per variate over 'samples' variates, -1 for an invalid kind, engine or parameters */
+    double rng_draws_per_variate(int kind, int engine, long range, double skew, long seed, long samples) {
+        if (!is_valid(kind, engine) || samples <= 0) {
+            return -1;
+        }
+        try {
+            return with_engine(engine, [&]<typename Engine>() {
+                return with_sampler<engines::counting_engine<Engine>>(kind, [&]<typename Sampler>() {
+                    Sampler sampler(range, skew, seed);
+                    for (long i = 0; i < samples; i++) {
+                        dummy = sampler.sample();
+                    }
+                    return static_cast<double>(sampler.engine().count()) / samples;
+                });
+            });
+        } catch (const std::invalid_argument&) {
+            return -1.0;
+        }
+    }
+
+    /* Nanoseconds per draw of the engine alone, -1 for an invalid engine */
+    double engine_ns_per_draw(int engine, long draws) {
+        if (!is_valid(REJECTION_SAMPLER, engine) || draws <= 0) {
+            return -1;
+        }
+        return with_engine(engine, [&]<typename Engine>() {
+            Engine rng(1);
+            uint64_t acc = 0;
+            auto t1 = std::chrono::high_resolution_clock::now();
+            for (long i = 0; i < draws; i++) {
+                acc ^= rng();
+            }
+            auto t2 = std::chrono::high_resolution_clock::now();
+            dummy = static_cast<long>(acc);
+            return std::chrono::duration<double, std::nano>(t2 - t1).count() / draws;
+        });
+    }
+
+    /**
+     * Scramble 'count' items in [0, size) in place, or with 'inverse' map scrambled keys back to their items.
+     * Returns -1 for an unknown kind, an empty keyspace or the inverse of the hash, which has none
+     */
+    int scramble_keys(int kind, uint64_t size, uint64_t seed, int64_t* items, long count, int inverse) {
+        if (size == 0) {
+            return -1;
+        }
+        switch (kind) {
+            case SCRAMBLE_HASH:
+                if (inverse) {
+                    return -1;
+                }
+                scrambler::hash_scrambler(size, seed).apply(items, count);
+                return 0;
+            case SCRAMBLE_FEISTEL:
+                if (inverse) {
+                    scrambler::feistel_scrambler(size, seed).invert(items, count);
+                } else {
+                    scrambler::feistel_scrambler(size, seed).apply(items, count);
+                }
+                return 0;
+            default:
+                return -1;
+        }
+    }
+
+    /* Scramble a single item in [0, size), -1 for an unknown kind or an empty keyspace */
+    int64_t scramble_key(int kind, uint64_t size, uint64_t seed, int64_t item) {
+        int64_t key = item;
+        return scramble_keys(kind, size, seed, &key, 1, 0) == 0 ? key : -1;
+    }
+
+    /**
+     * Varint-delta encode 'count' items, continuing the stream after 'previous', into 'out' of at least
+     * count * MAX_VARINT_BYTES bytes. Returns the number of bytes written
+     */
+    long encode_varint_delta(const int64_t* items, long count, int64_t previous, uint8_t* out) {
+        return raw_encoding::encode_varint_delta(items, count, previous, out);
+    }
+
+    /* Instruction set this variant of the library was compiled for */
+    const char* sampler_isa() {
+        return SAMPLER_ISA;
+    }
 }
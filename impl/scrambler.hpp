@@ -0,0 +1,144 @@
+#ifndef SCRAMBLER_HPP
+#define SCRAMBLER_HPP
+
+#include <algorithm>
+#include <bit>
+#include <cstdint>
+
+#include "engines.hpp"
+
+/**
+ * Key scrambling stages for sample batches, mapping items in [0, size) onto keys in [0, size) so that the most frequent
+ * ranks are spread across the keyspace (YCSB's scrambled Zipfian). Both work in place on int64 batches.
+ *  - hash_scrambler:    seeded 64-bit hash permutation reduced to [0, size), merges some items so it has no inverse
+ *  - feistel_scrambler: exact bijection, a balanced Feistel network over the smallest even bit width covering size with
+ *                       cycle walking back into [0, size), plus its inverse
+ */
+namespace scrambler {
+
+/* splitmix64's finalizer, a bijection on 64-bit integers */
+[[gnu::always_inline]] inline uint64_t mix64(uint64_t x) {
+    x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9ULL;
+    x = (x ^ (x >> 27)) * 0x94d049bb133111ebULL;
+    return x ^ (x >> 31);
+}
+
+class hash_scrambler {
+public:
+    hash_scrambler(uint64_t size, uint64_t seed) : size(size), key(engines::splitmix64(seed)) {}
+
+    /* The hash is reduced by multiply-shift (Lemire) rather than a 64-bit division */
+    void apply(int64_t* items, long count) const {
+        for (long i = 0; i < count; i++) {
+            const uint64_t hash = mix64(static_cast<uint64_t>(items[i]) ^ key);
+            items[i] = static_cast<int64_t>((static_cast<unsigned __int128>(hash) * size) >> 64);
+        }
+    }
+
+private:
+    uint64_t size;
+    uint64_t key;
+};
+
+class feistel_scrambler {
+public:
+    static constexpr int ROUNDS = 4;
+
+    feistel_scrambler(uint64_t size, uint64_t seed) : size(size) {
+        const int bits = std::max(2, static_cast<int>(std::bit_width(size - 1)));
+        half = (bits + 1) / 2;
+        mask = (1ULL << half) - 1;
+        for (auto& key : keys) {
+            key = engines::splitmix64(seed);
+        }
+    }
+
+    void apply(int64_t* items, long count) const {
+        walk<false>(items, count);
+    }
+
+    void invert(int64_t* items, long count) const {
+        walk<true>(items, count);
+    }
+
+private:
+    static constexpr long BLOCK = 256;
+
+    uint64_t size;
+    int half;
+    uint64_t mask;
+    uint64_t keys[ROUNDS];
+
+    [[gnu::always_inline]] inline uint64_t permute(uint64_t x) const {
+        uint64_t left = x >> half, right = x & mask;
+        for (int r = 0; r < ROUNDS; r++) {
+            const uint64_t next = left ^ (mix64(right ^ keys[r]) & mask);
+            left = right;
+            right = next;
+        }
+        return (left << half) | right;
+    }
+
+    [[gnu::always_inline]] inline uint64_t unpermute(uint64_t x) const {
+        uint64_t left = x >> half, right = x & mask;
+        for (int r = ROUNDS - 1; r >= 0; r--) {
+            const uint64_t previous = right ^ (mix64(left ^ keys[r]) & mask);
+            right = left;
+            left = previous;
+        }
+        return (left << half) | right;
+    }
+
+    /**
+     * Cycle walking in blocks: every lane is permuted once in SIMD, then the lanes outside [0, size) are packed and
+     * permuted again, also in SIMD, until none is left. The network covers less than 4 * size values, so a lane takes
+     * fewer than 4 permutations in expectation.
+     */
+    template <bool Inverse>
+    void walk(int64_t* items, long count) const {
+        alignas(64) uint64_t x[BLOCK];
+        alignas(64) uint64_t walking[BLOCK];
+        long outside[BLOCK];
+
+        for (long start = 0; start < count; start += BLOCK) {
+            const long block = std::min(BLOCK, count - start);
+            int64_t* out = items + start;
+
+            #pragma omp simd aligned(x : 64)
+            for (long i = 0; i < block; i++) {
+                x[i] = Inverse ? unpermute(static_cast<uint64_t>(out[i])) : permute(static_cast<uint64_t>(out[i]));
+            }
+
+            long pending = 0;
+            for (long i = 0; i < block; i++) {
+                outside[pending] = i;
+                walking[pending] = x[i];
+                pending += x[i] >= size;
+            }
+
+            while (pending > 0) {
+                #pragma omp simd aligned(walking : 64)
+                for (long j = 0; j < pending; j++) {
+                    walking[j] = Inverse ? unpermute(walking[j]) : permute(walking[j]);
+                }
+
+                long remaining = 0;
+                for (long j = 0; j < pending; j++) {
+                    x[outside[j]] = walking[j];
+                    outside[remaining] = outside[j];
+                    walking[remaining] = walking[j];
+                    remaining += walking[j] >= size;
+                }
+                pending = remaining;
+            }
+
+            for (long i = 0; i < block; i++) {
+                out[i] = static_cast<int64_t>(x[i]);
+            }
+        }
+    }
+};
+
+}
+
+#endif
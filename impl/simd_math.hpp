@@ -0,0 +1,135 @@
+#ifndef SIMD_MATH_HPP
+#define SIMD_MATH_HPP
+
+#include <bit>
+#include <cstdint>
+#include <limits>
+
+/**
+ * Branch-free exp/log family for use inside '#pragma omp simd' loops. libm calls block vectorization, so these use only
+ * arithmetic, bit manipulation and selects, which the compiler maps onto 4 (AVX2) or 8 (AVX-512) double lanes.
+ * exp and log follow fdlibm (Cody-Waite reduction, log's minimax polynomial) and are accurate to about 1 ulp for normal
+ * inputs. log1p and expm1 are derived from them with Goldberg's and Kahan's corrections, so they stay accurate near 0.
+ */
+namespace simd_math {
+
+// Without AVX2 the compiler can't vectorize these functions, and in scalar code libm is faster
+#if defined(__AVX2__)
+constexpr bool VECTORIZED = true;
+#else
+constexpr bool VECTORIZED = false;
+#endif
+
+constexpr double LN2_HI = 6.93147180369123816490e-01;
+constexpr double LN2_LO = 1.90821492927058770002e-10;
+constexpr double LOG2E = 1.44269504088896338700e+00;
+constexpr double SQRT2 = 1.41421356237309514547e+00;
+// Adding this rounds a double with |x| < 2^51 to an integer and leaves it in the low mantissa bits
+constexpr double ROUND_MAGIC = 0x1.8p52;
+constexpr double EXP_OVERFLOW = 7.09782712893383973096e+02;
+constexpr double EXP_UNDERFLOW = -7.45133219101941108420e+02;
+
+constexpr double INF = std::numeric_limits<double>::infinity();
+
+/* 2^n for integral n in [-2044, 2046], split in two factors so results down to the subnormal range stay exact */
+[[gnu::always_inline]] inline double exp2i(double n) {
+    const double half = (n * 0.5 + ROUND_MAGIC) - ROUND_MAGIC;
+    const int64_t a = static_cast<int64_t>(std::bit_cast<uint64_t>(half + ROUND_MAGIC) & 0xfffffffffffffULL) - (1LL << 51);
+    const int64_t b = static_cast<int64_t>(std::bit_cast<uint64_t>((n - half) + ROUND_MAGIC) & 0xfffffffffffffULL) - (1LL << 51);
+    return std::bit_cast<double>(static_cast<uint64_t>(a + 1023) << 52) * std::bit_cast<double>(static_cast<uint64_t>(b + 1023) << 52);
+}
+
+[[gnu::always_inline]] inline double exp(double x) {
+    const double n = (x * LOG2E + ROUND_MAGIC) - ROUND_MAGIC;
+    const double r = (x - n * LN2_HI) - n * LN2_LO;
+
+    // Taylor polynomial, |r| <= ln(2)/2 keeps the truncation error below 2^-56
+    double p = 1.0 / 6227020800.0;
+    p = p * r + 1.0 / 479001600.0;
+    p = p * r + 1.0 / 39916800.0;
+    p = p * r + 1.0 / 3628800.0;
+    p = p * r + 1.0 / 362880.0;
+    p = p * r + 1.0 / 40320.0;
+    p = p * r + 1.0 / 5040.0;
+    p = p * r + 1.0 / 720.0;
+    p = p * r + 1.0 / 120.0;
+    p = p * r + 1.0 / 24.0;
+    p = p * r + 1.0 / 6.0;
+    p = p * r + 0.5;
+    p = p * r + 1.0;
+    p = p * r + 1.0;
+
+    double result = p * exp2i(n);
+    result = x > EXP_OVERFLOW ? INF : result;
+    result = x < EXP_UNDERFLOW ? 0.0 : result;
+    return result;
+}
+
+[[gnu::always_inline]] inline double log(double x) {
+    constexpr double Lg1 = 6.666666666666735130e-01;
+    constexpr double Lg2 = 3.999999999940941908e-01;
+    constexpr double Lg3 = 2.857142874366239149e-01;
+    constexpr double Lg4 = 2.222219843214978396e-01;
+    constexpr double Lg5 = 1.818357216161805012e-01;
+    constexpr double Lg6 = 1.531383769920937332e-01;
+    constexpr double Lg7 = 1.479819860511658591e-01;
+
+    // x = m * 2^e with m in [1, 2), the biased exponent is turned into a double through the mantissa bits
+    const uint64_t bits = std::bit_cast<uint64_t>(x);
+    double e = std::bit_cast<double>(0x4330000000000000ULL | (bits >> 52)) - (0x1p52 + 1023.0);
+    double m = std::bit_cast<double>((bits & 0xfffffffffffffULL) | 0x3ff0000000000000ULL);
+
+    // Move m into [sqrt(2)/2, sqrt(2))
+    const bool high = m > SQRT2;
+    m = high ? m * 0.5 : m;
+    e = high ? e + 1.0 : e;
+
+    const double f = m - 1.0;
+    const double s = f / (2.0 + f);
+    const double z = s * s;
+    const double R = z * (Lg1 + z * (Lg2 + z * (Lg3 + z * (Lg4 + z * (Lg5 + z * (Lg6 + z * Lg7))))));
+    const double hfsq = 0.5 * f * f;
+
+    double result = e * LN2_HI - ((hfsq - (s * (hfsq + R) + e * LN2_LO)) - f);
+    result = x == INF ? INF : result;
+    result = x == 0.0 ? -INF : result;
+    result = x < 0.0 ? std::numeric_limits<double>::quiet_NaN() : result;
+    return result;
+}
+
+[[gnu::always_inline]] inline double log1p(double x) {
+    // log(u) * x / (u - 1) cancels the rounding error of u = 1 + x
+    const double u = 1.0 + x;
+    const double result = simd_math::log(u) * (x / (u - 1.0));
+    return u == 1.0 ? x : result;
+}
+
+[[gnu::always_inline]] inline double expm1(double x) {
+    // (u - 1) * x / log(u) cancels the rounding error of u = exp(x)
+    const double u = simd_math::exp(x);
+    double result = (u - 1.0) * (x / simd_math::log(u));
+    result = u == 1.0 ? x : result;
+    result = u - 1.0 == -1.0 ? -1.0 : result;
+    result = u == INF ? INF : result;
+    return result;
+}
+
+/* Exact conversion of i < 2^52 to double, AVX2 has no vectorized int64 to double conversion */
+[[gnu::always_inline]] inline double from_index(uint64_t i) {
+    return std::bit_cast<double>(0x4330000000000000ULL | i) - 0x1p52;
+}
+
+/* floor for 0 <= x < 2^52 */
+[[gnu::always_inline]] inline double floor_positive(double x) {
+    const double r = (x + 0x1p52) - 0x1p52;
+    return r > x ? r - 1.0 : r;
+}
+
+/* floor for 0 <= x < 2^52 as an integer, AVX2 has no vectorized double to int64 conversion either */
+[[gnu::always_inline]] inline uint64_t to_index(double x) {
+    return std::bit_cast<uint64_t>(floor_positive(x) + 0x1p52) & 0xfffffffffffffULL;
+}
+
+}
+
+#endif
@@ -0,0 +1,211 @@
+#ifndef TABLE_CACHE_HPP
+#define TABLE_CACHE_HPP
+
+#include <algorithm>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <filesystem>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+/**
+ * Read-only memory mapping of a precomputed table file. All processes mapping the same file share one physical copy
+ * through the page cache.
+ */
+class mapped_file {
+public:
+    mapped_file() = default;
+    mapped_file(const mapped_file&) = delete;
+    mapped_file& operator=(const mapped_file&) = delete;
+
+    ~mapped_file() {
+        close();
+    }
+
+    bool open(const std::string& path) {
+        close();
+        int fd = ::open(path.c_str(), O_RDONLY);
+        if (fd < 0) {
+            return false;
+        }
+
+        struct stat st;
+        if (fstat(fd, &st) != 0 || st.st_size == 0) {
+            ::close(fd);
+            return false;
+        }
+
+        void* addr = mmap(nullptr, st.st_size, PROT_READ, MAP_SHARED, fd, 0);
+        ::close(fd);
+        if (addr == MAP_FAILED) {
+            return false;
+        }
+
+        addr_ = addr;
+        size_ = st.st_size;
+        return true;
+    }
+
+    void close() {
+        if (addr_ != nullptr) {
+            munmap(addr_, size_);
+            addr_ = nullptr;
+            size_ = 0;
+        }
+    }
+
+    const char* data() const {
+        return static_cast<const char*>(addr_);
+    }
+
+    size_t size() const {
+        return size_;
+    }
+
+private:
+    void* addr_ = nullptr;
+    size_t size_ = 0;
+};
+
+namespace table_cache {
+
+/* Default bound of the cache directory, a handful of tables for n in the millions */
+inline constexpr uint64_t DEFAULT_MAX_BYTES = 1ULL << 30;
+
+/**
+ * Directory holding the cached tables: $ZIPF_TABLE_CACHE if set, otherwise ~/.cache/zipf_tables.
+ * Setting ZIPF_TABLE_CACHE to an empty string disables the cache.
+ */
+inline std::string directory() {
+    if (const char* dir = std::getenv("ZIPF_TABLE_CACHE")) {
+        return dir;
+    }
+    if (const char* home = std::getenv("HOME")) {
+        return std::string(home) + "/.cache/zipf_tables";
+    }
+    return "";
+}
+
+/**
+ * Size bound of the cache directory in bytes: $ZIPF_TABLE_CACHE_MAX_BYTES if set to a number, otherwise DEFAULT_MAX_BYTES
+ */
+inline uint64_t max_bytes() {
+    if (const char* value = std::getenv("ZIPF_TABLE_CACHE_MAX_BYTES")) {
+        char* end;
+        const unsigned long long bytes = std::strtoull(value, &end, 10);
+        if (end != value && *end == '\0') {
+            return bytes;
+        }
+    }
+    return DEFAULT_MAX_BYTES;
+}
+
+/**
+ * Mark the cached file at 'path' as used, its modification time orders the eviction
+ */
+inline void touch(const std::string& path) {
+    utimensat(AT_FDCWD, path.c_str(), nullptr, 0);
+}
+
+/**
+ * Remove the least recently used tables from the directory of 'keep' until the cached files fit into 'limit' bytes.
+ * 'keep' itself stays. Processes still mapping a removed file keep their mapping, only later lookups miss it.
+ */
+inline void evict(const std::string& keep, uint64_t limit) {
+    namespace fs = std::filesystem;
+    std::error_code ec;
+    std::vector<std::pair<fs::file_time_type, fs::path>> files;
+    uint64_t total = 0;
+    for (const auto& entry : fs::directory_iterator(fs::path(keep).parent_path(), ec)) {
+        if (!entry.is_regular_file(ec) || entry.path().extension() != ".bin") {
+            continue;
+        }
+        total += entry.file_size(ec);
+        if (entry.path() != fs::path(keep)) {
+            files.emplace_back(entry.last_write_time(ec), entry.path());
+        }
+    }
+
+    std::sort(files.begin(), files.end());
+    for (const auto& [time, file] : files) {
+        if (total <= limit) {
+            break;
+        }
+        const uint64_t size = fs::file_size(file, ec);
+        if (!ec && fs::remove(file, ec)) {
+            total -= size;
+        }
+    }
+}
+
+/**
+ * File name for the tables of 'name' with the given format version, keyed by (range, skew, precision).
+ * The skew is encoded by its exact bit pattern. Returns an empty string if caching is disabled.
+ */
+inline std::string path(const char* name, uint32_t version, long range, double skew, int precision) {
+    std::string dir = directory();
+    if (dir.empty()) {
+        return "";
+    }
+
+    uint64_t skew_bits;
+    std::memcpy(&skew_bits, &skew, sizeof(skew_bits));
+
+    char file[128];
+    std::snprintf(file, sizeof(file), "/%s_v%u_n%ld_s%016llx_p%d.bin",
+                  name, version, range, static_cast<unsigned long long>(skew_bits), precision);
+    return dir + file;
+}
+
+/**
+ * Write the concatenation of 'parts' to 'path'. The data goes to a temporary file that is renamed into place,
+ * so concurrent readers either see the complete file or none at all. Files larger than max_bytes() are not cached,
+ * otherwise the least recently used tables are evicted to keep the directory within it.
+ */
+inline bool write(const std::string& path, const std::vector<std::pair<const void*, size_t>>& parts) {
+    const uint64_t limit = max_bytes();
+    uint64_t bytes = 0;
+    for (const auto& part : parts) {
+        bytes += part.second;
+    }
+    if (bytes > limit) {
+        return false;
+    }
+
+    std::error_code ec;
+    std::filesystem::create_directories(std::filesystem::path(path).parent_path(), ec);
+    if (ec) {
+        return false;
+    }
+
+    std::string tmp = path + ".tmp." + std::to_string(getpid());
+    FILE* f = std::fopen(tmp.c_str(), "wb");
+    if (f == nullptr) {
+        return false;
+    }
+
+    bool ok = true;
+    for (const auto& [data, size] : parts) {
+        ok = ok && std::fwrite(data, 1, size, f) == size;
+    }
+    ok = (std::fclose(f) == 0) && ok;
+
+    if (!ok || std::rename(tmp.c_str(), path.c_str()) != 0) {
+        std::remove(tmp.c_str());
+        return false;
+    }
+    evict(path, limit);
+    return true;
+}
+
+} // namespace table_cache
+
+#endif
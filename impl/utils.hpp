@@ -36,7 +36,7 @@ double hurwitz_zeta(double s, double a, int n = 8) {
 
     // \sum_{k=1}^{\infty} B_{2k} / (2k)! * (s + 2k - 2) \prod_{j=0}^{2k-2} / (a + n)^(s + 2k - 2)
     double term4 = 0.0;
-    for (int k = 1; k < B.size(); ++k) {
+    for (size_t k = 1; 2 * k < B.size(); ++k) {
         double Bk = B[k * 2]; // Only even-indexed Bernoulli numbers are nonzero
         if (Bk == 0.0) continue;
 
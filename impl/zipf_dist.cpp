@@ -1,6 +1,8 @@
 #include "zipf_dist.hpp"
 #include "utils.hpp"
 
+#include <algorithm>
+
 double zipf_dist::_generate_harmonic(double a, long n) {
     if (a > 1) {
         return _generate_harmonic_gt1(a, n);
@@ -14,11 +16,53 @@ double zipf_dist::_generate_harmonic_leq1(double a, long n) {
 
     // Go from smallest to largets to avoid roundoff
     for (long i = n; i >= 1; i--) {
-        sum += 1.0 / (a + i);
+        sum += std::pow(i, -a);
     }
     return sum;
 }
 
+// Terms summed directly before switching to Euler-Maclaurin, whose error then stays below 1e-16 relative to the sum
+constexpr long DIRECT_TERMS = 1024;
+
+/* Generalized harmonic sum of k^-a over [first, last], in O(1) for long ranges and for any a >= 0 */
+double zipf_dist::_generate_harmonic_range(double a, long first, long last) {
+    if (last < first) {
+        return 0.0;
+    }
+
+    const long direct_last = std::min(last, first + DIRECT_TERMS - 1);
+    double sum = direct_last < last ? _euler_maclaurin(a, direct_last + 1, last) : 0.0;
+    for (long i = direct_last; i >= first; i--) {
+        sum += std::pow(i, -a);
+    }
+    return sum;
+}
+
+/* Euler-Maclaurin summation of f(k) = k^-a over [m, n] with the B2, B4 and B6 correction terms */
+double zipf_dist::_euler_maclaurin(double a, long m, long n) {
+    const double x = m, y = n;
+    const double log_ratio = std::log(y / x);
+
+    // Integral of k^-a over [m, n], through expm1 so it stays accurate for a close to 1
+    const double t = (1 - a) * log_ratio;
+    const double integral = std::pow(x, 1 - a) * log_ratio * (std::abs(t) > 1e-8 ? std::expm1(t) / t : 1 + t / 2);
+
+    // Odd derivatives of f, f^(j)(k) = -a(a+1)...(a+j-1) k^(-a-j)
+    auto derivative = [a](double k, int order) {
+        double coefficient = -1.0;
+        for (int j = 0; j < order; j++) {
+            coefficient *= a + j;
+        }
+        return coefficient * std::pow(k, -a - order);
+    };
+
+    const double ends = (std::pow(x, -a) + std::pow(y, -a)) / 2;
+    const double corrections = (derivative(y, 1) - derivative(x, 1)) / 12
+                             - (derivative(y, 3) - derivative(x, 3)) / 720
+                             + (derivative(y, 5) - derivative(x, 5)) / 30240;
+    return integral + ends + corrections;
+}
+
 double zipf_dist::_generate_harmonic_gt1(double a, long n) {
     return hurwitz_zeta(a, 1) - hurwitz_zeta(a, n + 1);
 }
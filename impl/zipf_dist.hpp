@@ -7,10 +7,12 @@ class zipf_dist {
         double pmf(double k, double a, long n);
         void set_harmonic(double a, long n);
         static double _generate_harmonic(double a, long n);
+        static double _generate_harmonic_range(double a, long first, long last);
     private:
         double H_n;
         static double _generate_harmonic_leq1(double a, long n);
         static double _generate_harmonic_gt1(double a, long n);
+        static double _euler_maclaurin(double a, long first, long last);
 };
 
 #endif
\ No newline at end of file